@@ -1,4 +1,5 @@
-from app.core.config import settings
-from app.core.templates import jinja2_templates
+from app.core.config import GAME_MODES, settings
+from app.core.metrics import get_mode_label, metrics, timed
+from app.core.templates import get_templates
 
-__all__ = ["settings", "jinja2_templates"]
+__all__ = ["GAME_MODES", "settings", "get_mode_label", "metrics", "timed", "get_templates"]
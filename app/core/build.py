@@ -0,0 +1,93 @@
+"""Builds what the app would otherwise prepare on startup or on first use, for faster cold starts:
+the templates, compiled to Python modules, and the static files, compressed as much as possible,
+along with a manifest of their hashes. The app only uses the parts of the build that are still up to date.
+
+Run with `python -m app.core.build [directory]`, once the dependencies are installed.
+"""
+
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+import jinja2
+from jinja2 import FileSystemLoader
+
+from app.core.caching import prepare_content
+from app.core.config import settings
+from app.core.manifest import MANIFEST_NAME, digest
+from app.core.templates import (
+    COMPILED_TEMPLATES_DIRECTORY,
+    TEMPLATES_DIRECTORY,
+    create_environment,
+    read_templates,
+)
+
+STATIC_DIRECTORY = "app/static"
+COMPRESSED_STATIC_DIRECTORY = "static"
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def build_static(build_path: str) -> dict[str, dict]:
+    """Compresses the static files into the build.
+
+    Args:
+        build_path (str): The directory of the build.
+
+    Returns:
+        dict[str, dict]: The entries of the manifest by the path of the file: the hash of its content
+            and the paths of its compressed encodings inside the build.
+    """
+    entries = {}
+    for root, _, names in os.walk(STATIC_DIRECTORY):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as file:
+                body = file.read()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            relative_path = os.path.relpath(path, STATIC_DIRECTORY).replace(os.sep, "/")
+            content = prepare_content(body, media_type=media_type, best=True)
+
+            encodings = {}
+            for encoding, encoded in content.encodings.items():
+                if encoding == "identity":
+                    continue
+                built_path = f"{COMPRESSED_STATIC_DIRECTORY}/{relative_path}{ENCODING_SUFFIXES[encoding]}"
+                os.makedirs(os.path.dirname(os.path.join(build_path, built_path)), exist_ok=True)
+                with open(os.path.join(build_path, built_path), "wb") as file:
+                    file.write(encoded)
+                encodings[encoding] = built_path
+            entries[relative_path] = {"digest": digest(body), "encodings": encodings}
+    return entries
+
+
+def build(build_path: str) -> dict:
+    """Replaces the build in a directory with a new one.
+
+    Args:
+        build_path (str): The directory of the build.
+
+    Returns:
+        dict: The manifest of the build.
+    """
+    shutil.rmtree(build_path, ignore_errors=True)
+    os.makedirs(build_path)
+
+    environment = create_environment(FileSystemLoader(TEMPLATES_DIRECTORY))
+    environment.compile_templates(os.path.join(build_path, COMPILED_TEMPLATES_DIRECTORY), zip=None)
+
+    manifest = {
+        "jinja2": jinja2.__version__,
+        "templates": {name: digest(source) for name, source in read_templates().items()},
+        "static": build_static(build_path),
+    }
+    with open(os.path.join(build_path, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else settings.BUILD_PATH
+    built = build(path)
+    print(f"Built {len(built['templates'])} templates and {len(built['static'])} static files into {path}")
@@ -0,0 +1,381 @@
+import gzip
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli  # type: ignore[import-untyped]
+except ImportError:
+    brotli = None  # type: ignore[assignment]
+
+from app.core.config import settings
+from app.core.manifest import digest, read_manifest
+from app.core.templates import get_templates
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+MIN_COMPRESSED_SIZE = 256
+PAGE_CACHE_CONTROL = "no-cache"
+UNVERSIONED_CACHE_CONTROL = "no-cache"
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+Key = tuple[str, tuple[tuple[str, object], ...]]
+
+
+class CachedContent(NamedTuple):
+    """A response body kept in memory, along with its compressed encodings and the entity tag of every encoding."""
+
+    media_type: str
+    encodings: dict[str, bytes]
+    etags: dict[str, str]
+
+
+def prepare_content(
+    body: bytes,
+    media_type: str,
+    best: bool = False,
+    compressed: dict[str, bytes] | None = None,
+    compress: bool = True,
+) -> CachedContent:
+    """Compresses a body with every available encoding, if it's worth it, and tags every encoding with its hash.
+    An encoding that doesn't make the body smaller is dropped.
+
+    Args:
+        body (bytes): The body.
+        media_type (str): Its media type.
+        best (bool, optional): Whether to compress as much as possible, which is only worth it for bodies
+            compressed once, like the static files. Defaults to False.
+        compressed (dict[str, bytes] | None, optional): The encodings of the body compressed in advance,
+            by the build, to use instead of compressing it again. Defaults to None.
+        compress (bool, optional): Whether to compress the body at all. Defaults to True.
+
+    Returns:
+        CachedContent: The body, under the `identity` encoding, and its compressed encodings.
+    """
+    encodings = {"identity": body}
+    if compressed is not None:
+        encodings.update(compressed)
+    elif compress and len(body) >= MIN_COMPRESSED_SIZE and media_type.startswith(COMPRESSIBLE_TYPES):
+        if brotli is not None:
+            encodings["br"] = brotli.compress(body, quality=11 if best else 5)
+        encodings["gzip"] = gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+    tag = digest(body)
+    encodings = {name: encoded for name, encoded in encodings.items() if len(encoded) < len(body) or name == "identity"}
+    etags = {name: f'"{tag}"' if name == "identity" else f'"{tag}-{name}"' for name in encodings}
+    return CachedContent(media_type=media_type, encodings=encodings, etags=etags)
+
+
+def get_size(content: CachedContent) -> int:
+    """Measures the memory a cached body takes up.
+
+    Args:
+        content (CachedContent): The body.
+
+    Returns:
+        int: The total size of its encodings, in bytes.
+    """
+    return sum(len(encoded) for encoded in content.encodings.values())
+
+
+def get_version(content: CachedContent) -> str:
+    """Takes the hash of a cached body out of its entity tag, to version its URL with.
+
+    Args:
+        content (CachedContent): The body.
+
+    Returns:
+        str: The hash.
+    """
+    return content.etags["identity"].strip('"')
+
+
+def choose_encoding(accept_encoding: str, encodings: dict[str, bytes]) -> str:
+    """Picks the smallest encoding of a body that the client accepts.
+
+    Args:
+        accept_encoding (str): The `Accept-Encoding` header of the request.
+        encodings (dict[str, bytes]): The encodings of the body.
+
+    Returns:
+        str: The name of the encoding, `identity` if no compressed one is accepted.
+    """
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        quality = parameters.strip().removeprefix("q=")
+        if name and quality not in ("0", "0.0", "0.00", "0.000"):
+            accepted.add(name.lower())
+
+    candidates = [name for name in encodings if name in accepted or ("*" in accepted and name != "identity")]
+    return min(candidates, key=lambda name: len(encodings[name]), default="identity")
+
+
+def respond(request: Request, content: CachedContent, cache_control: str) -> Response:
+    """Answers a request with a cached body, in the best encoding the client accepts,
+    or with `304 Not Modified` if the client already has that encoding.
+
+    Args:
+        request (Request): The request.
+        content (CachedContent): The body.
+        cache_control (str): The `Cache-Control` header of the response.
+
+    Returns:
+        Response: The response.
+    """
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), content.encodings)
+    etag = content.etags[encoding]
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content.encodings[encoding], media_type=content.media_type, headers=headers)
+
+
+class PageCache:
+    def __init__(self, max_bytes: int = 64_000_000, max_page_size: int = 1_000_000) -> None:
+        """Initialises an empty cache of rendered pages, kept in least recently used order.
+        A page only depends on its template and its context, like the size of the board,
+        so it's rendered and compressed once and then served from memory. The pages of huge custom boards
+        take tens of megabytes, so the pages above a size are rendered for every request instead,
+        and sent uncompressed.
+
+        Args:
+            max_bytes (int, optional): How many bytes the kept pages can take, with all their encodings.
+                Defaults to 64_000_000.
+            max_page_size (int, optional): The size of the largest page to keep and compress, in bytes.
+                Defaults to 1_000_000.
+        """
+        self.max_bytes = max_bytes
+        self.max_page_size = max_page_size
+        self.pages: OrderedDict[Key, CachedContent] = OrderedDict()
+        self.n_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.evicted = 0
+
+    @staticmethod
+    def get_key(template_name: str, context: dict[str, object]) -> Key:
+        """Makes the key of a page in the cache.
+
+        Args:
+            template_name (str): The name of the template.
+            context (dict[str, object]): The context of the template, all hashable.
+
+        Returns:
+            Key: The key.
+        """
+        return template_name, tuple(sorted(context.items()))
+
+    def get(self, template_name: str, **context: object) -> CachedContent | None:
+        """Takes a page from the cache, without rendering it.
+
+        Args:
+            template_name (str): The name of the template.
+            **context (object): The context of the template, all hashable.
+
+        Returns:
+            CachedContent | None: The page, or None if it isn't cached.
+        """
+        key = self.get_key(template_name, context)
+        with self.lock:
+            page = self.pages.get(key)
+            if page is not None:
+                self.pages.move_to_end(key)
+                self.hits += 1
+        return page
+
+    def render(self, template_name: str, **context: object) -> CachedContent:
+        """Renders a template, or takes it from the cache if it was rendered with the same context already.
+        Rendering can take a while, so the endpoints call it in a thread after `get` misses.
+
+        Args:
+            template_name (str): The name of the template.
+            **context (object): The context of the template, all hashable.
+
+        Returns:
+            CachedContent: The rendered page.
+        """
+        page = self.get(template_name, **context)
+        if page is not None:
+            return page
+
+        body = get_templates().get_template(template_name).render(**context).encode()
+        if len(body) > self.max_page_size:
+            with self.lock:
+                self.uncached += 1
+            return prepare_content(body, media_type="text/html; charset=utf-8", compress=False)
+
+        page = prepare_content(body, media_type="text/html; charset=utf-8")
+        key = self.get_key(template_name, context)
+        with self.lock:
+            self.misses += 1
+            previous = self.pages.pop(key, None)
+            if previous is not None:
+                self.n_bytes -= get_size(previous)
+            self.pages[key] = page
+            self.n_bytes += get_size(page)
+            while self.n_bytes > self.max_bytes and len(self.pages) > 1:
+                _, evicted = self.pages.popitem(last=False)
+                self.n_bytes -= get_size(evicted)
+                self.evicted += 1
+        return page
+
+    @property
+    def metrics(self) -> dict:
+        """The counters describing the cache."""
+        return {
+            "pages": len(self.pages),
+            "bytes": self.n_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "evicted": self.evicted,
+        }
+
+
+class PrecompressedStaticFiles:
+    def __init__(
+        self, directory: str, max_age: int = 3600, build_path: str | None = None, url_path: str = "/static"
+    ) -> None:
+        """Initialises a replacement for `StaticFiles` that serves the files of a directory from memory,
+        compressed in advance. The files are read once, on startup, so changes to them need a restart.
+
+        The pages link to the files with their hash in the URL, see `url`, so a file requested with its current
+        hash can be kept by the clients without checking whether it changed. Any other request of a file
+        is sent with `no-cache`, and revalidated with its entity tag.
+
+        Args:
+            directory (str): The directory of the files.
+            max_age (int, optional): How long the clients can use a file requested with its hash without checking
+                whether it changed, in seconds. Defaults to 3600.
+            build_path (str | None, optional): The directory of the build, whose manifest lists the files
+                compressed by `python -m app.core.build`. Defaults to None — compressing them all on startup.
+            url_path (str, optional): The path the directory is mounted at. Defaults to "/static".
+        """
+        self.directory = directory
+        self.cache_control = f"public, max-age={max_age}, immutable"
+        self.build_path = build_path
+        self.url_path = url_path
+        self.files: dict[str, CachedContent] | None = None
+        self.n_prebuilt = 0
+
+    def load(self) -> None:
+        """Reads all the files of the directory, and takes their compressed encodings from the build,
+        if it has them for the same content, or compresses them."""
+        manifest = read_manifest(self.build_path) if self.build_path is not None else None
+        built_files = manifest.get("static", {}) if manifest is not None else {}
+
+        files = {}
+        n_prebuilt = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, "rb") as file:
+                    body = file.read()
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                relative_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                compressed = self.read_built_file(built_files.get(relative_path), body=body)
+                n_prebuilt += compressed is not None
+                files[relative_path] = prepare_content(body, media_type=media_type, best=True, compressed=compressed)
+        self.files = files
+        self.n_prebuilt = n_prebuilt
+
+    def read_built_file(self, entry: dict | None, body: bytes) -> dict[str, bytes] | None:
+        """Reads the encodings of a file compressed by the build.
+
+        Args:
+            entry (dict | None): The entry of the file in the manifest.
+            body (bytes): The current content of the file.
+
+        Returns:
+            dict[str, bytes] | None: The compressed encodings, or None if the file isn't in the build,
+                changed since or its encodings can't be read.
+        """
+        if self.build_path is None or entry is None or entry.get("digest") != digest(body):
+            return None
+        compressed = {}
+        try:
+            for encoding, built_path in entry["encodings"].items():
+                with open(os.path.join(self.build_path, built_path), "rb") as file:
+                    compressed[encoding] = file.read()
+        except OSError:
+            return None
+        return compressed
+
+    def url(self, path: str) -> str:
+        """Makes the URL of a file, with the hash of its content, so that it changes along with the file.
+
+        Args:
+            path (str): The path of the file, relative to the directory.
+
+        Returns:
+            str: The URL, without the hash if there's no such file.
+        """
+        if self.files is None:
+            self.load()
+        assert self.files is not None
+
+        content = self.files.get(path)
+        if content is None:
+            return f"{self.url_path}/{path}"
+        return f"{self.url_path}/{path}?v={get_version(content)}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.files is None:
+            self.load()
+        assert self.files is not None
+
+        request = Request(scope, receive)
+        content = self.files.get(request.path_params.get("path", "") or self.get_path(scope))
+        response: Response
+        if request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+        elif content is None:
+            response = PlainTextResponse("Not Found", status_code=404)
+        else:
+            versioned = request.query_params.get("v") == get_version(content)
+            cache_control = self.cache_control if versioned else UNVERSIONED_CACHE_CONTROL
+            response = respond(request, content, cache_control=cache_control)
+        await response(scope, receive, send)
+
+    @staticmethod
+    def get_path(scope: Scope) -> str:
+        """Finds the path of the requested file inside the directory.
+
+        Args:
+            scope (Scope): The scope of the request, inside the mount of the directory.
+
+        Returns:
+            str: The path, relative to the directory.
+        """
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if path.startswith(root_path):
+            path = path[len(root_path) :]  # noqa: E203
+        return path.lstrip("/")
+
+
+static_files = PrecompressedStaticFiles(
+    directory="app/static", max_age=settings.STATIC_MAX_AGE, build_path=settings.BUILD_PATH
+)
+page_cache = PageCache(max_bytes=settings.PAGE_CACHE_MAX_BYTES, max_page_size=settings.PAGE_CACHE_MAX_PAGE_SIZE)
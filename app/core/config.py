@@ -1,10 +1,64 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+GAME_MODES: dict[str, tuple[int, int, int]] = {
+    "Small: 9×9, 10 mines": (9, 9, 10),
+    "Medium: 16×16, 40 mines": (16, 16, 40),
+    "Hard: 30×16, 99 mines": (30, 16, 99),
+    "Extreme: 24×30, 160 mines": (24, 30, 160),
+}
+
 
 class AppSettings(BaseSettings):
     HOST: str
     PORT: int
 
+    BOARD_POOL_SIZE: int = 16
+    BOARD_POOL_LOW_WATERMARK: int = 4
+    BOARD_POOL_EXECUTOR: str = "thread"
+    BOARD_POOL_WORKERS: int = 1
+
+    NO_GUESS_TIME_BUDGET: float = 1.0
+    NO_GUESS_CACHE_SIZE: int = 4
+    NO_GUESS_WORKERS: int = 1
+
+    CHUNKED_FIELD_MIN_SIZE: int = 1_000_000
+    STREAM_FRAME_SIZE: int = 4096
+
+    MULTIPLEX_MAX_GAMES: int = 16
+    MULTIPLEX_MAX_QUEUED: int = 64
+
+    PAGE_CACHE_MAX_BYTES: int = 64_000_000
+    PAGE_CACHE_MAX_PAGE_SIZE: int = 1_000_000
+    STATIC_MAX_AGE: int = 3600
+
+    BUILD_PATH: str = "build"
+    WARM_UP: bool = True
+    RELOAD: bool = True
+
+    OFFLOAD_EXECUTOR: str = "thread"
+    OFFLOAD_MIN_COST: int = 50_000
+    OFFLOAD_WORKERS: int = 2
+
+    PROBABILITY_MAX_CELLS: int = 40_000
+    PROBABILITY_MAX_EXACT_CELLS: int = 24
+    PROBABILITY_SAMPLES: int = 20_000
+    PROBABILITY_TIME_BUDGET: float = 0.05
+    PROBABILITY_MAX_TIME: float = 0.5
+
+    PROFILER_ENABLED: bool = False
+
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    GAME_LOG_SAMPLE_RATE: float = 1.0
+    REPLAY_LOG_PATH: str = ""
+
+    SESSION_MAX_GAMES: int = 10000
+    SESSION_TTL: float = 1800
+    SESSION_MAX_BYTES: int = 64 * 1024 * 1024
+    GAME_STORE: str = "memory"
+    GAME_STORE_PATH: str = "games.sqlite3"
+    GAME_STORE_CHECKPOINT_INTERVAL: float = 5
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
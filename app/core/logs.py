@@ -0,0 +1,91 @@
+import random
+import sys
+from typing import Any
+
+from loguru import logger
+
+from app.core.config import settings
+from app.schemas import GameResponse
+
+
+def configure_logging() -> None:
+    """Replaces the default handler of the logger with one at `LOG_LEVEL`, writing JSON lines if `LOG_JSON` is set."""
+    logger.remove()
+    logger.add(sys.stderr, level=settings.LOG_LEVEL, serialize=settings.LOG_JSON)
+
+
+def is_enabled(level: str) -> bool:
+    """Checks whether the lines of a level get logged at all.
+
+    Args:
+        level (str): The name of the level.
+
+    Returns:
+        bool: Whether the level is at least `LOG_LEVEL`.
+    """
+    return logger.level(level).no >= logger.level(settings.LOG_LEVEL).no
+
+
+def summarize(result: GameResponse) -> dict:
+    """Summarizes a result for the logs, with the number of cells in every category instead of the cells themselves.
+
+    Args:
+        result (GameResponse): The result.
+
+    Returns:
+        dict: The status of the result, the cell counts and the other fields that are set.
+    """
+    summary = result.model_dump(exclude={"cells", "probabilities"}, exclude_none=True)
+    if result.cells:
+        summary["cells"] = {key: len(cells) for key, cells in result.cells.items}
+    if result.indices:
+        summary["cells"] = {
+            **summary.get("cells", {}),
+            **{key: len(indices) for key, indices in result.indices.items()},
+        }
+    if result.probabilities:
+        summary["probabilities"] = sum(probability is not None for row in result.probabilities for probability in row)
+    return summary
+
+
+class GameLogger:
+    def __init__(self, sample_rate: float = 1.0) -> None:
+        """Initialises the logger of a single game. The per-click lines are logged at the debug level,
+        and only for a sampled share of the games, so whether a line is logged is decided once per game
+        and the lines of the other games cost a single check.
+
+        Args:
+            sample_rate (float, optional): The share of the games whose per-click lines are logged. Defaults to 1.0.
+        """
+        self.logger = logger
+        self.verbose = random.random() < sample_rate and is_enabled("DEBUG")
+
+    def bind(self, **fields: Any) -> None:
+        """Adds fields to every following line of the game, like its id.
+
+        Args:
+            **fields (Any): The fields.
+        """
+        self.logger = self.logger.bind(**fields)
+
+    def debug(self, message: str, **fields: Any) -> None:
+        """Logs a per-click line if the game is sampled. The message is a template that is only formatted
+        with the fields if the line is logged, and fields that are callables are only called then,
+        so that expensive ones, like a summary of a result, can be deferred.
+
+        Args:
+            message (str): The message template, with the fields in braces.
+            **fields (Any): The fields, also added to the structured record.
+        """
+        if self.verbose:
+            values = {name: value() if callable(value) else value for name, value in fields.items()}
+            self.logger.opt(depth=1).debug(message, **values)
+
+    def info(self, message: str, **fields: Any) -> None:
+        """Logs a line about the whole game, like its start, whether it's sampled or not.
+
+        Args:
+            message (str): The message template, with the fields in braces.
+            **fields (Any): The fields, also added to the structured record.
+        """
+        self.logger.opt(depth=1).info(message, **fields)
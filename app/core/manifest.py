@@ -0,0 +1,33 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = "manifest.json"
+
+
+def digest(body: bytes) -> str:
+    """Hashes a body, for its entity tag and for telling whether it changed since the build.
+
+    Args:
+        body (bytes): The body.
+
+    Returns:
+        str: The hex digest.
+    """
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def read_manifest(build_path: str) -> dict | None:
+    """Reads the manifest written by `python -m app.core.build`.
+
+    Args:
+        build_path (str): The directory of the build.
+
+    Returns:
+        dict | None: The manifest, or None if there's no build there.
+    """
+    try:
+        with open(os.path.join(build_path, MANIFEST_NAME), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
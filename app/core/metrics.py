@@ -0,0 +1,261 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator, TypeVar
+
+from app.core.config import GAME_MODES
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS: dict[str, tuple[str, str, tuple[float, ...]]] = {
+    "minesweeper_receive_seconds": ("histogram", "Time spent parsing a received message.", LATENCY_BUCKETS),
+    "minesweeper_received_bytes": ("histogram", "Size of the received messages.", SIZE_BUCKETS),
+    "minesweeper_field_operation_seconds": ("histogram", "Time spent in a field operation.", LATENCY_BUCKETS),
+    "minesweeper_send_seconds": ("histogram", "Time spent encoding and sending a message.", LATENCY_BUCKETS),
+    "minesweeper_sent_bytes": ("histogram", "Size of the sent messages.", SIZE_BUCKETS),
+    "minesweeper_board_generation_seconds": ("histogram", "Time spent generating a board.", LATENCY_BUCKETS),
+    "minesweeper_active_games": ("gauge", "Number of games being played right now.", ()),
+}
+
+Key = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def get_mode_label(height: int, width: int, n_mines: int) -> str:
+    """Names a game mode for the metric labels. Custom modes share a single label,
+    so that the number of time series stays bounded.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+
+    Returns:
+        str: The label of the mode, like `9×9×10`, or `custom`.
+    """
+    if (height, width, n_mines) in GAME_MODES.values():
+        return f"{height}×{width}×{n_mines}"
+    return "custom"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        """Initialises an empty histogram with fixed buckets.
+
+        Args:
+            buckets (tuple[float, ...]): The sorted upper bounds of the buckets, without the infinite one.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Counts a value in its bucket. The observations aren't locked, since a lock would take longer
+        than the rest of the observation: under the GIL, one made by another thread at the same time
+        can very rarely be lost, which is fine for a histogram.
+
+        Args:
+            value (float): The value.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def take(self, reset: bool = False) -> tuple[list[int], float, int]:
+        """Reads the histogram.
+
+        Args:
+            reset (bool, optional): Whether to empty the histogram afterwards. Defaults to False.
+
+        Returns:
+            tuple[list[int], float, int]: The bucket counts, the sum and the count.
+        """
+        with self.lock:
+            taken = (list(self.counts), self.sum, self.count)
+            if reset:
+                self.counts = [0] * len(self.counts)
+                self.sum = 0.0
+                self.count = 0
+        return taken
+
+    def add(self, counts: list[int], total: float, count: int) -> None:
+        """Adds another histogram with the same buckets to this one.
+
+        Args:
+            counts (list[int]): The bucket counts of the other histogram.
+            total (float): Its sum.
+            count (int): Its count.
+        """
+        with self.lock:
+            self.counts = [own + other for own, other in zip(self.counts, counts)]
+            self.sum += total
+            self.count += count
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        """Initialises an empty registry of the metrics described in `METRICS`. A histogram or a gauge
+        is created for every combination of labels the first time it's used, and then kept for good,
+        so the hot paths can hold on to their histograms instead of looking them up on every call."""
+        self.histograms: dict[Key, Histogram] = {}
+        self.gauges: dict[Key, float] = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """Finds or creates a histogram.
+
+        Args:
+            name (str): The name of the histogram.
+            **labels (str): The labels of the histogram.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        key = (name, tuple(labels.items()))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram(buckets=METRICS[name][2]))
+        return histogram
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Records a value in a histogram.
+
+        Args:
+            name (str): The name of the histogram.
+            value (float): The value.
+            **labels (str): The labels of the histogram.
+        """
+        self.histogram(name, **labels).observe(value)
+
+    def add(self, name: str, value: float, **labels: str) -> None:
+        """Changes a gauge by the value.
+
+        Args:
+            name (str): The name of the gauge.
+            value (float): The change, negative to decrease the gauge.
+            **labels (str): The labels of the gauge.
+        """
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Records how long the block took in a histogram.
+
+        Args:
+            name (str): The name of the histogram.
+            **labels (str): The labels of the histogram.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def clear(self) -> None:
+        """Empties all the histograms, e.g. the ones a worker process inherited from the main one when it was forked."""
+        self.export()
+
+    def export(self) -> dict[Key, tuple[list[int], float, int]]:
+        """Takes the observations out of the histograms, e.g. to send them from a worker process to the main one.
+
+        Returns:
+            dict[Key, tuple[list[int], float, int]]: The bucket counts, the sum and the count of every histogram
+                that has observations.
+        """
+        with self.lock:
+            histograms = list(self.histograms.items())
+        exported = {key: histogram.take(reset=True) for key, histogram in histograms}
+        return {key: taken for key, taken in exported.items() if taken[2]}
+
+    def merge(self, exported: dict[Key, tuple[list[int], float, int]]) -> None:
+        """Adds the histograms exported by another registry to this one.
+
+        Args:
+            exported (dict[Key, tuple[list[int], float, int]]): The exported histograms.
+        """
+        for (name, labels), (counts, total, count) in exported.items():
+            self.histogram(name, **dict(labels)).add(counts, total, count)
+
+    def render(self) -> str:
+        """Renders all the metrics in the Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            gauges = sorted(self.gauges.items())
+
+        lines = []
+        for name, (metric_type, description, buckets) in METRICS.items():
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+            for (key_name, labels), value in gauges:
+                if key_name == name:
+                    lines.append(f"{name}{format_labels(labels)} {value:g}")
+
+            for (key_name, labels), histogram in histograms:
+                if key_name != name:
+                    continue
+                counts, total, count = histogram.take()
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets, float("inf")), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{format_labels((*labels, ('le', le)))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total!r}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    """Formats the labels of a time series, like `{operation="check_cell"}`.
+
+    Args:
+        labels (tuple[tuple[str, str], ...]): The names and the values of the labels.
+
+    Returns:
+        str: The formatted labels, or an empty string if there are none.
+    """
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def timed(operation: str) -> Callable[[F], F]:
+    """Records the duration of every call of a field method in `minesweeper_field_operation_seconds`.
+
+    Args:
+        operation (str): The label of the operation.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+
+    def decorator(function: F) -> F:
+        histogram = metrics.histogram("minesweeper_field_operation_seconds", operation=operation)
+        perf_counter = time.perf_counter
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - started)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,68 @@
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+
+MAX_STACK_DEPTH = 64
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval: float = 0.005) -> None:
+        """Initialises a profiler that samples the stack of a thread from a background thread,
+        so the profiled code isn't slowed down by anything but the sampling itself.
+
+        Args:
+            thread_id (int): The identifier of the thread to sample, usually the one running the event loop.
+            interval (float, optional): The time between the samples, in seconds. Defaults to 0.005.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Starts sampling in the background."""
+        self.thread = threading.Thread(target=self.sample, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the sampling thread to finish."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def sample(self) -> None:
+        """Records the stack of the profiled thread every interval until stopped."""
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self.fold_stack(frame)] += 1
+
+    @staticmethod
+    def fold_stack(frame: FrameType) -> str:
+        """Folds a stack into a single line, from the outermost frame to the innermost one.
+
+        Args:
+            frame (FrameType): The innermost frame.
+
+        Returns:
+            str: The frames separated by semicolons, each as `function (file:line)`.
+        """
+        frames: list[str] = []
+        current: FrameType | None = frame
+        while current is not None and len(frames) < MAX_STACK_DEPTH:
+            code = current.f_code
+            frames.append(f"{code.co_name} ({code.co_filename}:{current.f_lineno})")
+            current = current.f_back
+        return ";".join(reversed(frames))
+
+    def render(self) -> str:
+        """Renders the samples in the folded format read by flame graph tools, one stack per line
+        followed by the number of times it was sampled.
+
+        Returns:
+            str: The folded stacks, the most frequent first.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
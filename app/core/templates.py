@@ -1,3 +1,89 @@
-from fastapi.templating import Jinja2Templates
+import os
+from functools import cache
+from typing import TYPE_CHECKING
 
-jinja2_templates = Jinja2Templates(directory="app/templates")
+from loguru import logger
+
+from app.core.config import settings
+from app.core.manifest import digest, read_manifest
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
+    from jinja2 import BaseLoader, Environment
+
+TEMPLATES_DIRECTORY = "app/templates"
+COMPILED_TEMPLATES_DIRECTORY = "templates"
+
+
+def read_templates() -> dict[str, bytes]:
+    """Reads the sources of all the templates.
+
+    Returns:
+        dict[str, bytes]: The sources by template name.
+    """
+    sources = {}
+    for root, _, names in os.walk(TEMPLATES_DIRECTORY):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as file:
+                sources[os.path.relpath(path, TEMPLATES_DIRECTORY).replace(os.sep, "/")] = file.read()
+    return sources
+
+
+def create_environment(loader: "BaseLoader") -> "Environment":
+    """Creates the Jinja environment of the pages. The build compiles the templates with the same one,
+    since the compiled code depends on its options.
+
+    Args:
+        loader (BaseLoader): The loader of the templates.
+
+    Returns:
+        Environment: The environment.
+    """
+    from jinja2 import Environment
+
+    return Environment(loader=loader, autoescape=True)
+
+
+def find_compiled_templates(build_path: str) -> str | None:
+    """Finds the templates compiled by `python -m app.core.build`, as long as none of the templates
+    changed since and the same version of Jinja is installed.
+
+    Args:
+        build_path (str): The directory of the build.
+
+    Returns:
+        str | None: The directory of the compiled templates, or None if they can't be used.
+    """
+    import jinja2
+
+    manifest = read_manifest(build_path)
+    if manifest is None:
+        return None
+
+    digests = {name: digest(source) for name, source in read_templates().items()}
+    if manifest.get("jinja2") != jinja2.__version__ or manifest.get("templates") != digests:
+        logger.warning(f"The templates compiled in {build_path} are out of date, so they're compiled on first use")
+        return None
+    return os.path.join(build_path, COMPILED_TEMPLATES_DIRECTORY)
+
+
+@cache
+def get_templates() -> "Jinja2Templates":
+    """Creates the templates on first use, so that importing the app doesn't import Jinja. If the build
+    compiled them, they're loaded as Python modules instead of being parsed and compiled on their first render.
+    The templates link to the static files with `static_url`, which versions their URLs.
+
+    Returns:
+        Jinja2Templates: The templates.
+    """
+    from fastapi.templating import Jinja2Templates
+    from jinja2 import FileSystemLoader, ModuleLoader
+
+    from app.core.caching import static_files
+
+    compiled_path = find_compiled_templates(settings.BUILD_PATH)
+    loader = FileSystemLoader(TEMPLATES_DIRECTORY) if compiled_path is None else ModuleLoader(compiled_path)
+    environment = create_environment(loader)
+    environment.globals["static_url"] = static_files.url
+    return Jinja2Templates(env=environment)
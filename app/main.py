@@ -1,22 +1,86 @@
+import json
 import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
 
-from app.core import settings
+from app.core import GAME_MODES, settings
+from app.core.caching import page_cache, static_files
+from app.core.logs import configure_logging
 from app.routers import game_router, health_router, main_router
+from app.schemas import Cell
+from app.services import (
+    FieldService,
+    board_pool,
+    execution_policy,
+    game_recorder,
+    game_store,
+    no_guess_generator,
+)
+from app.services.protocol import encode_binary
 
 logging.basicConfig()
+configure_logging()
+
+
+def warm_up() -> None:
+    """Goes through what the first players would otherwise wait for: renders the pages of the preset modes
+    into the page cache, and generates a board of every preset mode, opens it and serializes the result
+    in both protocols."""
+    page_cache.render("index.html")
+    for rows, columns, mines in GAME_MODES.values():
+        for no_guess in (False, True):
+            page_cache.render("game.html", rows=rows, columns=columns, mines=mines, no_guess=no_guess)
+
+        start = Cell(row=rows // 2, column=columns // 2)
+        field_service = FieldService(start=start, n_mines=mines, height=rows, width=columns, seed=0)
+        result = field_service.check_cell(cell=start)
+        assert result is not None
+        json.dumps(result.model_dump(), separators=(",", ":"))
+        encode_binary(result, width=columns)
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    executor: Executor
+    if settings.BOARD_POOL_EXECUTOR == "process":
+        executor = ProcessPoolExecutor(max_workers=settings.BOARD_POOL_WORKERS)
+    else:
+        executor = ThreadPoolExecutor(max_workers=settings.BOARD_POOL_WORKERS)
+
+    board_pool.start(executor=executor)
+    no_guess_generator.start(executor=ProcessPoolExecutor(max_workers=settings.NO_GUESS_WORKERS))
+    if settings.OFFLOAD_EXECUTOR == "process":
+        execution_policy.start(executor=ProcessPoolExecutor(max_workers=settings.OFFLOAD_WORKERS))
+    elif settings.OFFLOAD_EXECUTOR == "thread":
+        execution_policy.start(executor=ThreadPoolExecutor(max_workers=settings.OFFLOAD_WORKERS))
+    static_files.load()
+    if settings.WARM_UP:
+        # In the thread pool, which the dependencies of the endpoints run in, so that it's started too
+        await run_in_threadpool(warm_up)
+    logger.info(
+        f"Loaded {len(static_files.files or {})} static files, {static_files.n_prebuilt} of them from the build"
+    )
+    yield
+    execution_policy.shutdown()
+    board_pool.shutdown()
+    no_guess_generator.shutdown()
+    game_store.close()
+    game_recorder.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(health_router)
 app.include_router(game_router)
 app.include_router(main_router)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", static_files, name="static")
 
 
 app.add_middleware(
@@ -29,4 +93,8 @@ app.add_middleware(
 
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=True)
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app" if settings.RELOAD else app, host=settings.HOST, port=settings.PORT, reload=settings.RELOAD
+    )
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends
 from loguru import logger
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
-from app.services import GameService
+from app.core import metrics
+from app.services import GameService, MultiplexService
 
 game_router = APIRouter(
     prefix="/ws/play",
@@ -15,13 +16,29 @@ async def play(websocket: WebSocket, game_service: GameService = Depends(GameSer
     await websocket.accept()
     logger.info("Starting a game...")
 
+    metrics.add("minesweeper_active_games", 1)
     try:
         await game_service.start_game(websocket=websocket)
     except WebSocketDisconnect as wsde:
         logger.warning(f"WebSocket disconnected: {wsde}")
+        game_service.suspend_game()
         return
     except ValueError as ve:
         logger.warning(f"ValueError: {ve}")
         await websocket.send_json({"error": str(ve), "status_code": 400})
         await websocket.close()
         return
+    finally:
+        metrics.add("minesweeper_active_games", -1)
+        game_service.save_record()
+
+
+@game_router.websocket("/multiplex")
+async def play_many(websocket: WebSocket, multiplex_service: MultiplexService = Depends(MultiplexService)) -> None:
+    await websocket.accept()
+    logger.info("Starting a multiplexed connection...")
+
+    try:
+        await multiplex_service.serve(websocket=websocket)
+    except WebSocketDisconnect as wsde:
+        logger.warning(f"WebSocket disconnected: {wsde}")
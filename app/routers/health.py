@@ -1,4 +1,19 @@
-from fastapi import APIRouter, status
+import asyncio
+import threading
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics, settings
+from app.core.caching import page_cache
+from app.core.profiler import SamplingProfiler
+from app.services import (
+    board_pool,
+    execution_policy,
+    game_recorder,
+    game_store,
+    no_guess_generator,
+)
 
 health_router = APIRouter(
     tags=["healthchecks"],
@@ -7,4 +22,33 @@ health_router = APIRouter(
 
 @health_router.get("/health", status_code=status.HTTP_200_OK)
 def healthcheck() -> dict:
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "board_pool": board_pool.metrics,
+        "no_guess": no_guess_generator.metrics,
+        "game_store": game_store.metrics,
+        "execution_policy": execution_policy.metrics,
+        "replay_recorder": game_recorder.metrics,
+        "page_cache": page_cache.metrics,
+    }
+
+
+@health_router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> str:
+    return metrics.render()
+
+
+@health_router.get("/debug/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=5.0, gt=0, le=60), interval: float = Query(default=0.005, ge=0.001, le=1)
+) -> str:
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    profiler = SamplingProfiler(thread_id=threading.get_ident(), interval=interval)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profiler.render()
@@ -1,15 +1,34 @@
 from fastapi import APIRouter, Request
+from starlette.concurrency import run_in_threadpool
 
-from app.core import jinja2_templates
+from app.core import GAME_MODES
+from app.core.caching import PAGE_CACHE_CONTROL, CachedContent, page_cache, respond
 
 main_router = APIRouter(
     tags=["main"],
 )
 
 
+async def render_page(template_name: str, **context: object) -> CachedContent:
+    """Takes a page from the cache, or renders it in a thread, so a large page doesn't block the event loop.
+
+    Args:
+        template_name (str): The name of the template.
+        **context (object): The context of the template, all hashable.
+
+    Returns:
+        CachedContent: The rendered page.
+    """
+    page = page_cache.get(template_name, **context)
+    if page is None:
+        page = await run_in_threadpool(page_cache.render, template_name, **context)
+    return page
+
+
 @main_router.get("/")
 async def index(request: Request):
-    return jinja2_templates.TemplateResponse("index.html", context={"request": request})
+    page = await render_page("index.html")
+    return respond(request, page, cache_control=PAGE_CACHE_CONTROL)
 
 
 @main_router.get("/create")
@@ -19,18 +38,12 @@ async def create(
     rows: int | None = None,
     columns: int | None = None,
     mines: int | None = None,
+    no_guess: bool = False,
 ):
     if mode:
-        if mode == "Small: 9×9, 10 mines":
-            rows, columns, mines = 9, 9, 10
-        elif mode == "Medium: 16×16, 40 mines":
-            rows, columns, mines = 16, 16, 40
-        elif mode == "Hard: 30×16, 99 mines":
-            rows, columns, mines = 30, 16, 99
-        elif mode == "Extreme: 24×30, 160 mines":
-            rows, columns, mines = 24, 30, 160
+        if mode in GAME_MODES:
+            rows, columns, mines = GAME_MODES[mode]
     elif not (rows and columns and mines):
         raise ValueError("There must be either mode or rows, columns and mines specified")
-    return jinja2_templates.TemplateResponse(
-        "game.html", context={"request": request, "rows": rows, "columns": columns, "mines": mines}
-    )
+    page = await render_page("game.html", rows=rows, columns=columns, mines=mines, no_guess=no_guess)
+    return respond(request, page, cache_control=PAGE_CACHE_CONTROL)
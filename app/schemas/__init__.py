@@ -1,3 +1,3 @@
-from app.schemas.field import Cell, CellCollection, GameResponse
+from app.schemas.field import Cell, CellCollection, GameResponse, GameStats
 
-__all__ = ["Cell", "CellCollection", "GameResponse"]
+__all__ = ["Cell", "CellCollection", "GameResponse", "GameStats"]
@@ -1,6 +1,6 @@
 from typing import ItemsView, Sequence
 
-from pydantic import BaseModel, ConfigDict, RootModel
+from pydantic import BaseModel, ConfigDict, Field, RootModel
 
 
 class Cell(BaseModel):
@@ -39,6 +39,19 @@ class CellCollection(RootModel):
         self.root[key] = value
 
 
+class GameStats(BaseModel):
+    clicks: int
+    chords: int
+    flags: int
+    cells_revealed: int
+    largest_reveal: int
+    safe_cells_left: int
+
+
 class GameResponse(BaseModel):
     status: str
     cells: CellCollection | None = None
+    indices: dict[str, list[int]] | None = Field(default=None, exclude=True)
+    stats: GameStats | None = None
+    probabilities: list[list[float | None]] | None = None
+    game_id: str | None = None
@@ -1,4 +1,33 @@
-from app.services.field import FieldService
+from app.services.chunked import ChunkedFieldService
+from app.services.field import Board, FieldService
 from app.services.game import GameService
+from app.services.multiplex import MultiplexService
+from app.services.no_guess import NoGuessGenerator, no_guess_generator
+from app.services.offload import ExecutionPolicy, execution_policy
+from app.services.pool import BoardPool, board_pool
+from app.services.probability import ProbabilityEngine
+from app.services.replay import GameRecorder, game_recorder
+from app.services.solver import Solver
+from app.services.store import GameStore, InMemoryGameStore, SQLiteGameStore, game_store
 
-__all__ = ["FieldService", "GameService"]
+__all__ = [
+    "Board",
+    "ChunkedFieldService",
+    "FieldService",
+    "GameService",
+    "MultiplexService",
+    "NoGuessGenerator",
+    "no_guess_generator",
+    "ExecutionPolicy",
+    "execution_policy",
+    "BoardPool",
+    "board_pool",
+    "ProbabilityEngine",
+    "GameRecorder",
+    "game_recorder",
+    "Solver",
+    "GameStore",
+    "InMemoryGameStore",
+    "SQLiteGameStore",
+    "game_store",
+]
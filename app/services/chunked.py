@@ -0,0 +1,463 @@
+import random
+import struct
+import zlib
+from array import array
+from typing import Callable, Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+from app.schemas import Cell, GameResponse
+from app.services.field import (
+    BOTTOM_EDGE,
+    LEFT_EDGE,
+    RIGHT_EDGE,
+    TOP_EDGE,
+    FieldService,
+    get_neighbour_offsets,
+)
+
+TILE_SIZE = 64
+
+CHUNKED_SNAPSHOT_VERSION = 2
+CHUNKED_SNAPSHOT_HEADER = struct.Struct("<BIIIQ6IHII")
+TILE_HEADER = struct.Struct("<II")
+
+
+class EdgeClasses:
+    """The edge class of every flat index of a field, calculated on access instead of being stored."""
+
+    def __init__(self, height: int, width: int) -> None:
+        self.height = height
+        self.width = width
+
+    def __getitem__(self, index: int) -> int:
+        row, column = divmod(index, self.width)
+        return (
+            (TOP_EDGE if row == 0 else 0)
+            | (BOTTOM_EDGE if row == self.height - 1 else 0)
+            | (LEFT_EDGE if column == 0 else 0)
+            | (RIGHT_EDGE if column == self.width - 1 else 0)
+        )
+
+
+class TiledCells:
+    def __init__(self, height: int, width: int, load_tile: Callable[[int], bytearray] | None = None) -> None:
+        """Initialises a flat, bytearray-like view of the cells of a field, stored in square tiles of `TILE_SIZE`
+        that are only allocated when they're first needed. The tiles of the bottom and right borders
+        may stick out of the field.
+
+        Args:
+            height (int): Height of the field.
+            width (int): Width of the field.
+            load_tile (Callable[[int], bytearray] | None, optional): Creates a tile when it's first read.
+                Defaults to None — tiles that haven't been written to read as zeroes.
+        """
+        self.height = height
+        self.width = width
+        self.load_tile = load_tile
+        self.tiles_per_row = -(-width // TILE_SIZE)
+        self.tiles: dict[int, bytearray] = {}
+
+    def locate(self, index: int) -> tuple[int, int]:
+        """Finds where a cell is stored.
+
+        Args:
+            index (int): The flat index of the cell.
+
+        Returns:
+            tuple[int, int]: The number of the tile and the position of the cell in it.
+        """
+        row, column = divmod(index, self.width)
+        tile_row, row_in_tile = divmod(row, TILE_SIZE)
+        tile_column, column_in_tile = divmod(column, TILE_SIZE)
+        return tile_row * self.tiles_per_row + tile_column, row_in_tile * TILE_SIZE + column_in_tile
+
+    def __len__(self) -> int:
+        return self.height * self.width
+
+    def __getitem__(self, index: int) -> int:
+        tile, position = self.locate(index)
+        cells = self.tiles.get(tile)
+        if cells is None:
+            if self.load_tile is None:
+                return 0
+            cells = self.tiles[tile] = self.load_tile(tile)
+        return cells[position]
+
+    def __setitem__(self, index: int, value: int) -> None:
+        tile, position = self.locate(index)
+        cells = self.tiles.get(tile)
+        if cells is None:
+            cells = self.tiles[tile] = self.load_tile(tile) if self.load_tile else bytearray(TILE_SIZE * TILE_SIZE)
+        cells[position] = value
+
+    def __iter__(self) -> Iterator[int]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def iterate_allocated(self) -> Iterator[tuple[int, int]]:
+        """Goes over the cells of the allocated tiles only.
+
+        Yields:
+            tuple[int, int]: The flat index and the value of every cell inside the field.
+        """
+        for tile, cells in self.tiles.items():
+            tile_row, tile_column = divmod(tile, self.tiles_per_row)
+            for row in range(tile_row * TILE_SIZE, min((tile_row + 1) * TILE_SIZE, self.height)):
+                row_start = (row % TILE_SIZE) * TILE_SIZE
+                for column in range(tile_column * TILE_SIZE, min((tile_column + 1) * TILE_SIZE, self.width)):
+                    yield row * self.width + column, cells[row_start + column % TILE_SIZE]
+
+    @property
+    def n_bytes(self) -> int:
+        """The memory taken up by the allocated tiles."""
+        return len(self.tiles) * TILE_SIZE * TILE_SIZE
+
+
+class ChunkedFieldService(FieldService):
+    field: TiledCells  # type: ignore[assignment]
+    state: TiledCells  # type: ignore[assignment]
+
+    def __init__(
+        self,
+        start: Cell,
+        n_mines: int = 10,
+        height: int = 9,
+        width: int = 9,
+        seed: int | None = None,
+    ) -> None:
+        """Initialises a field for huge custom boards, which only keeps the parts of the board that have been
+        looked at. The field is split into square tiles, and the whole field only decides how many mines
+        every tile gets. A tile places its mines the first time it or a tile next to it is looked at,
+        and calculates its cell values the first time one of its cells is opened or probed.
+
+        Splitting the mines the same way drawing them over the whole field would, and then placing them
+        uniformly within the tiles, keeps every arrangement of the mines equally likely. The mines found
+        around the first click are then moved to random cells of the rest of the field, like `distribute_mines`
+        does — a tile that hasn't placed its mines yet just gets one more to place.
+
+        Args:
+            start (Cell): The cell clicked first.
+            n_mines (int, optional): Number of mines in the game. Defaults to 10.
+            height (int, optional): Height of the game field. Defaults to 9.
+            width (int, optional): Width of the game field. Defaults to 9.
+            seed (int | None, optional): The seed to generate the field with. Defaults to None — a random one.
+        """
+        self.height = height
+        self.width = width
+        field_size = self.check_field_size(n_mines=n_mines)
+        self.neighbour_offsets = get_neighbour_offsets(width=width)
+        self.edge_classes = EdgeClasses(height=height, width=width)  # type: ignore[assignment]
+
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.n_mines = n_mines
+        self.field = TiledCells(height=height, width=width, load_tile=self.calculate_tile)
+        self.state = TiledCells(height=height, width=width)
+
+        self.tile_mines = self.split_mines()
+        self.placed_mines: dict[int, array] = {}
+        self.moved_mines: set[int] = set()
+        self.distribute_mines(start=start)
+
+        self.safe_cells_left = field_size - n_mines
+        self.n_flags = 0
+        self.n_clicks = 0
+        self.n_chords = 0
+        self.cells_revealed = 0
+        self.largest_reveal = 0
+        self.recently_opened: list[int] | None = None
+
+    @property
+    def n_tiles(self) -> int:
+        """The number of tiles the field is split into."""
+        return len(self.tile_mines)
+
+    def get_tile_shape(self, tile: int) -> tuple[int, int, int, int]:
+        """Finds where a tile lies on the field.
+
+        Args:
+            tile (int): The number of the tile.
+
+        Returns:
+            tuple[int, int, int, int]: The row and the column of the top left cell of the tile,
+                and the numbers of its rows and columns inside the field.
+        """
+        tile_row, tile_column = divmod(tile, self.field.tiles_per_row)
+        top, left = tile_row * TILE_SIZE, tile_column * TILE_SIZE
+        return top, left, min(TILE_SIZE, self.height - top), min(TILE_SIZE, self.width - left)
+
+    def split_mines(self) -> array:
+        """Decides how many mines every tile gets, by drawing them from a multivariate hypergeometric distribution —
+        the way the mines of a whole field drawn at once would fall into the tiles.
+
+        Returns:
+            array: The number of mines of every tile.
+        """
+        tiles_per_column = -(-self.height // TILE_SIZE)
+        tile_sizes = []
+        for tile in range(tiles_per_column * self.field.tiles_per_row):
+            _, _, tile_height, tile_width = self.get_tile_shape(tile=tile)
+            tile_sizes.append(tile_height * tile_width)
+
+        if np is not None:
+            counts = np.random.default_rng(self.seed).multivariate_hypergeometric(tile_sizes, self.n_mines)
+            return array("I", counts.tolist())
+
+        tile_mines = array("I", bytes(4 * len(tile_sizes)))
+        for position in self.rng.sample(range(self.height * self.width), k=self.n_mines):
+            tile, _ = self.field.locate(position)
+            tile_mines[tile] += 1
+        return tile_mines
+
+    def place_tile_mines(self, tile: int) -> array:
+        """Gets the positions of the mines of a tile within the tile, placing them first if they haven't been yet.
+        The placement only depends on the seed of the field, the tile and its number of mines.
+
+        Args:
+            tile (int): The number of the tile.
+
+        Returns:
+            array: The positions of the mines within the tile.
+        """
+        positions = self.placed_mines.get(tile)
+        if positions is None:
+            _, _, tile_height, tile_width = self.get_tile_shape(tile=tile)
+            rng = random.Random(self.seed * self.n_tiles + tile)
+            positions = self.placed_mines[tile] = array(
+                "H",
+                sorted(
+                    position // tile_width * TILE_SIZE + position % tile_width
+                    for position in rng.sample(range(tile_height * tile_width), k=self.tile_mines[tile])
+                ),
+            )
+        return positions
+
+    def calculate_tile(self, tile: int) -> bytearray:
+        """Calculates the cell values of a tile, from the mines of the tile and of the tiles around it.
+
+        Args:
+            tile (int): The number of the tile.
+
+        Returns:
+            bytearray: The cell values, row by row, `TILE_SIZE` cells per row.
+        """
+        top, left, _, _ = self.get_tile_shape(tile=tile)
+        padded_size = TILE_SIZE + 2
+
+        mine_positions = []
+        tile_row, tile_column = divmod(tile, self.field.tiles_per_row)
+        for neighbour_row in range(max(tile_row - 1, 0), tile_row + 2):
+            for neighbour_column in range(max(tile_column - 1, 0), min(tile_column + 2, self.field.tiles_per_row)):
+                neighbour = neighbour_row * self.field.tiles_per_row + neighbour_column
+                if neighbour >= self.n_tiles:
+                    continue
+
+                neighbour_top, neighbour_left, _, _ = self.get_tile_shape(tile=neighbour)
+                for position in self.place_tile_mines(tile=neighbour):
+                    row = neighbour_top + position // TILE_SIZE - top + 1
+                    column = neighbour_left + position % TILE_SIZE - left + 1
+                    if 0 <= row < padded_size and 0 <= column < padded_size:
+                        mine_positions.append(row * padded_size + column)
+
+        padded = self.create_field(height=padded_size, width=padded_size, mine_positions=mine_positions)
+        cells = bytearray()
+        for row in range(1, TILE_SIZE + 1):
+            cells += padded[row * padded_size + 1 : row * padded_size + 1 + TILE_SIZE]  # noqa: E203
+        return cells
+
+    def is_mine(self, index: int) -> bool:
+        """Checks whether a cell is mined without calculating the values of its tile.
+
+        Args:
+            index (int): The flat index of the cell.
+
+        Returns:
+            bool: Whether the cell is mined.
+        """
+        tile, position = self.field.locate(index)
+        return position in self.place_tile_mines(tile=tile)
+
+    def distribute_mines(self, start: Cell) -> None:
+        """Moves the mines found around the starting cell to pseudo-random positions over the rest of the field.
+        A position in a tile that hasn't placed its mines yet is mined with the probability the tile's
+        own mines would take it, and if it isn't, the tile gets one more mine to place.
+
+        Args:
+            start (Cell): The empty starting cell.
+
+        Raises:
+            ValueError: In case the field is too small to keep the starting cells clear.
+        """
+        start_index = self.calculate_flat_index(start)
+        forbidden_mine_positions = {start_index, *self.get_cell_neighbours(index=start_index)}
+        if len(self.field) - len(forbidden_mine_positions) < self.n_mines:
+            raise ValueError("The field is too small to keep the first clicked cell and its neighbours clear.")
+
+        n_displaced = 0
+        for index in forbidden_mine_positions:
+            tile, position = self.field.locate(index)
+            positions = self.place_tile_mines(tile=tile)
+            if position in positions:
+                positions.remove(position)
+                self.tile_mines[tile] -= 1
+                self.moved_mines.add(tile)
+                n_displaced += 1
+
+        while n_displaced:
+            index = self.rng.randrange(len(self.field))
+            if index in forbidden_mine_positions:
+                continue
+
+            tile, position = self.field.locate(index)
+            placed = self.placed_mines.get(tile)
+            if placed is not None:
+                if position in placed:
+                    continue
+                placed.append(position)
+                self.moved_mines.add(tile)
+            else:
+                _, _, tile_height, tile_width = self.get_tile_shape(tile=tile)
+                if self.rng.randrange(tile_height * tile_width) < self.tile_mines[tile]:
+                    continue
+            self.tile_mines[tile] += 1
+            n_displaced -= 1
+
+    @property
+    def mines(self) -> list[int]:  # type: ignore[override]
+        """The mines of the tiles whose cell values have been calculated — the ones the player could have seen."""
+        mines = []
+        for tile in self.field.tiles:
+            top, left, _, _ = self.get_tile_shape(tile=tile)
+            for position in self.place_tile_mines(tile=tile):
+                mines.append((top + position // TILE_SIZE) * self.width + left + position % TILE_SIZE)
+        return mines
+
+    @property
+    def n_bytes(self) -> int:
+        """The memory taken up by the tiles, roughly: the cell values and states, and the placed mines."""
+        n_placed_mines = sum(len(positions) for positions in self.placed_mines.values())
+        return self.field.n_bytes + self.state.n_bytes + 2 * n_placed_mines + 4 * self.n_tiles
+
+    def iterate_states(self) -> Iterator[tuple[int, int]]:
+        return self.state.iterate_allocated()
+
+    def check_index(self, index: int, collect: bool = True) -> GameResponse | None:
+        if self.is_mine(index=index):
+            return self.build_result("game_over", {"oops": [index], "mine": self.mines}, collect=collect)
+        return super().check_index(index=index, collect=collect)
+
+    def to_snapshot(self) -> bytes:
+        """Packs the field into a snapshot. Only the parts that can't be recreated from the seed are kept:
+        the number of mines of every tile, the mines of the tiles that got some moved by the first click,
+        and the states of the tiles that have them.
+
+        Returns:
+            bytes: The snapshot.
+        """
+        header = CHUNKED_SNAPSHOT_HEADER.pack(
+            CHUNKED_SNAPSHOT_VERSION,
+            self.height,
+            self.width,
+            self.n_mines,
+            self.seed,
+            self.safe_cells_left,
+            self.n_flags,
+            self.n_clicks,
+            self.n_chords,
+            self.cells_revealed,
+            self.largest_reveal,
+            TILE_SIZE,
+            len(self.moved_mines),
+            len(self.state.tiles),
+        )
+
+        body = bytearray(self.tile_mines.tobytes())
+        for tile in sorted(self.moved_mines):
+            positions = self.placed_mines[tile]
+            body += TILE_HEADER.pack(tile, len(positions)) + positions.tobytes()
+        for tile, cells in self.state.tiles.items():
+            body += TILE_HEADER.pack(tile, len(cells)) + cells
+        return header + zlib.compress(body)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: bytes) -> "ChunkedFieldService":
+        """Restores a field from a snapshot made by `to_snapshot`.
+
+        Args:
+            snapshot (bytes): The snapshot.
+
+        Raises:
+            ValueError: In case the snapshot was made by an incompatible version or with other tiles.
+
+        Returns:
+            ChunkedFieldService: The restored field.
+        """
+        (
+            version,
+            height,
+            width,
+            n_mines,
+            seed,
+            safe_cells_left,
+            n_flags,
+            n_clicks,
+            n_chords,
+            cells_revealed,
+            largest_reveal,
+            tile_size,
+            n_moved_mines,
+            n_state_tiles,
+        ) = CHUNKED_SNAPSHOT_HEADER.unpack_from(snapshot)
+        if version != CHUNKED_SNAPSHOT_VERSION or tile_size != TILE_SIZE:
+            raise ValueError(f"Unsupported snapshot version: {version}.")
+
+        field_service = cls.__new__(cls)
+        field_service.height = height
+        field_service.width = width
+        field_service.neighbour_offsets = get_neighbour_offsets(width=width)
+        field_service.edge_classes = EdgeClasses(height=height, width=width)  # type: ignore[assignment]
+        field_service.seed = seed
+        field_service.rng = random.Random(seed)
+        field_service.n_mines = n_mines
+        field_service.field = TiledCells(  # type: ignore[assignment]
+            height=height, width=width, load_tile=field_service.calculate_tile
+        )
+        field_service.state = TiledCells(height=height, width=width)  # type: ignore[assignment]
+
+        body = zlib.decompress(snapshot[CHUNKED_SNAPSHOT_HEADER.size :])  # noqa: E203
+        field_service.tile_mines = array("I")
+        n_tiles = -(-height // TILE_SIZE) * field_service.field.tiles_per_row
+        field_service.tile_mines.frombytes(body[: 4 * n_tiles])
+        offset = 4 * n_tiles
+
+        field_service.placed_mines = {}
+        field_service.moved_mines = set()
+        for _ in range(n_moved_mines):
+            tile, n_positions = TILE_HEADER.unpack_from(body, offset)
+            offset += TILE_HEADER.size
+            positions = field_service.placed_mines[tile] = array("H")
+            positions.frombytes(body[offset : offset + 2 * n_positions])  # noqa: E203
+            field_service.moved_mines.add(tile)
+            offset += 2 * n_positions
+
+        for _ in range(n_state_tiles):
+            tile, n_cells = TILE_HEADER.unpack_from(body, offset)
+            offset += TILE_HEADER.size
+            field_service.state.tiles[tile] = bytearray(body[offset : offset + n_cells])  # noqa: E203
+            offset += n_cells
+
+        field_service.safe_cells_left = safe_cells_left
+        field_service.n_flags = n_flags
+        field_service.n_clicks = n_clicks
+        field_service.n_chords = n_chords
+        field_service.cells_revealed = cells_revealed
+        field_service.largest_reveal = largest_reveal
+        field_service.recently_opened = None
+
+        if sum(field_service.tile_mines) != n_mines:
+            raise ValueError("The snapshot is corrupted.")
+        return field_service
@@ -1,10 +1,96 @@
 import random
-from typing import Generator
+import struct
+import zlib
+from functools import lru_cache
+from typing import Iterator, NamedTuple
 
-from app.schemas import Cell, CellCollection, GameResponse
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+from app.core.metrics import get_mode_label, metrics, timed
+from app.schemas import Cell, CellCollection, GameResponse, GameStats
 
 DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
 
+MINE = 9
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<BIIIQ6I")
+
+NUMPY_MIN_FIELD_SIZE = 4096
+
+OPENED = 0b001
+FLAGGED = 0b010
+VISITED = 0b100
+
+TOP_EDGE = 0b0100
+BOTTOM_EDGE = 0b1000
+LEFT_EDGE = 0b0001
+RIGHT_EDGE = 0b0010
+
+
+def get_neighbour_offsets(width: int) -> tuple[tuple[int, ...], ...]:
+    """Calculates the flat offsets to the valid neighbours of a cell for every edge class,
+    i.e. for every combination of the borders the cell lies on.
+
+    Args:
+        width (int): Width of the field.
+
+    Returns:
+        tuple[tuple[int, ...], ...]: The flat neighbour offsets for every edge class.
+    """
+    offsets = []
+    for edge_class in range(16):
+        class_offsets = []
+        for row_change, column_change in DIRECTIONS:
+            if (
+                (row_change < 0 and edge_class & TOP_EDGE)
+                or (row_change > 0 and edge_class & BOTTOM_EDGE)
+                or (column_change < 0 and edge_class & LEFT_EDGE)
+                or (column_change > 0 and edge_class & RIGHT_EDGE)
+            ):
+                continue
+            class_offsets.append(row_change * width + column_change)
+        offsets.append(tuple(class_offsets))
+    return tuple(offsets)
+
+
+@lru_cache(maxsize=16)
+def get_neighbour_table(height: int, width: int) -> tuple[tuple[tuple[int, ...], ...], bytes]:
+    """Precomputes the neighbour lookup for a field shape. Every flat index gets an edge class
+    (whether it lies on the top, bottom, left or right border), and every edge class gets a tuple
+    of flat offsets to its valid neighbours. The table is shared between all fields of the same shape.
+
+    Args:
+        height (int): Height of the field.
+        width (int): Width of the field.
+
+    Returns:
+        tuple[tuple[tuple[int, ...], ...], bytes]:
+            The flat neighbour offsets for every edge class and the edge class of every flat index.
+    """
+    column_classes = bytearray(width)
+    column_classes[0] |= LEFT_EDGE
+    column_classes[-1] |= RIGHT_EDGE
+
+    edge_classes = bytearray()
+    for row in range(height):
+        row_class = (TOP_EDGE if row == 0 else 0) | (BOTTOM_EDGE if row == height - 1 else 0)
+        edge_classes += bytes(column_class | row_class for column_class in column_classes)
+
+    return get_neighbour_offsets(width=width), bytes(edge_classes)
+
+
+class Board(NamedTuple):
+    """A generated field that nobody has clicked yet, along with the random generator that placed its mines."""
+
+    seed: int
+    field: bytearray
+    mines: list[int]
+    rng: random.Random
+
 
 class FieldService:
     def __init__(
@@ -13,26 +99,132 @@ class FieldService:
         n_mines: int = 10,
         height: int = 9,
         width: int = 9,
+        seed: int | None = None,
+        board: Board | None = None,
     ) -> None:
         """Initialises the field with the requested parameters.
 
+        The field is stored as a flat bytearray of cell values, with the opened and flagged cells
+        kept as bit flags in a second bytearray of the same size. Cells are addressed by their
+        flat index internally and only converted to `Cell` objects in the responses.
+
         Args:
             start (Cell): The cell clicked first.
             n_mines (int, optional): Number of mines in the game. Defaults to 10.
             height (int, optional): Height of the game field. Defaults to 9.
             width (int, optional): Width of the game field. Defaults to 9.
+            seed (int | None, optional): The seed to generate the field with. Defaults to None — a random one.
+            board (Board | None, optional): A pre-generated board with the same parameters to use instead
+                of generating a new one. Defaults to None.
         """
         self.height = height
         self.width = width
         field_size = self.check_field_size(n_mines=n_mines)
+        self.neighbour_offsets, self.edge_classes = get_neighbour_table(height=height, width=width)
+
+        if board is None:
+            with metrics.timer("minesweeper_board_generation_seconds", mode=get_mode_label(height, width, n_mines)):
+                board = self.generate_board(height=height, width=width, n_mines=n_mines, seed=seed)
+        self.seed = board.seed
+        self.field = board.field
+        self.mines = board.mines
+        self.rng = board.rng
+        self.distribute_mines(start=start)
+
+        self.state = bytearray(field_size)
+        self.safe_cells_left = field_size - n_mines
+        self.n_flags = 0
+        self.n_clicks = 0
+        self.n_chords = 0
+        self.cells_revealed = 0
+        self.largest_reveal = 0
+        self.recently_opened: list[int] | None = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot: bytes) -> "FieldService":
+        """Restores a field from a snapshot made by `to_snapshot`.
+
+        Args:
+            snapshot (bytes): The snapshot.
 
-        self.mines: set[Cell] = set()
-        self.field: list[list[int]] = []
-        mine_positions = self.distribute_mines(start=start, n_mines=n_mines, field_size=field_size)
-        self.create_field(field_size=field_size, mine_positions=mine_positions)
+        Raises:
+            ValueError: In case the snapshot was made by an incompatible version.
+
+        Returns:
+            FieldService: The restored field.
+        """
+        if snapshot[0] != SNAPSHOT_VERSION:
+            # Chunked fields have their own snapshot format, see `ChunkedFieldService.to_snapshot`.
+            from app.services.chunked import (
+                CHUNKED_SNAPSHOT_VERSION,
+                ChunkedFieldService,
+            )
 
-        self.opened: set[Cell] = {start}
-        self.flagged: set[Cell] = set()
+            if snapshot[0] == CHUNKED_SNAPSHOT_VERSION:
+                return ChunkedFieldService.from_snapshot(snapshot)
+
+        (
+            version,
+            height,
+            width,
+            n_mines,
+            seed,
+            safe_cells_left,
+            n_flags,
+            n_clicks,
+            n_chords,
+            cells_revealed,
+            largest_reveal,
+        ) = SNAPSHOT_HEADER.unpack_from(snapshot)
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {version}.")
+
+        cells = zlib.decompress(snapshot[SNAPSHOT_HEADER.size :])  # noqa: E203
+        field_size = height * width
+
+        field_service = cls.__new__(cls)
+        field_service.height = height
+        field_service.width = width
+        field_service.neighbour_offsets, field_service.edge_classes = get_neighbour_table(height=height, width=width)
+        field_service.seed = seed
+        field_service.field = bytearray(cells[:field_size])
+        field_service.state = bytearray(cells[field_size:])
+        field_service.mines = [index for index, cell_value in enumerate(field_service.field) if cell_value == MINE]
+        field_service.rng = random.Random(seed)
+        field_service.safe_cells_left = safe_cells_left
+        field_service.n_flags = n_flags
+        field_service.n_clicks = n_clicks
+        field_service.n_chords = n_chords
+        field_service.cells_revealed = cells_revealed
+        field_service.largest_reveal = largest_reveal
+        field_service.recently_opened = None
+
+        if len(field_service.mines) != n_mines:
+            raise ValueError("The snapshot is corrupted.")
+        return field_service
+
+    def to_snapshot(self) -> bytes:
+        """Packs the field into a compact snapshot: a fixed header with the field parameters and counters,
+        followed by the zlib-compressed cell values and cell states. The random generator isn't kept,
+        since it's only used before the first click.
+
+        Returns:
+            bytes: The snapshot.
+        """
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_VERSION,
+            self.height,
+            self.width,
+            len(self.mines),
+            self.seed,
+            self.safe_cells_left,
+            self.n_flags,
+            self.n_clicks,
+            self.n_chords,
+            self.cells_revealed,
+            self.largest_reveal,
+        )
+        return header + zlib.compress(self.field + self.state)
 
     def __str__(self) -> str:
         """Used for debugging field creation, prints the field.
@@ -41,9 +233,9 @@ class FieldService:
             str: The string representation of the field.
         """
         result = ""
-        for row in self.field:
-            for cell_value in row:
-                if cell_value == 9:
+        for row in range(self.height):
+            for cell_value in self.field[row * self.width : (row + 1) * self.width]:  # noqa: E203
+                if cell_value == MINE:
                     result += "¤ "
                 elif cell_value == 0:
                     result += "· "
@@ -63,24 +255,58 @@ class FieldService:
         """
         return cell.row * self.width + cell.column
 
-    def get_cell_neighbours(self, cell: Cell) -> Generator[Cell, None, None]:
+    def calculate_cell(self, index: int) -> Cell:
+        """Helper function for converting a flat index back into a two-dimensional cell.
+
+        Args:
+            index (int): The flat index of the cell.
+
+        Returns:
+            Cell: The cell with its two-dimensional coordinates.
+        """
+        row, column = divmod(index, self.width)
+        return Cell(row=row, column=column)
+
+    def build_collection(self, groups: dict[str, list[int]]) -> CellCollection:
+        """Converts flat indices grouped by cell category into a CellCollection for the response.
+
+        Args:
+            groups (dict[str, list[int]]): The flat indices of cells, grouped by category.
+
+        Returns:
+            CellCollection: The same cells as `Cell` objects.
+        """
+        return CellCollection(
+            {key: [self.calculate_cell(index) for index in indices] for key, indices in groups.items()}
+        )
+
+    def build_result(self, status: str, groups: dict[str, list[int]], collect: bool = True) -> GameResponse:
+        """Builds the result of an action from the flat indices of its cells.
+
+        Args:
+            status (str): The status of the result.
+            groups (dict[str, list[int]]): The flat indices of cells, grouped by category.
+            collect (bool, optional): Whether to convert the cells into a CellCollection right away. A result
+                that is streamed keeps the flat indices instead, and builds the cells one frame at a time.
+                Defaults to True.
+
+        Returns:
+            GameResponse: The result, with either `cells` or `indices` set.
+        """
+        if collect:
+            return GameResponse(status=status, cells=self.build_collection(groups))
+        return GameResponse(status=status, indices=groups)
+
+    def get_cell_neighbours(self, index: int) -> tuple[int, ...]:
         """Helper function for finding valid neighbours of a cell.
 
         Args:
-            cell (Cell): The cell to find the neighbours for.
+            index (int): The flat index of the cell to find the neighbours for.
 
-        Yields:
-            Generator[Cell, None, None]: The valid neighbours of the cell.
-        """
-        for change in DIRECTIONS:
-            neighbour_cell = cell.add(change)
-            if not (
-                neighbour_cell.row < 0
-                or neighbour_cell.row >= self.height
-                or neighbour_cell.column < 0
-                or neighbour_cell.column >= self.width
-            ):
-                yield neighbour_cell
+        Returns:
+            tuple[int, ...]: The flat indices of the valid neighbours of the cell.
+        """
+        return tuple(index + offset for offset in self.neighbour_offsets[self.edge_classes[index]])
 
     def check_field_size(self, n_mines: int) -> int:
         """Checks if the requested number of mines is suitable for the requested field size.
@@ -102,188 +328,442 @@ class FieldService:
             raise ValueError("There should be at least 10% mined cells. Try to go for 20%, it's ideal.")
         return field_size
 
-    def distribute_mines(self, start: Cell, n_mines: int, field_size: int) -> list[int]:
-        """Calculates the positions that can't be mined (the starting cell and those all around it),
-        then pseudo-randomly distributes mines over the field.
+    @staticmethod
+    def generate_board(height: int, width: int, n_mines: int, seed: int | None = None) -> Board:
+        """Pseudo-randomly distributes mines over the whole field and calculates the values of the other cells.
+        The result doesn't depend on the first click, so it can be generated in advance.
 
         Args:
-            start (Cell): The empty starting cell.
+            height (int): Height of the game field.
+            width (int): Width of the game field.
             n_mines (int): The number of mines to populate the field with.
-            field_size (int): The field size.
+            seed (int | None, optional): The seed for the random generator. Defaults to None — a random one.
 
         Returns:
-            list[int]: The flat indices of mine positions.
+            Board: The generated board.
         """
-        forbidden_mine_positions = [self.calculate_flat_index(start)]
-        for neighbour in self.get_cell_neighbours(cell=start):
-            forbidden_mine_positions.append(self.calculate_flat_index(cell=neighbour))
+        if seed is None:
+            seed = random.getrandbits(32)
+        rng = random.Random(seed)
 
-        potential_mine_positions = list(set(range(field_size)) - set(forbidden_mine_positions))
-        return random.sample(potential_mine_positions, k=n_mines)
+        mine_positions = rng.sample(range(height * width), k=n_mines)
+        field = FieldService.create_field(height=height, width=width, mine_positions=mine_positions)
+        return Board(seed=seed, field=field, mines=mine_positions, rng=rng)
+
+    def distribute_mines(self, start: Cell) -> None:
+        """Calculates the positions that can't be mined (the starting cell and those all around it),
+        then moves the mines found there to pseudo-random positions over the rest of the field.
+
+        Args:
+            start (Cell): The empty starting cell.
+
+        Raises:
+            ValueError: In case the field is too small to keep the starting cells clear.
+        """
+        start_index = self.calculate_flat_index(start)
+        forbidden_mine_positions = {start_index, *self.get_cell_neighbours(index=start_index)}
+        displaced_mines = [position for position in forbidden_mine_positions if self.field[position] == MINE]
+        if not displaced_mines:
+            return
+
+        field_size = len(self.field)
+        if field_size - len(forbidden_mine_positions) < len(self.mines):
+            raise ValueError("The field is too small to keep the first clicked cell and its neighbours clear.")
+
+        for mine in displaced_mines:
+            self.remove_mine(index=mine)
+
+        new_mines: list[int] = []
+        while len(new_mines) < len(displaced_mines):
+            position = self.rng.randrange(field_size)
+            if position not in forbidden_mine_positions and self.field[position] != MINE:
+                self.add_mine(index=position)
+                new_mines.append(position)
+
+        self.mines = [mine for mine in self.mines if mine not in forbidden_mine_positions] + new_mines
+
+    def remove_mine(self, index: int) -> None:
+        """Removes a mine from a cell, updating the values of the cell and its neighbours.
+
+        Args:
+            index (int): The flat index of the mined cell.
+        """
+        field = self.field
+        cell_value = 0
+        for neighbour in self.get_cell_neighbours(index=index):
+            if field[neighbour] == MINE:
+                cell_value += 1
+            else:
+                field[neighbour] -= 1
+        field[index] = cell_value
+
+    def add_mine(self, index: int) -> None:
+        """Puts a mine into a cell, updating the values of its neighbours.
+
+        Args:
+            index (int): The flat index of the empty cell.
+        """
+        field = self.field
+        for neighbour in self.get_cell_neighbours(index=index):
+            if field[neighbour] != MINE:
+                field[neighbour] += 1
+        field[index] = MINE
 
-    def create_field(self, field_size: int, mine_positions: list[int]) -> None:
-        """Populates the two-dimensional field with mines from the flat mine position list
+    @staticmethod
+    def create_field(height: int, width: int, mine_positions: list[int], use_numpy: bool | None = None) -> bytearray:
+        """Populates the flat field with mines from the mine position list
         and values for the surrounding cells.
 
         Args:
-            field_size (int): The field size.
+            height (int): Height of the game field.
+            width (int): Width of the game field.
             mine_positions (list[int]): The flat indices of mine positions.
+            use_numpy (bool | None, optional): Whether to count the neighbouring mines with NumPy.
+                Defaults to None — NumPy is used if it's installed and the field is large enough.
+
+        Returns:
+            bytearray: The flat field with mines and values for the surrounding cells.
         """
-        flat_field = [9 if i in mine_positions else 0 for i in range(field_size)]
+        if use_numpy is None:
+            use_numpy = np is not None and height * width >= NUMPY_MIN_FIELD_SIZE
 
-        for i, cell_value in enumerate(flat_field):
-            row = i // self.width
-            column = i % self.width
-            cell = Cell(row=row, column=column)
+        if use_numpy:
+            return FieldService.count_neighbouring_mines(height=height, width=width, mine_positions=mine_positions)
 
-            if cell_value == 9:
-                self.mines.add(cell)
-                continue
+        field = bytearray(height * width)
+        for mine in mine_positions:
+            field[mine] = MINE
 
-            neighbour_mine_count = 0
-            for neighbour in self.get_cell_neighbours(cell=cell):
-                if flat_field[self.calculate_flat_index(neighbour)] == 9:
-                    neighbour_mine_count += 1
-            flat_field[i] = neighbour_mine_count
+        neighbour_offsets, edge_classes = get_neighbour_table(height=height, width=width)
+        for mine in mine_positions:
+            for offset in neighbour_offsets[edge_classes[mine]]:
+                if field[mine + offset] != MINE:
+                    field[mine + offset] += 1
+        return field
 
-        self.field = [flat_field[row * self.width : (row + 1) * self.width] for row in range(self.height)]  # noqa: E203
+    @staticmethod
+    def count_neighbouring_mines(height: int, width: int, mine_positions: list[int]) -> bytearray:
+        """Calculates the values of all cells at once with NumPy, by summing up
+        the eight shifted copies of a zero-padded mine matrix.
 
-    def flood_neighbouring_cells(
-        self,
-        cell: Cell,
-        collected: CellCollection | None = None,
-    ) -> CellCollection | None:
-        """Performs a recursive flood fill check of the cells, starting from one of them.
-        The starting cell is always empty. Stops when finding a non-empty border.
+        Args:
+            height (int): Height of the game field.
+            width (int): Width of the game field.
+            mine_positions (list[int]): The flat indices of mine positions.
+
+        Returns:
+            bytearray: The flat field with mines and values for the surrounding cells.
+        """
+        if np is None:
+            raise RuntimeError("NumPy is not installed.")
+
+        mined = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        rows, columns = np.divmod(np.asarray(mine_positions, dtype=np.intp), width)
+        mined[rows + 1, columns + 1] = 1
+
+        counts = np.zeros((height, width), dtype=np.uint8)
+        for row_change, column_change in DIRECTIONS:
+            counts += mined[
+                1 + row_change : height + 1 + row_change,  # noqa: E203
+                1 + column_change : width + 1 + column_change,  # noqa: E203
+            ]
+        counts[rows, columns] = MINE
+        return bytearray(counts.tobytes())
+
+    def open_cell(self, index: int) -> None:
+        """Marks a single cell as opened, keeping the count of safe cells left to open up to date.
+        The cell is also appended to `recently_opened` if a solver is following the field.
 
         Args:
-            cell (Cell): The cell to check. On the first run, always empty.
-            collected (CellCollection | None, optional):
-                The cells collected, with their corresponding values.
-                Defaults to None on the first run.
+            index (int): The flat index of the cell to open.
+        """
+        if not self.state[index] & OPENED:
+            self.state[index] |= OPENED
+            self.safe_cells_left -= 1
+            if self.recently_opened is not None:
+                self.recently_opened.append(index)
+
+    def record_action(self, safe_cells_before: int, result: GameResponse | None) -> GameResponse | None:
+        """Updates the reveal counters after a click or a chord, and attaches the statistics to a game over.
+
+        Args:
+            safe_cells_before (int): The number of safe cells left before the action.
+            result (GameResponse | None): The result of the action.
 
         Returns:
-            CellCollection | None:
-                The resulting cell collection, if all cells have been visited.
-                None, if there are still potentially cells to check.
+            GameResponse | None: The same result.
         """
-        if collected is None:
-            collected = CellCollection()
+        revealed = safe_cells_before - self.safe_cells_left
+        self.cells_revealed += revealed
+        self.largest_reveal = max(self.largest_reveal, revealed)
 
-        if cell in collected.cells:
-            return None
+        if result is not None and result.status == "game_over":
+            result.stats = self.get_stats()
+        return result
 
-        cell_value = self.field[cell.row][cell.column]
-        if cell_value > 0:
-            collected[f"open{cell_value}"].append(cell)
-            return None
+    def get_stats(self) -> GameStats:
+        """Collects the statistics of the game so far.
 
-        collected["empty"].append(cell)
+        Returns:
+            GameStats: The game statistics.
+        """
+        return GameStats(
+            clicks=self.n_clicks,
+            chords=self.n_chords,
+            flags=self.n_flags,
+            cells_revealed=self.cells_revealed,
+            largest_reveal=self.largest_reveal,
+            safe_cells_left=self.safe_cells_left,
+        )
+
+    def iterate_states(self) -> Iterator[tuple[int, int]]:
+        """Goes over the states of the cells that can be opened or flagged.
+
+        Yields:
+            tuple[int, int]: The flat index and the state of every such cell.
+        """
+        yield from enumerate(self.state)
 
-        for neighbour in self.get_cell_neighbours(cell=cell):
-            self.flood_neighbouring_cells(cell=neighbour, collected=collected)
+    def collect_opened_indices(self) -> dict[str, list[int]]:
+        """Collects the flat indices of all the opened cells, along with the flagged ones.
 
-        return collected
+        Returns:
+            dict[str, list[int]]: The opened cells grouped by their values, and the flagged cells.
+        """
+        groups: dict[str, list[int]] = {}
+        for index, cell_state in self.iterate_states():
+            if cell_state & OPENED:
+                cell_value = self.field[index]
+                groups.setdefault(f"open{cell_value}" if cell_value else "empty", []).append(index)
+            elif cell_state & FLAGGED:
+                groups.setdefault("flag", []).append(index)
+        return groups
+
+    def collect_opened_cells(self) -> CellCollection:
+        """Collects all the opened cells, along with the flagged ones, e.g. for redrawing the field after reconnecting.
+
+        Returns:
+            CellCollection: The opened cells grouped by their values, and the flagged cells.
+        """
+        return self.build_collection(self.collect_opened_indices())
+
+    @timed("flood_neighbouring_cells")
+    def flood_neighbouring_cells(self, index: int) -> dict[str, list[int]]:
+        """Performs an iterative flood fill check of the cells, starting from one of them.
+        The starting cell is always empty. Stops when finding a non-empty border.
+
+        Cells are pushed onto an explicit stack at most once: a VISITED bit is set in the field state
+        when a cell is first seen and cleared again once the fill is done, so no recursion
+        and no per-call lookup structure are needed.
+
+        Args:
+            index (int): The flat index of the cell to start from. Always empty.
+
+        Returns:
+            dict[str, list[int]]: The flat indices of the cells collected, grouped by their values.
+        """
+        field, state = self.field, self.state
+        neighbour_offsets, edge_classes = self.neighbour_offsets, self.edge_classes
+
+        empty: list[int] = []
+        collected = {"empty": empty}
+        bordering: list[list[int]] = [empty] + [collected.setdefault(f"open{value}", []) for value in range(1, 9)]
+
+        state[index] |= VISITED
+        stack = [index]
+        while stack:
+            current = stack.pop()
+            cell_value = field[current]
+            bordering[cell_value].append(current)
+            if cell_value > 0:
+                continue
 
-    def check_cell(self, cell: Cell) -> GameResponse | None:
+            for offset in neighbour_offsets[edge_classes[current]]:
+                neighbour = current + offset
+                if not state[neighbour] & VISITED:
+                    state[neighbour] |= VISITED
+                    stack.append(neighbour)
+
+        for indices in bordering:
+            for visited_index in indices:
+                state[visited_index] &= ~VISITED
+
+        return {key: indices for key, indices in collected.items() if indices}
+
+    @timed("check_cell")
+    def check_cell(self, cell: Cell, collect: bool = True) -> GameResponse | None:
         """Check a cell — find out what value it has and how that affects the game as a whole.
 
         Args:
             cell (Cell): The cell to check.
+            collect (bool, optional): Whether to convert the cells of the result into a CellCollection.
+                See `build_result`. Defaults to True.
 
         Returns:
             GameResponse | None: The result of a check.
         """
-        cell_value = self.field[cell.row][cell.column]
+        self.n_clicks += 1
+        safe_cells_before = self.safe_cells_left
+        result = self.check_index(index=self.calculate_flat_index(cell), collect=collect)
+        return self.record_action(safe_cells_before=safe_cells_before, result=result)
+
+    def check_index(self, index: int, collect: bool = True) -> GameResponse | None:
+        """Check a cell by its flat index. See `check_cell`. An opened cell has nothing left to reveal,
+        so checking it again gives no result instead of flooding and resending the area it opened.
+
+        Args:
+            index (int): The flat index of the cell to check.
+            collect (bool, optional): Whether to convert the cells of the result into a CellCollection.
+                Defaults to True.
 
-        if cell_value == 9:
-            return GameResponse(status="game_over", cells={"oops": [cell], "mine": list(self.mines)})
+        Returns:
+            GameResponse | None: The result of a check.
+        """
+        if self.state[index] & OPENED:
+            return None
+
+        cell_value = self.field[index]
+
+        if cell_value == MINE:
+            return self.build_result("game_over", {"oops": [index], "mine": self.mines}, collect=collect)
         elif cell_value > 0:
-            self.opened.add(cell)
-            return GameResponse(
-                status="okay",
-                cells={
-                    f"open{cell_value}": [cell],
-                },
-            )
+            self.open_cell(index=index)
+            return self.build_result("okay", {f"open{cell_value}": [index]}, collect=collect)
         else:
-            opened_area = self.flood_neighbouring_cells(cell)
+            opened_area = self.flood_neighbouring_cells(index=index)
             if opened_area:
-                self.opened.update(opened_area.cells)
-                return GameResponse(status="okay", cells=opened_area)
+                for indices in opened_area.values():
+                    for opened_index in indices:
+                        self.open_cell(index=opened_index)
+                return self.build_result("okay", opened_area, collect=collect)
 
         return None
 
-    def collect_neighbouring_cells(self, cell: Cell) -> tuple[int, list[CellCollection], GameResponse | None]:
-        """Collects the neighbouring cell check results.
+    def get_neighbourhood_masks(self, index: int) -> tuple[tuple[int, ...], int, int]:
+        """Reads the states of the neighbours of a cell in a single pass, as bitmasks over its neighbourhood:
+        bit `i` stands for the `i`-th neighbour, in the order of the neighbour offsets of its edge class.
 
         Args:
-            cell (Cell): The cell whose neighbours to check.
+            index (int): The flat index of the cell.
 
         Returns:
-            tuple[int, list[CellCollection], GameResponse | None]:
-                The number of neighbours that are flagged,
-                the list of neighbour check cells,
-                and the first neighbour that was mined and unflagged, if any.
+            tuple[tuple[int, ...], int, int]: The flat indices of the neighbours,
+                the mask of the closed ones that are flagged and the mask of the closed ones that aren't.
+                An opened cell counts for neither, even if it was flagged.
         """
-        n_flagged_neighbours = 0
-        neighbour_checks = []
-        failed_neighbour_check = None
-
-        for neighbour in self.get_cell_neighbours(cell=cell):
-            if neighbour in self.opened:
+        state = self.state
+        neighbours = tuple(index + offset for offset in self.neighbour_offsets[self.edge_classes[index]])
+        flagged_mask = closed_mask = 0
+        for bit, neighbour in enumerate(neighbours):
+            neighbour_state = state[neighbour]
+            if neighbour_state & OPENED:
                 continue
-            elif neighbour in self.flagged:
-                n_flagged_neighbours += 1
+            if neighbour_state & FLAGGED:
+                flagged_mask |= 1 << bit
+            else:
+                closed_mask |= 1 << bit
+        return neighbours, flagged_mask, closed_mask
+
+    def is_mine(self, index: int) -> bool:
+        """Checks whether a cell is mined.
+
+        Args:
+            index (int): The flat index of the cell.
+
+        Returns:
+            bool: Whether the cell is mined.
+        """
+        return self.field[index] == MINE
+
+    @timed("flood_closed_cells")
+    def flood_closed_cells(self, sources: list[int]) -> dict[str, list[int]]:
+        """Opens a set of closed safe cells and floods on from the empty ones, all in a single fill.
+        Unlike `flood_neighbouring_cells`, the fill never enters opened cells: the neighbours of an opened
+        empty cell are always opened too, so there is nothing new behind them. Every cell is collected
+        at most once, however many sources its area can be reached from.
+
+        Args:
+            sources (list[int]): The flat indices of the cells to start from. None of them is a mine.
+
+        Returns:
+            dict[str, list[int]]: The flat indices of the newly opened cells, grouped by their values.
+        """
+        field, state = self.field, self.state
+        neighbour_offsets, edge_classes = self.neighbour_offsets, self.edge_classes
+
+        empty: list[int] = []
+        collected = {"empty": empty}
+        bordering: list[list[int]] = [empty] + [collected.setdefault(f"open{value}", []) for value in range(1, 9)]
+
+        stack = []
+        for source in sources:
+            if not state[source] & (OPENED | VISITED):
+                state[source] |= VISITED
+                stack.append(source)
+
+        while stack:
+            current = stack.pop()
+            cell_value = field[current]
+            bordering[cell_value].append(current)
+            if cell_value > 0:
                 continue
 
-            neighbour_check = self.check_cell(cell=neighbour)
-            if neighbour_check:
-                if neighbour_check.status == "game_over" and not failed_neighbour_check:
-                    failed_neighbour_check = neighbour_check
-                cells = neighbour_check.cells
-                if cells:
-                    neighbour_checks.append(cells)
+            for offset in neighbour_offsets[edge_classes[current]]:
+                neighbour = current + offset
+                if not state[neighbour] & (OPENED | VISITED):
+                    state[neighbour] |= VISITED
+                    stack.append(neighbour)
 
-        return n_flagged_neighbours, neighbour_checks, failed_neighbour_check
+        for indices in bordering:
+            for opened_index in indices:
+                state[opened_index] &= ~VISITED
+                self.open_cell(index=opened_index)
 
-    @staticmethod
-    def merge_opened_neighbouring_cells(neighbour_checks: list[CellCollection]) -> GameResponse:
-        """Merges the GameResponses into a single one. Currently used only as a helper for check_neighbouring_cells.
+        return {key: indices for key, indices in collected.items() if indices}
+
+    def chord_index(self, index: int, collect: bool = True) -> GameResponse | None:
+        """Check the neighbours of a cell by its flat index. See `check_neighbouring_cells`.
+
+        The flags around the cell are counted before anything is opened, so a chord with too few flags
+        doesn't change the field. Otherwise, a closed unflagged mine ends the game, and the closed unflagged
+        neighbours are opened together, by a single fill that sends every newly opened cell once.
 
         Args:
-            neighbouring_cells (list[GameResponse]): The GameResponses to merge.
+            index (int): The flat index of the cell whose neighbours to check.
+            collect (bool, optional): Whether to convert the cells of the result into a CellCollection.
+                Defaults to True.
 
         Returns:
-            GameResponse: The single merged GameResponse.
+            GameResponse | None: The result of a check or no result if a cell couldn't be checked.
         """
-        merged_opened_cells = CellCollection()
+        neighbours, flagged_mask, closed_mask = self.get_neighbourhood_masks(index=index)
+        if flagged_mask.bit_count() < self.field[index]:
+            return None
 
-        for neighbour_check in neighbour_checks:
-            for key, value in neighbour_check.items:
-                merged_opened_cells[key] += value
+        sources = [neighbour for bit, neighbour in enumerate(neighbours) if closed_mask >> bit & 1]
+        for source in sources:
+            if self.is_mine(index=source):
+                return self.build_result("game_over", {"oops": [source], "mine": self.mines}, collect=collect)
 
-        return GameResponse(status="okay", cells=merged_opened_cells)
+        return self.build_result("okay", self.flood_closed_cells(sources=sources), collect=collect)
 
-    def check_neighbouring_cells(self, cell: Cell) -> GameResponse | None:
+    @timed("check_neighbouring_cells")
+    def check_neighbouring_cells(self, cell: Cell, collect: bool = True) -> GameResponse | None:
         """Check neighbours of a cell. A cell can't be checked if there's less flagged
         neighbours compared to the actual cell value.
 
         Args:
             cell (Cell): The cell whose neighbours to check.
+            collect (bool, optional): Whether to convert the cells of the result into a CellCollection.
+                See `build_result`. Defaults to True.
 
         Returns:
             GameResponse | None: The result of a check or no result if a cell couldn't be checked.
         """
-        cell_value = self.field[cell.row][cell.column]
-        n_flagged_neighbours, neighbour_checks, failed_neighbour_check = self.collect_neighbouring_cells(cell=cell)
-
-        if n_flagged_neighbours < cell_value:
-            return None
-        elif failed_neighbour_check:
-            return failed_neighbour_check
-
-        return self.merge_opened_neighbouring_cells(neighbour_checks=neighbour_checks)
+        self.n_chords += 1
+        safe_cells_before = self.safe_cells_left
+        result = self.chord_index(index=self.calculate_flat_index(cell), collect=collect)
+        return self.record_action(safe_cells_before=safe_cells_before, result=result)
 
     def flag_cell(self, cell: Cell, remove_flag: bool = False) -> None:
         """Flag or unflag a single cell.
@@ -292,20 +772,24 @@ class FieldService:
             cell (Cell): The cell to flag
             remove_flag (bool, optional): Whether to remove the flag or not. Defaults to False.
         """
-        if remove_flag:
-            self.flagged.discard(cell)
-        else:
-            self.flagged.add(cell)
-
+        index = self.calculate_flat_index(cell)
+        is_flagged = bool(self.state[index] & FLAGGED)
+        if remove_flag and is_flagged:
+            self.state[index] &= ~FLAGGED
+            self.n_flags -= 1
+        elif not remove_flag and not is_flagged:
+            self.state[index] |= FLAGGED
+            self.n_flags += 1
+
+    @timed("check_win")
     def check_win(self) -> bool:
         """Check if all conditions for winning have been met already.
+        Mined cells are never opened, so it's enough to check that no safe cells are left.
 
         Returns:
             bool: Whether all conditions have been met.
         """
-        if len(self.mines) + len(self.opened) == self.width * self.height and self.mines.isdisjoint(self.opened):
-            return True
-        return False
+        return self.safe_cells_left == 0
 
 
 if __name__ == "__main__":
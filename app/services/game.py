@@ -1,85 +1,626 @@
-from loguru import logger
+import asyncio
+import json
+import secrets
+import time
+from functools import partial
+from typing import TYPE_CHECKING
+
 from starlette.websockets import WebSocket
 
-from app.schemas import Cell, GameResponse
-from app.services import FieldService
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+from app.core import metrics, settings
+from app.core.logs import GameLogger, summarize
+from app.schemas import Cell, CellCollection, GameResponse
+from app.services import ChunkedFieldService, FieldService
+from app.services.no_guess import no_guess_generator
+from app.services.offload import execution_policy
+from app.services.pool import board_pool
+from app.services.probability import ProbabilityEngine
+from app.services.protocol import PROTOCOLS, encode_binary
+from app.services.replay import GameRecord, Message, game_recorder
+from app.services.solver import Solver
+from app.services.store import game_store
+
+if TYPE_CHECKING:
+    from app.services.multiplex import GameChannel
+
+
+def order_frames(
+    groups: dict[str, list[int]],
+    height: int,
+    width: int,
+    focus: tuple[int, int],
+    viewport: tuple[int, int, int, int] | None,
+    frame_size: int,
+) -> list[dict[str, list[int]]]:
+    """Splits the cells of a streamed result into frames, in the order they should be drawn in: the cells inside
+    the viewport go first, and within and outside of it, the ones closer to the focus. The cells are put
+    into buckets by their distance, so the order takes a single pass instead of a sort, or are ordered
+    with NumPy, if it's installed.
+
+    Args:
+        groups (dict[str, list[int]]): The flat indices of the cells, grouped by category.
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        focus (tuple[int, int]): The row and the column of the last click.
+        viewport (tuple[int, int, int, int] | None): The visible part of the board, if frontend reported it.
+        frame_size (int): The largest number of cells in a frame.
+
+    Returns:
+        list[dict[str, list[int]]]: The flat indices of the cells of every frame, grouped by category.
+    """
+    if np is not None:
+        return order_frames_numpy(groups, width=width, focus=focus, viewport=viewport, frame_size=frame_size)
+
+    focus_row, focus_column = focus
+    keys = list(groups)
+    n_keys = len(keys)
+    outside = height + width
+    buckets: list[list[int]] = [[] for _ in range(2 * outside)]
+    for number, key in enumerate(keys):
+        for index in groups[key]:
+            row, column = divmod(index, width)
+            distance = max(abs(row - focus_row), abs(column - focus_column))
+            if viewport is not None:
+                top, left, bottom, right = viewport
+                if not (top <= row <= bottom and left <= column <= right):
+                    distance += outside
+            buckets[distance].append(index * n_keys + number)
+
+    frames = []
+    frame: dict[str, list[int]] = {}
+    n_cells = 0
+    for bucket in buckets:
+        for code in bucket:
+            index, number = divmod(code, n_keys)
+            frame.setdefault(keys[number], []).append(index)
+            n_cells += 1
+            if n_cells == frame_size:
+                frames.append(frame)
+                frame, n_cells = {}, 0
+    if frame or not frames:
+        frames.append(frame)
+    return frames
+
+
+def order_frames_numpy(
+    groups: dict[str, list[int]],
+    width: int,
+    focus: tuple[int, int],
+    viewport: tuple[int, int, int, int] | None,
+    frame_size: int,
+) -> list[dict[str, list[int]]]:
+    """Splits the cells of a streamed result into frames with NumPy, in the same order as `order_frames`.
+
+    Args:
+        groups (dict[str, list[int]]): The flat indices of the cells, grouped by category.
+        width (int): Width of the game field.
+        focus (tuple[int, int]): The row and the column of the last click.
+        viewport (tuple[int, int, int, int] | None): The visible part of the board, if frontend reported it.
+        frame_size (int): The largest number of cells in a frame.
+
+    Returns:
+        list[dict[str, list[int]]]: The flat indices of the cells of every frame, grouped by category.
+    """
+    keys = list(groups)
+    indices = np.concatenate([np.asarray(groups[key], dtype=np.int64) for key in keys])
+    numbers = np.repeat(np.arange(len(keys)), [len(groups[key]) for key in keys])
+    rows, columns = np.divmod(indices, width)
+    distances = np.maximum(np.abs(rows - focus[0]), np.abs(columns - focus[1]))
+    if viewport is not None:
+        top, left, bottom, right = viewport
+        inside = (rows >= top) & (rows <= bottom) & (columns >= left) & (columns <= right)
+        distances += np.where(inside, 0, distances.max(initial=0) + 1)
+
+    order = np.argsort(distances, kind="stable")
+    indices, numbers = indices[order], numbers[order]
+    frames = []
+    for first in range(0, max(len(indices), 1), frame_size):
+        frame_indices = indices[first : first + frame_size]  # noqa: E203
+        frame_numbers = numbers[first : first + frame_size]  # noqa: E203
+        frame = {}
+        for number, key in enumerate(keys):
+            selected = frame_indices[frame_numbers == number]
+            if selected.size:
+                frame[key] = selected.tolist()
+        frames.append(frame)
+    return frames
 
 
 class GameService:
     def __init__(self) -> None:
-        self.websocket: WebSocket | None = None
+        self.websocket: WebSocket | GameChannel | None = None
         self.field_service: FieldService | None = None
+        self.solver: Solver | None = None
+        self.probability_engine: ProbabilityEngine | None = None
+        self.protocol = "json"
+        self.game_id: str | None = None
+        self.finished = False
+        self.stream = False
+        self.focus: Cell | None = None
+        self.viewport: tuple[int, int, int, int] | None = None
+        self.lock = asyncio.Lock()
+        self.log = GameLogger(sample_rate=settings.GAME_LOG_SAMPLE_RATE)
+        self.record: GameRecord | None = None
+        self.n_frames = 0
 
-    async def start_game(self, websocket: WebSocket) -> None:
+    async def start_game(self, websocket: "WebSocket | GameChannel") -> None:
         """Start the game — wait for the first click, initialise the FieldService
         with requested parameters and listen for new user input.
 
+        The first payload can also resume a suspended game by its `game_id` instead,
+        request the compact binary protocol with `"protocol": "binary"`,
+        ask for a board that can be cleared without guessing with `"no_guess": true`,
+        and ask for large reveals to be streamed in frames with `"stream": true`, along with the visible part
+        of the board as `"viewport": [top, left, bottom, right]`.
+
         Args:
-            websocket (WebSocket): The WebSocket to listen on and send data through.
+            websocket (WebSocket | GameChannel): The WebSocket to listen on and send data through,
+                or the channel of the game on a multiplexed one.
 
         Raises:
-            ValueError: If the first payload is in bad format.
+            ValueError: If the first payload is in bad format or the game to resume doesn't exist.
         """
         self.websocket = websocket
         request_body = await self.receive_click(first=True)
         assert isinstance(request_body, dict)
 
+        if request_body["type"] not in ("start", "resume"):
+            raise ValueError("Incorrect starting payload.")
+
+        self.protocol = request_body.get("protocol", "json")
+        if self.protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol: {self.protocol}.")
+        self.stream = bool(request_body.get("stream", False))
+        if "viewport" in request_body:
+            self.viewport = self.parse_viewport(request_body["viewport"])
+
         if request_body["type"] == "start":
-            start = Cell.from_sequence(request_body["start"])
-            self.field_service = FieldService(
-                start=start, n_mines=request_body["mines"], height=request_body["height"], width=request_body["width"]
-            )
+            start = self.focus = Cell.from_sequence(request_body["start"])
+            self.field_service = await self.create_field(request_body=request_body, start=start)
+            self.game_id = secrets.token_urlsafe(12)
+            self.log.bind(game_id=self.game_id)
 
-            result: GameResponse | None = self.field_service.check_cell(cell=start)
+            result = await self.apply_to_field(method="check_cell", request_type="click", request_cell=start)
+            assert result is not None
+            result.game_id = self.game_id
             await self.send_result(result)
-            logger.info(f"Game started with a first click at {request_body['start']}")
+            if game_recorder.enabled:
+                self.start_record(request_body=request_body, start=start)
+            self.log.info(
+                "Game {seed} started with a first click at {start}", seed=self.field_service.seed, start=start
+            )
+        else:
+            self.game_id = request_body["game_id"]
+            self.log.bind(game_id=self.game_id)
+            self.field_service = await game_store.restore_async(game_id=request_body["game_id"])
+            if self.field_service is None:
+                raise ValueError("The game doesn't exist or has expired.")
+
+            cost = self.field_service.height * self.field_service.width
+            if self.stream:
+                indices = await execution_policy.run(cost=cost, operation=self.field_service.collect_opened_indices)
+                await self.send_result(GameResponse(status="okay", indices=indices, game_id=self.game_id))
+            else:
+                cells = await execution_policy.run(cost=cost, operation=self.field_service.collect_opened_cells)
+                await self.send_result(GameResponse(status="okay", cells=cells, game_id=self.game_id))
+            self.log.info("Game {seed} resumed", seed=self.field_service.seed)
+
+        while True:
+            await self.process_click()
+
+    async def create_field(self, request_body: dict, start: Cell) -> FieldService:
+        """Create the field requested in the starting payload. Huge fields are chunked,
+        and the others get a pre-generated board from the pool or a no-guess one, if it was requested.
+        Generating a large regular board from scratch runs off the event loop.
+
+        Args:
+            request_body (dict): The starting payload.
+            start (Cell): The cell clicked first.
+
+        Returns:
+            FieldService: The field.
+        """
+        n_mines, height, width = request_body["mines"], request_body["height"], request_body["width"]
+        seed = request_body.get("seed")
+        if height * width >= settings.CHUNKED_FIELD_MIN_SIZE:
+            return ChunkedFieldService(start=start, n_mines=n_mines, height=height, width=width, seed=seed)
 
-            while True:
-                await self.process_click()
+        if request_body.get("no_guess"):
+            board = await no_guess_generator.generate(
+                height=height, width=width, n_mines=n_mines, start=start, seed=seed
+            )
+        elif seed is None:
+            board = board_pool.acquire(height=height, width=width, n_mines=n_mines)
         else:
-            raise ValueError("Incorrect starting payload.")
+            board = None
+
+        cost = execution_policy.estimate_field_cost(height=height, width=width, pooled=board is not None)
+        operation = partial(
+            FieldService, start=start, n_mines=n_mines, height=height, width=width, seed=seed, board=board
+        )
+        return await execution_policy.run(cost=cost, operation=operation)
+
+    def start_record(self, request_body: dict, start: Cell) -> None:
+        """Start recording the game for the replay log, once its first click has been answered.
+        Resumed games aren't recorded, since their beginning was played on another connection.
+
+        Args:
+            request_body (dict): The starting payload.
+            start (Cell): The cell clicked first.
+        """
+        assert self.field_service is not None
+        repaired = request_body.get("no_guess") and not isinstance(self.field_service, ChunkedFieldService)
+        self.record = GameRecord(
+            seed=self.field_service.seed,
+            height=self.field_service.height,
+            width=self.field_service.width,
+            n_mines=request_body["mines"],
+            start=self.field_service.calculate_flat_index(start),
+            start_frames=self.n_frames,
+            layout=sorted(self.field_service.mines) if repaired else [],
+            stream=self.stream,
+            messages=[],
+        )
+
+    def save_record(self) -> None:
+        """Append the recorded game to the replay log, once its connection is closed."""
+        if self.record is not None:
+            game_recorder.write(self.record)
+            self.record = None
+
+    def suspend_game(self) -> None:
+        """Keep an unfinished game in the session store after a disconnect, so that it can be resumed."""
+        if self.field_service is not None and self.game_id is not None and not self.finished:
+            game_store.save(game_id=self.game_id, field_service=self.field_service)
 
     async def process_click(self) -> None:
-        """Process the following clicks received from frontend."""
+        """Process the following clicks received from frontend. A batch of actions is applied in order
+        and answered with a single merged result, stopping at the first action that ends the game.
+        Every action runs inline or off the event loop, depending on how many cells it can reveal."""
         assert self.field_service is not None
-        request_type, request_cell = await self.receive_click()
+        actions = await self.receive_click()
+        assert isinstance(actions, list)
+        if not actions:
+            return
 
-        if request_type == "click":
-            logger.info(f"The user chose cell {request_cell}")
-            result = self.field_service.check_cell(cell=request_cell)
-            await self.send_result(result)
+        results = []
+        may_win = False
+        n_frames = self.n_frames
+        async with self.lock:
+            for request_type, request_cell in actions:
+                result = await self.apply_action(request_type=request_type, request_cell=request_cell)
+                if request_type in ("click", "check_neighbours"):
+                    may_win, self.focus = True, request_cell
+                if result:
+                    results.append(result)
+                    if result.status == "game_over":
+                        break
+
+        await self.send_result(results[0] if len(results) == 1 else self.merge_results(results=results))
+
+        if may_win and self.field_service.check_win():
+            await self.send_result(GameResponse(status="win", stats=self.field_service.get_stats()))
+
+        if self.record is not None:
+            recorded = [(request_type, self.calculate_index(request_cell)) for request_type, request_cell in actions]
+            self.record.messages.append(Message(actions=recorded, n_frames=self.n_frames - n_frames))
+
+        assert self.game_id is not None
+        if self.finished:
+            game_store.discard(game_id=self.game_id)
+        else:
+            game_store.checkpoint(game_id=self.game_id, field_service=self.field_service)
+
+    async def apply_action(self, request_type: str, request_cell: Cell | None) -> GameResponse | None:
+        """Apply a single user action to the field. Clicks and chords that can reveal a large area
+        run off the event loop.
+
+        Args:
+            request_type (str): The type of the action.
+            request_cell (Cell | None): The cell the action was made on. Only a hint and the mine probabilities
+                don't need one.
+
+        Raises:
+            ValueError: If the action needs a cell but doesn't have one.
+
+        Returns:
+            GameResponse | None: The result of the action, if there is one to send.
+        """
+        assert self.field_service is not None
+
+        if request_type == "hint":
+            self.log.debug("The user asked for a hint")
+            return self.give_hint()
+        elif request_type == "probabilities":
+            self.log.debug("The user asked for the mine probabilities")
+            return await self.give_probabilities()
+        elif request_cell is None:
+            raise ValueError(f"No cell given for the {request_type} action.")
+        elif request_type == "click":
+            self.log.debug("The user chose cell {cell}", cell=request_cell)
+            return await self.apply_to_field(method="check_cell", request_type=request_type, request_cell=request_cell)
         elif request_type == "flag":
-            logger.info(f"The user flagged cell {request_cell}")
+            self.log.debug("The user flagged cell {cell}", cell=request_cell)
             self.field_service.flag_cell(cell=request_cell)
         elif request_type == "remove_flag":
-            logger.info(f"The user unflagged cell {request_cell}")
+            self.log.debug("The user unflagged cell {cell}", cell=request_cell)
             self.field_service.flag_cell(cell=request_cell, remove_flag=True)
         elif request_type == "check_neighbours":
-            logger.info(f"The user checked neighbours of cell {request_cell}")
-            result = self.field_service.check_neighbouring_cells(cell=request_cell)
-            await self.send_result(result)
+            self.log.debug("The user checked neighbours of cell {cell}", cell=request_cell)
+            return await self.apply_to_field(
+                method="check_neighbouring_cells", request_type=request_type, request_cell=request_cell
+            )
+        return None
 
-        if self.field_service.check_win():
-            await self.send_result(GameResponse(status="win"))
+    async def apply_to_field(self, method: str, request_type: str, request_cell: Cell) -> GameResponse | None:
+        """Apply a click or a chord to the field, inline or in the executor of the execution policy,
+        depending on how many cells it can reveal. A streamed game gets the flat indices of the cells,
+        which are only built into cells one frame at a time.
 
-    async def receive_click(self, first: bool = False) -> dict | tuple[str, Cell]:
-        """Receive click payload from frontend and parse it into request type and request cell.
+        Args:
+            method (str): The method of the field to call.
+            request_type (str): The type of the action.
+            request_cell (Cell): The cell the action was made on.
+
+        Returns:
+            GameResponse | None: The result of the action.
+        """
+        assert self.field_service is not None
+        cost = execution_policy.estimate_action_cost(
+            self.field_service, request_type=request_type, request_cell=request_cell
+        )
+        self.field_service, result = await execution_policy.apply(
+            cost=cost, field_service=self.field_service, method=method, cell=request_cell, collect=not self.stream
+        )
+        if self.solver is not None:
+            self.solver.field_service = self.field_service
+        if self.probability_engine is not None:
+            self.probability_engine.field_service = self.field_service
+        return result
+
+    def calculate_index(self, cell: Cell | None) -> int | None:
+        """Calculate the flat index of the cell of an action for the replay log.
+
+        Args:
+            cell (Cell | None): The cell, if the action has one.
 
         Returns:
-            tuple[str, Cell]: The resulting request type and request cell.
+            int | None: The flat index of the cell, or None if there isn't one.
+        """
+        assert self.field_service is not None
+        return None if cell is None else self.field_service.calculate_flat_index(cell)
+
+    def give_hint(self) -> GameResponse:
+        """Find a closed cell that is certainly safe, judging only by what the player can see.
+        The solver is created on the first hint and follows the field from then on.
+
+        Returns:
+            GameResponse: The result with the safe cell in the `hint` group, which is empty if no cell is certain.
+        """
+        assert self.field_service is not None
+        if self.solver is None:
+            self.solver = Solver(field_service=self.field_service)
+
+        index = self.solver.find_safe_cell()
+        return GameResponse(
+            status="okay", cells=self.field_service.build_collection({"hint": [] if index is None else [index]})
+        )
+
+    async def give_probabilities(self) -> GameResponse:
+        """Calculate the chance of every closed cell to be a mine, judging only by what the player can see.
+        The engine is created on the first request and keeps the counts of the parts of the frontier
+        that haven't changed from then on. The calculation always runs in the executor of the execution policy.
+
+        Raises:
+            ValueError: If the board is too large to send a chance for every cell.
+
+        Returns:
+            GameResponse: The result with the chances by row and column.
+        """
+        assert self.field_service is not None
+        n_cells = self.field_service.height * self.field_service.width
+        if isinstance(self.field_service, ChunkedFieldService) or n_cells > settings.PROBABILITY_MAX_CELLS:
+            raise ValueError("Mine probabilities aren't available for boards this large.")
+        if self.probability_engine is None:
+            self.probability_engine = ProbabilityEngine(
+                field_service=self.field_service,
+                max_exact_cells=settings.PROBABILITY_MAX_EXACT_CELLS,
+                n_samples=settings.PROBABILITY_SAMPLES,
+                time_budget=settings.PROBABILITY_TIME_BUDGET,
+                max_time=settings.PROBABILITY_MAX_TIME,
+                seed=self.field_service.seed,
+            )
+        engine, probabilities = await execution_policy.run(
+            cost=execution_policy.estimate_probability_cost(), operation=self.probability_engine.calculate_remotely
+        )
+        engine.field_service = self.field_service
+        self.probability_engine = engine
+        return GameResponse(status="okay", probabilities=probabilities)
+
+    @staticmethod
+    def merge_results(results: list[GameResponse]) -> GameResponse | None:
+        """Merges the results of a batch of actions into a single one.
+
+        Args:
+            results (list[GameResponse]): The results to merge. Only the last one can be a game over.
+
+        Returns:
+            GameResponse | None: The merged result, or None if there was nothing to merge.
+        """
+        if not results:
+            return None
+
+        merged_cells = CellCollection()
+        merged_indices: dict[str, list[int]] = {}
+        for result in results:
+            if result.cells:
+                for key, value in result.cells.items:
+                    merged_cells[key] += value
+            if result.indices:
+                for key, indices in result.indices.items():
+                    merged_indices.setdefault(key, []).extend(indices)
+        probabilities = next((result.probabilities for result in reversed(results) if result.probabilities), None)
+        return GameResponse(
+            status=results[-1].status,
+            cells=merged_cells,
+            indices=merged_indices or None,
+            stats=results[-1].stats,
+            probabilities=probabilities,
+        )
+
+    async def receive_click(self, first: bool = False) -> dict | list[tuple[str, Cell | None]]:
+        """Receive click payload from frontend and parse it into request types and request cells.
+        A payload of type `batch` carries a list of actions, each with its own type and cell.
+        A payload of type `viewport` only updates the visible part of the board and carries no actions.
+        The time spent parsing and the size of every payload are recorded in the metrics.
+
+        Args:
+            first (bool, optional): Whether it's the starting payload, returned as is. Defaults to False.
+
+        Returns:
+            dict | list[tuple[str, Cell | None]]: The starting payload, or the request types and request cells.
         """
         assert self.websocket is not None
-        request_body = await self.websocket.receive_json()
+        message = await self.websocket.receive_text()
+        started = time.perf_counter()
+        try:
+            return self.parse_message(message=message, first=first)
+        finally:
+            metrics.observe("minesweeper_receive_seconds", time.perf_counter() - started)
+            metrics.observe("minesweeper_received_bytes", len(message))
+
+    def parse_message(self, message: str, first: bool = False) -> dict | list[tuple[str, Cell | None]]:
+        """Parse a received message. See `receive_click`.
+
+        Args:
+            message (str): The message, in JSON.
+            first (bool, optional): Whether it's the starting payload, returned as is. Defaults to False.
+
+        Returns:
+            dict | list[tuple[str, Cell | None]]: The starting payload, or the request types and request cells.
+        """
+        request_body = json.loads(message)
         if first:
             return request_body
-        return request_body["type"], Cell.from_sequence(request_body["cell"])
+        elif request_body["type"] == "batch":
+            return [self.parse_action(action) for action in request_body["actions"]]
+        elif request_body["type"] == "viewport":
+            self.viewport = self.parse_viewport(request_body["viewport"])
+            return []
+        return [self.parse_action(request_body)]
+
+    @staticmethod
+    def parse_action(action: dict) -> tuple[str, Cell | None]:
+        """Parse a single action of a payload.
+
+        Args:
+            action (dict): The action, with a type and a cell, if the action has one.
+
+        Returns:
+            tuple[str, Cell | None]: The request type and the request cell.
+        """
+        return action["type"], Cell.from_sequence(action["cell"]) if "cell" in action else None
+
+    @staticmethod
+    def parse_viewport(viewport: list[int]) -> tuple[int, int, int, int]:
+        """Parse the visible part of the board reported by frontend.
+
+        Args:
+            viewport (list[int]): The top row, the left column, the bottom row and the right column, all inclusive.
+
+        Raises:
+            ValueError: If the viewport is in bad format.
+
+        Returns:
+            tuple[int, int, int, int]: The same bounds.
+        """
+        if len(viewport) != 4 or not all(isinstance(bound, int) for bound in viewport):
+            raise ValueError("Incorrect viewport.")
+        top, left, bottom, right = viewport
+        return top, left, bottom, right
+
+    async def split_frames(self, result: GameResponse) -> list[dict[str, list[int]]]:
+        """Splits the cells of a result into frames of at most `STREAM_FRAME_SIZE` cells each, in the order
+        of `order_frames`. A large result is ordered inline or in the executor, depending on its size.
+
+        Args:
+            result (GameResponse): The result to split.
+
+        Returns:
+            list[dict[str, list[int]]]: The flat indices of the cells of every frame, grouped by category.
+        """
+        assert self.field_service is not None
+        groups = {key: list(indices) for key, indices in (result.indices or {}).items()}
+        if result.cells:
+            for key, cells in result.cells.items:
+                groups.setdefault(key, []).extend(self.field_service.calculate_flat_index(cell) for cell in cells)
+
+        n_cells = sum(len(indices) for indices in groups.values())
+        frame_size = settings.STREAM_FRAME_SIZE
+        if n_cells <= frame_size:
+            return [groups]
+
+        height, width = self.field_service.height, self.field_service.width
+        focus = self.focus or Cell(row=height // 2, column=width // 2)
+        operation = partial(
+            order_frames,
+            groups=groups,
+            height=height,
+            width=width,
+            focus=(min(max(focus.row, 0), height - 1), min(max(focus.column, 0), width - 1)),
+            viewport=self.viewport,
+            frame_size=frame_size,
+        )
+        return await execution_policy.run(cost=n_cells, operation=operation)
 
     async def send_result(self, result: GameResponse | None) -> None:
-        """Send the payload with results back to frontend.
+        """Send the payload with results back to frontend. If streaming was requested, a large result
+        is sent in frames, and other games get to run between them. The cells of every frame are only built
+        once it's its turn, and only the last frame carries the status and the other fields of the result,
+        so the game is over or won on frontend only once all the cells have been drawn.
 
         Args:
             result (GameResponse | None): The result to send.
         """
         if result and self.websocket:
-            logger.info(f"Sending the result: {result}")
-            await self.websocket.send_json(result.model_dump())
+            self.log.debug("Sending the result: {result}", result=partial(summarize, result))
+            self.finished = self.finished or result.status in ("game_over", "win")
+            if not self.stream or (result.cells is None and result.indices is None):
+                await self.send_frame(result)
+                return
+
+            assert self.field_service is not None
+            frames = await self.split_frames(result)
+            for number, groups in enumerate(frames):
+                if number:
+                    await asyncio.sleep(0)
+                cells = self.field_service.build_collection(groups)
+                if number < len(frames) - 1:
+                    await self.send_frame(GameResponse(status="okay", cells=cells))
+                else:
+                    await self.send_frame(result.model_copy(update={"cells": cells, "indices": None}))
+
+    async def send_frame(self, frame: GameResponse) -> None:
+        """Send a single message to frontend, in the protocol requested when the game started.
+        The time spent encoding and sending and the size of every message are recorded in the metrics.
+
+        Args:
+            frame (GameResponse): The result or a part of it to send.
+        """
+        assert self.websocket is not None
+        started = time.perf_counter()
+        message: bytes | str
+        if self.protocol == "binary" and self.field_service is not None:
+            message = encode_binary(frame, width=self.field_service.width)
+            await self.websocket.send_bytes(message)
+        else:
+            message = json.dumps(frame.model_dump(), separators=(",", ":"))
+            await self.websocket.send_text(message)
+        metrics.observe("minesweeper_send_seconds", time.perf_counter() - started, protocol=self.protocol)
+        metrics.observe("minesweeper_sent_bytes", len(message), protocol=self.protocol)
+        self.n_frames += 1
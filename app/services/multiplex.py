@@ -0,0 +1,201 @@
+import asyncio
+import json
+from typing import NamedTuple
+
+from loguru import logger
+from starlette.websockets import WebSocket
+
+from app.core import metrics, settings
+from app.services.game import GameService
+from app.services.protocol import write_varint
+
+MAX_KEY_LENGTH = 64
+
+Key = str | int
+
+
+class GameChannel:
+    def __init__(self, connection: "MultiplexService", key: Key) -> None:
+        """Initialises the part of a multiplexed connection that belongs to a single game. To its `GameService`,
+        it looks like a websocket of its own: it's fed the messages of the game, and tags the messages
+        it sends with the key of the game — a JSON message gets a `game` field, and a binary one is prefixed
+        with the varint length of the key in UTF-8 and the key itself. At most `MULTIPLEX_MAX_QUEUED` messages
+        of the game can wait for it to catch up.
+
+        Args:
+            connection (MultiplexService): The connection the game is played on.
+            key (Key): The key the client chose for the game.
+        """
+        self.connection = connection
+        self.incoming: asyncio.Queue[str] = asyncio.Queue(maxsize=settings.MULTIPLEX_MAX_QUEUED)
+        self.text_prefix = '{"game":' + json.dumps(key) + ","
+
+        encoded = str(key).encode()
+        prefix = bytearray()
+        write_varint(prefix, len(encoded))
+        self.bytes_prefix = bytes(prefix) + encoded
+
+    async def receive_text(self) -> str:
+        return await self.incoming.get()
+
+    async def send_text(self, data: str) -> None:
+        await self.connection.send_text(self.text_prefix + data[1:])
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.connection.send_bytes(self.bytes_prefix + data)
+
+
+class Game(NamedTuple):
+    """A game being played on a multiplexed connection."""
+
+    game_service: GameService
+    channel: GameChannel
+    task: asyncio.Task
+
+
+class MultiplexService:
+    def __init__(self) -> None:
+        """Initialises a connection that can play many games at once, or one after another, without reconnecting.
+
+        Every message carries a `game` key chosen by the client, a string or an integer. A `start` or `resume`
+        message opens a game under its key, once the previous game with the same key, if there was one, is over,
+        and a `close` message ends it, keeping it in the session store if it's unfinished. Every other message
+        goes to the game with its key, and is answered with an error if too many are waiting for that game.
+        The binary messages carry the key as a string, so an integer key can't be open along with the same
+        key as a string. Every game is played by a `GameService` of its own in a task of its own,
+        as if it had a connection to itself, and at most `MULTIPLEX_MAX_GAMES` are open at the same time.
+        """
+        self.websocket: WebSocket | None = None
+        self.games: dict[Key, Game] = {}
+        self.max_games = settings.MULTIPLEX_MAX_GAMES
+        self.send_lock = asyncio.Lock()
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """Route the messages of a connection to its games until it's closed. The unfinished games
+        are then kept in the session store, so that they can be resumed.
+
+        Args:
+            websocket (WebSocket): The WebSocket to listen on and send data through.
+        """
+        self.websocket = websocket
+        try:
+            while True:
+                await self.route(await websocket.receive_text())
+        finally:
+            for key in list(self.games):
+                await self.close_game(key)
+
+    async def route(self, message: str) -> None:
+        """Route a single message to its game, or open or close a game. A message that can't be routed
+        is answered with an error, and the other games go on.
+
+        Args:
+            message (str): The message, in JSON.
+        """
+        try:
+            request_body = json.loads(message)
+            key = request_body["game"]
+            message_type = request_body["type"]
+        except (ValueError, TypeError, KeyError):
+            await self.send_error(key=None, error="Incorrect payload: every message needs a type and a game.")
+            return
+
+        if not isinstance(key, (str, int)) or isinstance(key, bool) or len(str(key)) > MAX_KEY_LENGTH:
+            await self.send_error(key=None, error="The game must be a short string or an integer.")
+        elif message_type in ("start", "resume"):
+            await self.open_game(key=key, message=message)
+        elif key not in self.games:
+            await self.send_error(key=key, error="The game doesn't exist.")
+        elif message_type == "close":
+            await self.close_game(key)
+        else:
+            try:
+                self.games[key].channel.incoming.put_nowait(message)
+            except asyncio.QueueFull:
+                await self.send_error(key=key, error="Too many messages are waiting for the game.")
+
+    async def open_game(self, key: Key, message: str) -> None:
+        """Start or resume a game under its key, replacing a game with the same key that is over.
+
+        Args:
+            key (Key): The key of the game.
+            message (str): The starting payload.
+        """
+        game = self.games.get(key)
+        if game is not None:
+            if not game.game_service.finished:
+                await self.send_error(key=key, error="The game is still being played.")
+                return
+            await self.close_game(key)
+
+        if any(str(other) == str(key) for other in self.games if other != key):
+            await self.send_error(key=key, error="Another game has the same key as a string and as an integer.")
+            return
+
+        if len(self.games) >= self.max_games:
+            await self.send_error(key=key, error=f"No more than {self.max_games} games can be played at once.")
+            return
+
+        game_service, channel = GameService(), GameChannel(connection=self, key=key)
+        channel.incoming.put_nowait(message)
+        task = asyncio.create_task(self.play(key=key, game_service=game_service, channel=channel))
+        self.games[key] = Game(game_service=game_service, channel=channel, task=task)
+
+    async def play(self, key: Key, game_service: GameService, channel: GameChannel) -> None:
+        """Play a game until it's closed or fails. A failed game is answered with an error and dropped,
+        whatever went wrong, so that it doesn't take the other games of the connection down with it.
+
+        Args:
+            key (Key): The key of the game.
+            game_service (GameService): The game.
+            channel (GameChannel): The channel of the game.
+        """
+        metrics.add("minesweeper_active_games", 1)
+        try:
+            await game_service.start_game(websocket=channel)
+        except ValueError as ve:
+            logger.warning(f"ValueError in game {key}: {ve}")
+            self.games.pop(key, None)
+            await self.send_error(key=key, error=str(ve))
+        except Exception:
+            logger.exception(f"Game {key} failed")
+            self.games.pop(key, None)
+            await self.send_error(key=key, error="The game failed.")
+        finally:
+            metrics.add("minesweeper_active_games", -1)
+            game_service.save_record()
+
+    async def close_game(self, key: Key) -> None:
+        """End a game, keeping it in the session store if it's unfinished. The game is stopped between
+        two actions, so that its field is never stored halfway through one.
+
+        Args:
+            key (Key): The key of the game.
+        """
+        game = self.games.pop(key)
+        async with game.game_service.lock:
+            game.task.cancel()
+        await asyncio.gather(game.task, return_exceptions=True)
+        game.game_service.suspend_game()
+
+    async def send_error(self, key: Key | None, error: str) -> None:
+        """Send an error about a game, or about a message that doesn't belong to any.
+
+        Args:
+            key (Key | None): The key of the game, if there is one.
+            error (str): The error.
+        """
+        payload = {"error": error, "status_code": 400}
+        if key is not None:
+            payload = {"game": key, **payload}
+        await self.send_text(json.dumps(payload, separators=(",", ":")))
+
+    async def send_text(self, data: str) -> None:
+        assert self.websocket is not None
+        async with self.send_lock:
+            await self.websocket.send_text(data)
+
+    async def send_bytes(self, data: bytes) -> None:
+        assert self.websocket is not None
+        async with self.send_lock:
+            await self.websocket.send_bytes(data)
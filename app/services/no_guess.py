@@ -0,0 +1,438 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from functools import partial
+from typing import Iterable
+
+from loguru import logger
+
+from app.core import GAME_MODES, settings
+from app.schemas import Cell
+from app.services.field import MINE, OPENED, Board, FieldService, get_neighbour_table
+from app.services.pool import Mode
+from app.services.solver import Solver
+
+MAX_REPAIRS = 8
+CACHE_TIME_BUDGET = 30.0
+N_SAMPLES = 1000
+
+
+def play_without_guessing(field_service: FieldService, start: Cell) -> list[int] | None:
+    """Plays a fresh field from the first click, only ever opening the cells the solver proves to be safe.
+
+    Args:
+        field_service (FieldService): The field to play. Its state is changed by playing.
+        start (Cell): The cell clicked first.
+
+    Returns:
+        list[int] | None: None if the field was cleared, otherwise the closed cells of the frontier
+            the solver got stuck on.
+    """
+    field_service.check_cell(cell=start)
+    solver = Solver(field_service=field_service)
+    while not field_service.check_win():
+        solver.solve()
+        if not solver.safe:
+            return sorted(set().union(*solver.build_constraints()))
+        for index in list(solver.safe):
+            field_service.check_index(index=index)
+    return None
+
+
+def repair_field(field_service: FieldService, stuck: list[int], rng: random.Random) -> bool:
+    """Moves the mines of the cells the solver got stuck on to random cells away from the opened area,
+    which the solver hasn't seen yet.
+
+    Args:
+        field_service (FieldService): The played field. Its cell values and mines are changed.
+        stuck (list[int]): The closed cells of the frontier the solver got stuck on.
+        rng (random.Random): The random generator to pick the new mine positions with.
+
+    Returns:
+        bool: Whether the field could be repaired.
+    """
+    field, state = field_service.field, field_service.state
+    seen = set()
+    for index, cell_state in enumerate(state):
+        if cell_state & OPENED:
+            seen.add(index)
+            seen.update(field_service.get_cell_neighbours(index=index))
+
+    moved = [index for index in stuck if field[index] == MINE]
+    targets = [index for index in range(len(field)) if index not in seen and field[index] != MINE]
+    if not moved or len(targets) < len(moved):
+        return False
+
+    targets = rng.sample(targets, k=len(moved))
+    for mine, target in zip(moved, targets):
+        field_service.remove_mine(index=mine)
+        field_service.add_mine(index=target)
+
+    moved_mines = set(moved)
+    field_service.mines = [mine for mine in field_service.mines if mine not in moved_mines] + targets
+    return True
+
+
+def generate_no_guess_board(
+    height: int, width: int, n_mines: int, start: Cell, seed: int, time_budget: float
+) -> tuple[Board | None, int]:
+    """Generates a board that can be cleared from the first click without guessing. Every board is played
+    by the solver, and when it gets stuck, the mines it got stuck on are moved away and the board is played
+    again, up to `MAX_REPAIRS` times before starting over with a new board. Runs in a worker process.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        start (Cell): The cell clicked first.
+        seed (int): The seed of the generation.
+        time_budget (float): How long to try for, in seconds.
+
+    Returns:
+        tuple[Board | None, int]: The board with the starting cells already clear, or None if the time ran out,
+            and the number of times a board was played.
+    """
+    deadline = time.monotonic() + time_budget
+    rng = random.Random(seed)
+    attempts = 0
+    while time.monotonic() < deadline:
+        board = FieldService.generate_board(height=height, width=width, n_mines=n_mines, seed=rng.getrandbits(32))
+        for _ in range(MAX_REPAIRS + 1):
+            field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, board=board)
+            attempts += 1
+            stuck = play_without_guessing(field_service=field_service, start=start)
+            if stuck is None:
+                return board._replace(mines=field_service.mines), attempts
+            if time.monotonic() >= deadline or not repair_field(field_service=field_service, stuck=stuck, rng=rng):
+                break
+            board = board._replace(mines=field_service.mines)
+    return None, attempts
+
+
+def find_opening(field: bytearray, height: int, width: int, start_index: int) -> frozenset[int]:
+    """Finds the empty cells connected to an empty starting cell. Clicking any of them opens the same area.
+
+    Args:
+        field (bytearray): The cell values of the field.
+        height (int): Height of the field.
+        width (int): Width of the field.
+        start_index (int): The flat index of the empty starting cell.
+
+    Returns:
+        frozenset[int]: The flat indices of the empty cells.
+    """
+    neighbour_offsets, edge_classes = get_neighbour_table(height=height, width=width)
+    opening = {start_index}
+    stack = [start_index]
+    while stack:
+        index = stack.pop()
+        for offset in neighbour_offsets[edge_classes[index]]:
+            neighbour = index + offset
+            if not field[neighbour] and neighbour not in opening:
+                opening.add(neighbour)
+                stack.append(neighbour)
+    return frozenset(opening)
+
+
+def find_starts(board: Board, height: int, width: int, n_mines: int) -> frozenset[int]:
+    """Finds all the cells a board can be started from and cleared without guessing. Only the empty cells
+    keep the first click and its neighbours clear, and all the empty cells of an opening open the same area,
+    so the board is only played once per opening.
+
+    Args:
+        board (Board): The board.
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+
+    Returns:
+        frozenset[int]: The flat indices of the cells.
+    """
+    starts: set[int] = set()
+    checked: set[int] = set()
+    for index, cell_value in enumerate(board.field):
+        if cell_value or index in checked:
+            continue
+
+        opening = find_opening(board.field, height, width, start_index=index)
+        checked |= opening
+        start = Cell(row=index // width, column=index % width)
+        field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, board=board)
+        if play_without_guessing(field_service=field_service, start=start) is None:
+            starts |= opening
+    return frozenset(starts)
+
+
+def generate_cached_board(
+    height: int, width: int, n_mines: int, seed: int, time_budget: float
+) -> tuple[Board, frozenset[int], int] | None:
+    """Generates a no-guess board for a random first click, to be kept as a fallback. Runs in a worker process.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        seed (int): The seed of the generation, which also picks the first click.
+        time_budget (float): How long to try for, in seconds.
+
+    Returns:
+        tuple[Board, frozenset[int], int] | None: The board, the cells it can be started from without guessing
+            and the number of times a board was played, or None if the time ran out.
+    """
+    rng = random.Random(seed)
+    start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+    board, attempts = generate_no_guess_board(height, width, n_mines, start=start, seed=seed, time_budget=time_budget)
+    if board is None:
+        return None
+    return board, find_starts(board, height, width, n_mines), attempts
+
+
+def flip_board(board: Board, height: int, width: int, flip_rows: bool, flip_columns: bool) -> Board:
+    """Mirrors a board upside down and/or left to right, which keeps the cell values valid.
+
+    Args:
+        board (Board): The board to mirror.
+        height (int): Height of the field.
+        width (int): Width of the field.
+        flip_rows (bool): Whether to turn the board upside down.
+        flip_columns (bool): Whether to mirror the board left to right.
+
+    Returns:
+        Board: The mirrored board.
+    """
+    row_change = (height - 1) * width if flip_rows else 0
+    column_change = width - 1 if flip_columns else 0
+    field = bytearray(len(board.field))
+    for row_start in range(0, len(board.field), width):
+        row = board.field[row_start : row_start + width]  # noqa: E203
+        field[abs(row_change - row_start) : abs(row_change - row_start) + width] = (  # noqa: E203
+            row[::-1] if flip_columns else row
+        )
+    mines = [abs(row_change - mine // width * width) + abs(column_change - mine % width) for mine in board.mines]
+    return Board(seed=board.seed, field=field, mines=mines, rng=board.rng)
+
+
+def percentile(samples: Iterable[float], fraction: float) -> float | None:
+    """Picks a percentile of the samples by the nearest rank.
+
+    Args:
+        samples (Iterable[float]): The samples.
+        fraction (float): The percentile, as a fraction of one.
+
+    Returns:
+        float | None: The value at the percentile, or None if there are no samples.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class NoGuessGenerator:
+    def __init__(self, modes: Iterable[Mode], time_budget: float = 1.0, cache_size: int = 4) -> None:
+        """Initialises a generator of boards that can be cleared without guessing, with an empty cache
+        of such boards for the given game modes. Nothing is generated until it's started with an executor.
+
+        The boards are generated for the first click of every game, in a worker process. If that takes longer
+        than the time budget, the game gets a cached board instead — mirrored, if needed, so that the first click
+        lands on a cell the board can be started from. If no cached board fits, the game gets a regular board.
+
+        Args:
+            modes (Iterable[Mode]): The (height, width, number of mines) of every mode to cache boards for.
+            time_budget (float, optional): How long a game can wait for its board, in seconds. Defaults to 1.
+            cache_size (int, optional): How many boards to keep for every mode. Defaults to 4.
+        """
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        self.executor: Executor | None = None
+
+        self.cache: dict[Mode, deque[tuple[Board, frozenset[int]]]] = {mode: deque() for mode in modes}
+        self.caching: dict[Mode, int] = {mode: 0 for mode in self.cache}
+        self.lock = threading.Lock()
+
+        self.attempts: dict[str, deque[int]] = {}
+        self.times: dict[str, deque[float]] = {}
+        self.generated = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    def start(self, executor: Executor) -> None:
+        """Starts filling the cache up in the background.
+
+        Args:
+            executor (Executor): The process pool to generate the boards in.
+        """
+        self.executor = executor
+        for mode in self.cache:
+            self.refill(mode=mode)
+
+    def shutdown(self) -> None:
+        """Stops the executor, dropping the generations that haven't started yet."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def generate(
+        self, height: int, width: int, n_mines: int, start: Cell, seed: int | None = None
+    ) -> Board | None:
+        """Generates a no-guess board for the first click of a game in a worker process,
+        falling back to a cached board if it takes too long.
+
+        Args:
+            height (int): Height of the game field.
+            width (int): Width of the game field.
+            n_mines (int): Number of mines in the game.
+            start (Cell): The cell clicked first.
+            seed (int | None, optional): The seed of the generation. Defaults to None — a random one.
+
+        Returns:
+            Board | None: The board, or None if the generator isn't running or no board was ready in time.
+        """
+        if self.executor is None:
+            return None
+
+        mode = (height, width, n_mines)
+        seed = random.getrandbits(32) if seed is None else seed
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.executor, partial(generate_no_guess_board, *mode, start=start, seed=seed, time_budget=self.time_budget)
+        )
+        try:
+            board, attempts = await asyncio.wait_for(future, timeout=self.time_budget)
+        except asyncio.TimeoutError:
+            board, attempts = None, 0
+
+        if board is not None:
+            self.record(mode=mode, attempts=attempts, elapsed=time.perf_counter() - started)
+            self.generated += 1
+            return board
+
+        self.fallbacks += 1
+        board = self.take_cached(mode=mode, start=start)
+        if board is None:
+            self.misses += 1
+            logger.warning(f"No no-guess board for {mode} was ready in time, using a regular one")
+        return board
+
+    def take_cached(self, mode: Mode, start: Cell) -> Board | None:
+        """Takes a cached board out that can be started from the given cell, as is or mirrored,
+        and refills the cache.
+
+        Args:
+            mode (Mode): The (height, width, number of mines) of the mode.
+            start (Cell): The cell clicked first.
+
+        Returns:
+            Board | None: The board, or None if the mode isn't cached or none of the boards fit.
+        """
+        cached = self.cache.get(mode)
+        if cached is None:
+            return None
+
+        height, width, _ = mode
+        board = None
+        with self.lock:
+            for entry in cached:
+                cached_board, starts = entry
+                for flip_rows in (False, True):
+                    for flip_columns in (False, True):
+                        row = height - 1 - start.row if flip_rows else start.row
+                        column = width - 1 - start.column if flip_columns else start.column
+                        if board is None and row * width + column in starts:
+                            board = flip_board(cached_board, height, width, flip_rows, flip_columns)
+                if board is not None:
+                    cached.remove(entry)
+                    break
+
+        self.refill(mode=mode)
+        return board
+
+    def refill(self, mode: Mode) -> None:
+        """Schedules generation of the boards missing from the cache of a mode.
+
+        Args:
+            mode (Mode): The (height, width, number of mines) of the mode.
+        """
+        if self.executor is None:
+            return
+
+        with self.lock:
+            n_missing = self.cache_size - len(self.cache[mode]) - self.caching[mode]
+            self.caching[mode] += max(n_missing, 0)
+
+        for _ in range(n_missing):
+            future = self.executor.submit(
+                generate_cached_board, *mode, seed=random.getrandbits(32), time_budget=CACHE_TIME_BUDGET
+            )
+            future.add_done_callback(partial(self.store, mode))
+
+    def store(self, mode: Mode, future: Future) -> None:
+        """Puts a board generated in the background into the cache.
+
+        Args:
+            mode (Mode): The (height, width, number of mines) of the mode.
+            future (Future): The finished generation.
+        """
+        with self.lock:
+            self.caching[mode] -= 1
+
+        if future.cancelled():
+            return
+        elif future.exception() is not None:
+            logger.error(f"Failed to generate a no-guess board for {mode}: {future.exception()}")
+            return
+
+        result = future.result()
+        if result is None:
+            self.refill(mode=mode)
+            return
+
+        board, starts, _ = result
+        with self.lock:
+            self.cache[mode].append((board, starts))
+
+    def record(self, mode: Mode, attempts: int, elapsed: float) -> None:
+        """Keeps the latest samples of the generation attempts and times, separately for every cached mode
+        and together for all the custom ones.
+
+        Args:
+            mode (Mode): The (height, width, number of mines) of the mode.
+            attempts (int): How many times a board was played before one could be cleared.
+            elapsed (float): How long the game waited for the board, in seconds.
+        """
+        key = "×".join(map(str, mode)) if mode in self.cache else "custom"
+        self.attempts.setdefault(key, deque(maxlen=N_SAMPLES)).append(attempts)
+        self.times.setdefault(key, deque(maxlen=N_SAMPLES)).append(elapsed)
+
+    @property
+    def metrics(self) -> dict:
+        """The generation counters, the attempts per board and the p50/p99 generation times for every mode,
+        along with the number of cached boards."""
+        modes = {}
+        for key, attempts in self.attempts.items():
+            times = self.times[key]
+            modes[key] = {
+                "boards": len(attempts),
+                "attempts_p50": percentile(attempts, 0.5),
+                "attempts_p99": percentile(attempts, 0.99),
+                "time_p50": percentile(times, 0.5),
+                "time_p99": percentile(times, 0.99),
+            }
+        return {
+            "generated": self.generated,
+            "fallbacks": self.fallbacks,
+            "misses": self.misses,
+            "cached": {"×".join(map(str, mode)): len(boards) for mode, boards in self.cache.items()},
+            "modes": modes,
+        }
+
+
+no_guess_generator = NoGuessGenerator(
+    modes=GAME_MODES.values(),
+    time_budget=settings.NO_GUESS_TIME_BUDGET,
+    cache_size=settings.NO_GUESS_CACHE_SIZE,
+)
@@ -0,0 +1,199 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from app.core import metrics, settings
+from app.schemas import Cell
+from app.services.field import FLAGGED, MINE, OPENED, FieldService
+
+T = TypeVar("T")
+
+
+def run_remotely(operation: Callable[[], T]) -> tuple[T, dict]:
+    """Runs an operation in a worker of a process pool, sending the metrics it recorded back along with the result.
+
+    Args:
+        operation (Callable[[], T]): The operation.
+
+    Returns:
+        tuple[T, dict]: The result of the operation and the exported metrics.
+    """
+    metrics.clear()
+    return operation(), metrics.export()
+
+
+def apply_remotely(field_service: FieldService, method: str, kwargs: dict) -> tuple[FieldService, Any, dict]:
+    """Applies a method to a field. Runs in a worker of a process pool, so the field is a copy,
+    and it's sent back along with the result to replace the original.
+
+    Args:
+        field_service (FieldService): The copy of the field.
+        method (str): The name of the method to call.
+        kwargs (dict): The arguments of the method.
+
+    Returns:
+        tuple[FieldService, Any, dict]: The changed field, the result of the method and the exported metrics.
+    """
+    metrics.clear()
+    return field_service, getattr(field_service, method)(**kwargs), metrics.export()
+
+
+class ExecutionPolicy:
+    def __init__(self, min_cost: int = 50_000) -> None:
+        """Initialises a policy deciding where the game operations run. Cheap operations run inline,
+        on the event loop, and the ones that can touch at least `min_cost` cells run in the executor,
+        so that a huge board doesn't hold up every other game served by the same worker.
+        Until the policy is started with an executor, everything runs inline.
+
+        The operations of a single game are never run concurrently: the game holds its lock
+        while applying them, so they are applied in the order they came in.
+
+        Args:
+            min_cost (int, optional): The estimated number of cells at which an operation is offloaded.
+                Defaults to 50 000.
+        """
+        self.min_cost = min_cost
+        self.executor: Executor | None = None
+        self.remote = False
+
+        self.inline = 0
+        self.offloaded = 0
+
+    def start(self, executor: Executor) -> None:
+        """Starts offloading the costly operations.
+
+        Args:
+            executor (Executor): The thread or process pool to run them in. A process pool doesn't compete with
+                the event loop for the GIL, but the field has to be copied to the worker and back every time.
+        """
+        self.executor = executor
+        self.remote = isinstance(executor, ProcessPoolExecutor)
+
+    def shutdown(self) -> None:
+        """Stops the executor and goes back to running everything inline."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run(self, cost: int, operation: Callable[[], T]) -> T:
+        """Runs an operation that doesn't change any field inline or in the executor, depending on its cost.
+
+        Args:
+            cost (int): The estimated number of cells the operation touches.
+            operation (Callable[[], T]): The operation. Has to be picklable for a process pool.
+
+        Returns:
+            T: The result of the operation.
+        """
+        if self.executor is None or cost < self.min_cost:
+            self.inline += 1
+            return operation()
+
+        self.offloaded += 1
+        loop = asyncio.get_running_loop()
+        if self.remote:
+            remote: Callable[[], tuple[T, dict]] = partial(run_remotely, operation)
+            result: tuple[T, dict] = await loop.run_in_executor(self.executor, remote)
+            metrics.merge(result[1])
+            return result[0]
+        return await loop.run_in_executor(self.executor, operation)
+
+    async def apply(
+        self, cost: int, field_service: FieldService, method: str, **kwargs: Any
+    ) -> tuple[FieldService, Any]:
+        """Applies a method to a field inline or in the executor, depending on its cost.
+
+        Args:
+            cost (int): The estimated number of cells the method touches.
+            field_service (FieldService): The field.
+            method (str): The name of the method to call.
+            **kwargs (Any): The arguments of the method.
+
+        Returns:
+            tuple[FieldService, Any]: The field and the result of the method. The field is a new object
+                if it was changed in a worker process, and it replaces the original one.
+        """
+        if self.executor is None or cost < self.min_cost:
+            self.inline += 1
+            return field_service, getattr(field_service, method)(**kwargs)
+
+        self.offloaded += 1
+        loop = asyncio.get_running_loop()
+        if self.remote:
+            field_service, result, exported = await loop.run_in_executor(
+                self.executor, apply_remotely, field_service, method, kwargs
+            )
+            metrics.merge(exported)
+            return field_service, result
+        return field_service, await loop.run_in_executor(
+            self.executor, partial(getattr(field_service, method), **kwargs)
+        )
+
+    @staticmethod
+    def estimate_field_cost(height: int, width: int, pooled: bool) -> int:
+        """Estimates the cost of creating a field: a new board goes over all of its cells,
+        while a pooled one only moves the mines around the first click.
+
+        Args:
+            height (int): Height of the game field.
+            width (int): Width of the game field.
+            pooled (bool): Whether the board is already generated.
+
+        Returns:
+            int: The estimated number of cells touched.
+        """
+        return 1 if pooled else height * width
+
+    def estimate_probability_cost(self) -> int:
+        """Estimates the cost of calculating the mine probabilities. It depends on the frontier of the field,
+        which isn't known until the calculation builds it, and it can take up to `PROBABILITY_MAX_TIME`
+        even on a small board, so it's always worth offloading.
+
+        Returns:
+            int: The cost at which operations are offloaded.
+        """
+        return self.min_cost
+
+    @staticmethod
+    def estimate_action_cost(field_service: FieldService, request_type: str, request_cell: Cell | None) -> int:
+        """Estimates how many cells an action can reveal. A closed empty cell can flood the whole field
+        that is left, a mine ends the game and shows all the mines, and any other cell is just itself.
+        A chord costs as much as all of its closed neighbours.
+
+        Args:
+            field_service (FieldService): The field of the game.
+            request_type (str): The type of the action.
+            request_cell (Cell | None): The cell the action was made on.
+
+        Returns:
+            int: The estimated number of cells touched.
+        """
+        if request_cell is None or request_type not in ("click", "check_neighbours"):
+            return 1
+
+        index = field_service.calculate_flat_index(request_cell)
+        if not 0 <= index < field_service.height * field_service.width:
+            return 1
+
+        indices = [index] if request_type == "click" else field_service.get_cell_neighbours(index=index)
+        cost = 0
+        for checked in indices:
+            if field_service.state[checked] & (OPENED | FLAGGED):
+                continue
+            cell_value = field_service.field[checked]
+            if cell_value == MINE:
+                cost += len(field_service.mines)
+            elif cell_value == 0:
+                cost += field_service.safe_cells_left
+            else:
+                cost += 1
+        return cost
+
+    @property
+    def metrics(self) -> dict:
+        """The number of operations run inline and offloaded so far."""
+        return {"inline": self.inline, "offloaded": self.offloaded, "min_cost": self.min_cost}
+
+
+execution_policy = ExecutionPolicy(min_cost=settings.OFFLOAD_MIN_COST)
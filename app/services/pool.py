@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from functools import partial
+from typing import Iterable
+
+from loguru import logger
+
+from app.core import GAME_MODES, get_mode_label, metrics, settings
+from app.services.field import Board, FieldService
+
+Mode = tuple[int, int, int]
+
+
+def generate_boards(height: int, width: int, n_mines: int, seeds: list[int]) -> tuple[list[Board], list[float]]:
+    """Generates a batch of boards for a single game mode. Runs in a worker of the pool's executor,
+    so the generation times are sent back to be recorded in the main process.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        seeds (list[int]): The seeds to generate the boards with, one per board.
+
+    Returns:
+        tuple[list[Board], list[float]]: The generated boards and how long each of them took, in seconds.
+    """
+    boards, durations = [], []
+    for seed in seeds:
+        started = time.perf_counter()
+        boards.append(FieldService.generate_board(height=height, width=width, n_mines=n_mines, seed=seed))
+        durations.append(time.perf_counter() - started)
+    return boards, durations
+
+
+class BoardPool:
+    def __init__(self, modes: Iterable[Mode], size: int = 16, low_watermark: int = 4) -> None:
+        """Initialises an empty pool of pre-generated boards for the given game modes.
+        The pool doesn't generate anything until it's started with an executor.
+
+        Args:
+            modes (Iterable[Mode]): The (height, width, number of mines) of every mode to keep boards for.
+            size (int, optional): How many boards to keep for every mode. Defaults to 16.
+            low_watermark (int, optional): The number of remaining boards of a mode
+                at which the pool starts refilling it. Defaults to 4.
+        """
+        self.size = size
+        self.low_watermark = low_watermark
+        self.executor: Executor | None = None
+
+        self.boards: dict[Mode, deque[Board]] = {mode: deque() for mode in modes}
+        self.refilling: set[Mode] = set()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+
+    def start(self, executor: Executor) -> None:
+        """Starts filling the pool up in the background.
+
+        Args:
+            executor (Executor): The thread or process pool to generate the boards in.
+        """
+        self.executor = executor
+        for mode in self.boards:
+            self.refill(mode=mode)
+
+    def shutdown(self) -> None:
+        """Stops the executor, dropping the refills that haven't started yet."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def acquire(self, height: int, width: int, n_mines: int) -> Board | None:
+        """Takes a pre-generated board out of the pool, refilling it if it's running low.
+
+        Args:
+            height (int): Height of the game field.
+            width (int): Width of the game field.
+            n_mines (int): Number of mines in the game.
+
+        Returns:
+            Board | None: The board, or None if the mode isn't pooled or there are no boards left.
+        """
+        mode = (height, width, n_mines)
+        boards = self.boards.get(mode)
+        if boards is None:
+            return None
+
+        try:
+            board: Board | None = boards.popleft()
+            self.hits += 1
+        except IndexError:
+            board = None
+            self.misses += 1
+
+        if len(boards) <= self.low_watermark:
+            self.refill(mode=mode)
+        return board
+
+    def refill(self, mode: Mode) -> None:
+        """Schedules generation of the boards missing for a mode, unless it's being refilled already.
+
+        Args:
+            mode (Mode): The (height, width, number of mines) of the mode.
+        """
+        if self.executor is None:
+            return
+
+        with self.lock:
+            if mode in self.refilling:
+                return
+            self.refilling.add(mode)
+
+        seeds = [random.getrandbits(32) for _ in range(self.size - len(self.boards[mode]))]
+        future = self.executor.submit(generate_boards, *mode, seeds=seeds)
+        future.add_done_callback(partial(self.store, mode))
+
+    def store(self, mode: Mode, future: Future) -> None:
+        """Puts the boards generated in the background into the pool.
+
+        Args:
+            mode (Mode): The (height, width, number of mines) of the mode.
+            future (Future): The finished generation.
+        """
+        with self.lock:
+            self.refilling.discard(mode)
+
+        if future.cancelled():
+            return
+        elif future.exception() is not None:
+            logger.error(f"Failed to generate boards for {mode}: {future.exception()}")
+            return
+
+        boards, durations = future.result()
+        for duration in durations:
+            metrics.observe("minesweeper_board_generation_seconds", duration, mode=get_mode_label(*mode))
+        self.boards[mode].extend(boards)
+        self.generated += len(boards)
+
+    @property
+    def metrics(self) -> dict:
+        """The pool hit and miss counters, along with the number of boards available for every mode."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "generated": self.generated,
+            "available": {"×".join(map(str, mode)): len(boards) for mode, boards in self.boards.items()},
+        }
+
+
+board_pool = BoardPool(
+    modes=GAME_MODES.values(),
+    size=settings.BOARD_POOL_SIZE,
+    low_watermark=settings.BOARD_POOL_LOW_WATERMARK,
+)
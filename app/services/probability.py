@@ -0,0 +1,737 @@
+import math
+import random
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+from app.services.field import FLAGGED, OPENED, FieldService
+
+MAX_EXACT_CELLS = 24
+MAX_ENUMERATION_STEPS = 200_000
+N_SAMPLES = 20_000
+SAMPLE_BATCH_SIZE = 2_000
+TIME_BUDGET = 0.05
+MAX_TIME = 0.5
+DEADLINE_CHECK_STEPS = 4096
+
+Constraint = tuple[frozenset[int], int]
+Key = frozenset[Constraint]
+
+
+class ComponentWeights(NamedTuple):
+    """The mine arrangements of a frontier component, split by their number of mines: how many arrangements
+    have `k` mines, and in how many of those each cell is a mine, both scaled so that the largest count is 1.
+    The counts of a sampled component are estimates."""
+
+    cells: list[int]
+    weights: list[float]
+    cell_weights: list[list[float]]
+    exact: bool
+
+
+def convolve(first: list[float], second: list[float]) -> list[float]:
+    """Convolves two sequences of weights by their number of mines, scaling the result so that its largest weight
+    is 1. Only the ratios between the weights matter.
+
+    Args:
+        first (list[float]): The first weights.
+        second (list[float]): The second weights.
+
+    Returns:
+        list[float]: The weights of the mines of both together.
+    """
+    result = [0.0] * (len(first) + len(second) - 1)
+    for first_mines, first_weight in enumerate(first):
+        if first_weight:
+            for second_mines, second_weight in enumerate(second):
+                result[first_mines + second_mines] += first_weight * second_weight
+    largest = max(result)
+    return [weight / largest for weight in result] if largest else result
+
+
+def correlate(sequence: list[float], weights: list[float], length: int) -> list[float]:
+    """Slides weights along a sequence, scaling the result so that its largest value is 1: the value at `t`
+    is the sum of `weights[c] * sequence[t + c]`, with the sequence taken as 0 past its end.
+
+    Args:
+        sequence (list[float]): The sequence.
+        weights (list[float]): The weights.
+        length (int): How many values to calculate.
+
+    Returns:
+        list[float]: The values.
+    """
+    result = [0.0] * length
+    for shift, weight in enumerate(weights):
+        if weight:
+            for position, value in enumerate(sequence[shift : shift + length]):  # noqa: E203
+                result[position] += weight * value
+    largest = max(result, default=0.0)
+    return [value / largest for value in result] if largest else result
+
+
+def scale(weights: list[float], cell_weights: list[list[float]], exact: bool, cells: list[int]) -> ComponentWeights:
+    """Scales the counts of a component so that its largest weight is 1.
+
+    Args:
+        weights (list[float]): The number of arrangements by their number of mines.
+        cell_weights (list[list[float]]): The number of arrangements in which each cell is a mine,
+            by the number of mines.
+        exact (bool): Whether the counts are exact.
+        cells (list[int]): The cells of the component.
+
+    Returns:
+        ComponentWeights: The scaled counts.
+    """
+    largest = max(weights) or 1.0
+    return ComponentWeights(
+        cells=cells,
+        weights=[weight / largest for weight in weights],
+        cell_weights=[[weight / largest for weight in row] for row in cell_weights],
+        exact=exact,
+    )
+
+
+class ProbabilityEngine:
+    def __init__(
+        self,
+        field_service: FieldService,
+        trust_flags: bool = False,
+        max_exact_cells: int = MAX_EXACT_CELLS,
+        max_steps: int = MAX_ENUMERATION_STEPS,
+        n_samples: int = N_SAMPLES,
+        time_budget: float = TIME_BUDGET,
+        max_time: float = MAX_TIME,
+        seed: int | None = None,
+    ) -> None:
+        """Initialises an engine that calculates the chance of every closed cell to be a mine, judging only by
+        what the player sees of a field: the values of the opened cells, the number of mines left and,
+        optionally, the flags.
+
+        The closed cells next to the opened numbers form the frontier, which splits into components that don't
+        share any constraints. The arrangements of every component are counted by their number of mines, exactly
+        by backtracking if the component is small enough, or estimated by sampling otherwise,
+        and the components are then weighed against each other and against the closed cells away from
+        the frontier by how many ways the rest of the mines can be placed. The counts of every component are kept
+        until the component changes, so a move only recounts the components it touched.
+
+        A whole calculation is limited in time as well: the components that aren't counted by then are estimated
+        from the share of mines their numbers still need, and if weighing them against each other runs out
+        of time too, every component is only weighed by its own counts.
+
+        Args:
+            field_service (FieldService): The field to follow.
+            trust_flags (bool, optional): Whether to treat the flagged cells as mines. Defaults to False.
+            max_exact_cells (int, optional): The largest component to count exactly, in closed cells.
+                Defaults to 24.
+            max_steps (int, optional): How many cells the exact count of a single component can try
+                before sampling it instead. Defaults to 200000.
+            n_samples (int, optional): How many arrangements to sample for a single component at most.
+                Defaults to 20000.
+            time_budget (float, optional): How long to keep sampling a single component for at most, in seconds.
+                At least one batch of samples is always taken. Defaults to 0.05.
+            max_time (float, optional): How long a whole calculation can take before it falls back to estimates,
+                in seconds. Defaults to 0.5.
+            seed (int | None, optional): The seed of the sampling. Defaults to None — a random one.
+        """
+        self.field_service = field_service
+        self.trust_flags = trust_flags
+        self.max_exact_cells = max_exact_cells
+        self.max_steps = max_steps
+        self.n_samples = n_samples
+        self.time_budget = time_budget
+        self.max_time = max_time
+        self.deadline = math.inf
+        self.rng = np.random.default_rng(seed) if np is not None else None
+        self.python_rng = random.Random(seed)
+
+        self.components: dict[Key, ComponentWeights] = {}
+        self.hits = 0
+        self.misses = 0
+        self.estimated = 0
+
+    def build_constraints(self) -> tuple[dict[frozenset[int], int], int, int]:
+        """Builds a constraint for every opened number with closed neighbours: how many mines are among
+        its closed neighbours that aren't counted as mines already. Constraints that can't be met,
+        which only happens with wrong flags, are dropped.
+
+        Returns:
+            tuple[dict[frozenset[int], int], int, int]: The number of mines for every distinct set of cells,
+                the number of closed cells that aren't counted as mines and the number of mines among them.
+        """
+        field_service = self.field_service
+        field, state = field_service.field, field_service.state
+        neighbour_offsets, edge_classes = field_service.neighbour_offsets, field_service.edge_classes
+
+        n_closed = n_flagged = 0
+        constraints: dict[frozenset[int], int] = {}
+        for index, cell_state in enumerate(state):
+            if not cell_state & OPENED:
+                n_closed += 1
+                n_flagged += bool(cell_state & FLAGGED)
+                continue
+
+            n_mines = field[index]
+            if not n_mines:
+                continue
+            unknown = []
+            for offset in neighbour_offsets[edge_classes[index]]:
+                neighbour = index + offset
+                neighbour_state = state[neighbour]
+                if neighbour_state & OPENED:
+                    continue
+                elif self.trust_flags and neighbour_state & FLAGGED:
+                    n_mines -= 1
+                else:
+                    unknown.append(neighbour)
+            if unknown and 0 <= n_mines <= len(unknown):
+                constraints[frozenset(unknown)] = n_mines
+
+        n_unknown = n_closed - n_flagged if self.trust_flags else n_closed
+        n_mines_left = n_closed - field_service.safe_cells_left - (n_flagged if self.trust_flags else 0)
+        return constraints, n_unknown, max(0, min(n_mines_left, n_unknown))
+
+    @staticmethod
+    def reduce_constraints(
+        constraints: dict[frozenset[int], int],
+    ) -> tuple[dict[frozenset[int], int], set[int], set[int]]:
+        """Takes the cells that are certain out of the constraints: a constraint with no mines left makes its cells
+        safe, and one with as many mines as cells makes them mines, while a constraint whose cells are all part of
+        another one leaves the rest of the other one with the difference of their mines. The components left
+        are smaller, and the result is the same.
+
+        Args:
+            constraints (dict[frozenset[int], int]): The constraints of the frontier.
+
+        Returns:
+            tuple[dict[frozenset[int], int], set[int], set[int]]: The constraints of the cells that aren't certain,
+                the cells that are certainly safe and the ones that are certainly mines.
+        """
+        safe: set[int] = set()
+        mines: set[int] = set()
+        changed = True
+        while changed:
+            changed = False
+            reduced: dict[frozenset[int], int] = {}
+            for cells, n_mines in constraints.items():
+                n_mines -= len(cells & mines)
+                cells = cells - safe - mines
+                if not cells or not 0 <= n_mines <= len(cells):
+                    continue
+                elif n_mines == 0:
+                    safe |= cells
+                    changed = True
+                elif n_mines == len(cells):
+                    mines |= cells
+                    changed = True
+                else:
+                    reduced.setdefault(cells, n_mines)
+            constraints = reduced
+            if changed:
+                continue
+
+            cell_groups: defaultdict[int, list[frozenset[int]]] = defaultdict(list)
+            for cells in constraints:
+                for cell in cells:
+                    cell_groups[cell].append(cells)
+            for cells, n_mines in list(constraints.items()):
+                for other in {other for cell in cells for other in cell_groups[cell]}:
+                    if cells < other and other in constraints:
+                        difference = other - cells
+                        constraints.setdefault(difference, constraints.pop(other) - n_mines)
+                        changed = True
+        return constraints, safe, mines
+
+    @staticmethod
+    def split_components(constraints: dict[frozenset[int], int]) -> list[tuple[list[int], list[Constraint]]]:
+        """Splits the frontier into components of constraints that share cells.
+
+        Args:
+            constraints (dict[frozenset[int], int]): The constraints of the frontier.
+
+        Returns:
+            list[tuple[list[int], list[Constraint]]]: The cells of every component, neighbouring ones
+                next to each other, and its constraints.
+        """
+        cell_groups: defaultdict[int, list[frozenset[int]]] = defaultdict(list)
+        for cells in constraints:
+            for cell in cells:
+                cell_groups[cell].append(cells)
+
+        components = []
+        visited: set[int] = set()
+        for first in sorted(cell_groups):
+            if first in visited:
+                continue
+
+            component_cells = [first]
+            component_groups: set[frozenset[int]] = set()
+            visited.add(first)
+            for cell in component_cells:
+                for cells in cell_groups[cell]:
+                    if cells not in component_groups:
+                        component_groups.add(cells)
+                        for other in sorted(cells):
+                            if other not in visited:
+                                visited.add(other)
+                                component_cells.append(other)
+            components.append((component_cells, [(cells, constraints[cells]) for cells in component_groups]))
+        return components
+
+    def calculate(self) -> dict[int, float]:
+        """Calculates the chance of every closed cell to be a mine. Flagged cells are treated as mines
+        if the flags are trusted, and like any other closed cell otherwise. Once the calculation runs out of time,
+        the components left are estimated instead of counted, see `estimate_component`, and left out of
+        the weighing, along with the number of mines they're expected to have.
+
+        Returns:
+            dict[int, float]: The chance of every closed cell not counted as a mine, by its flat index.
+        """
+        self.deadline = time.perf_counter() + self.max_time
+        constraints, n_unknown, n_mines_left = self.build_constraints()
+        constraints, safe, mines = self.reduce_constraints(constraints)
+        n_unknown -= len(safe) + len(mines)
+        n_mines_left = max(0, min(n_mines_left - len(mines), n_unknown))
+
+        components: dict[Key, ComponentWeights] = {}
+        weighed: list[ComponentWeights] = []
+        estimated: dict[int, float] = {}
+        n_free = n_unknown
+        for cells, component_constraints in self.split_components(constraints):
+            n_free -= len(cells)
+            key = frozenset(component_constraints)
+            weights = self.components.get(key)
+            if weights is not None:
+                self.hits += 1
+            elif time.perf_counter() > self.deadline:
+                estimated.update(self.estimate_component(component_constraints))
+                continue
+            else:
+                self.misses += 1
+                weights = self.count_component(cells=cells, constraints=component_constraints)
+            components[key] = weights
+            weighed.append(weights)
+        self.components = components
+
+        if estimated:
+            self.estimated += 1
+            n_weighed = n_free + sum(len(weights.cells) for weights in weighed)
+            n_mines_left = max(0, min(n_mines_left - round(sum(estimated.values())), n_weighed))
+        probabilities = self.combine(
+            components=weighed, n_free=n_free, n_mines_left=n_mines_left, known=safe | mines | estimated.keys()
+        )
+        probabilities.update(estimated)
+        probabilities.update(dict.fromkeys(safe, 0.0))
+        probabilities.update(dict.fromkeys(mines, 1.0))
+        return probabilities
+
+    def calculate_rows(self, digits: int = 4) -> list[list[float | None]]:
+        """Calculates the chance of every closed cell to be a mine, laid out like the board. See `calculate`.
+
+        Args:
+            digits (int, optional): How many decimal places to round the chances to. Defaults to 4.
+
+        Returns:
+            list[list[float | None]]: The chances by row and column, and None for the opened cells
+                and the flagged ones if the flags are trusted.
+        """
+        width = self.field_service.width
+        rows: list[list[float | None]] = [[None] * width for _ in range(self.field_service.height)]
+        for index, probability in self.calculate().items():
+            row, column = divmod(index, width)
+            rows[row][column] = round(probability, digits)
+        return rows
+
+    def calculate_remotely(self) -> tuple["ProbabilityEngine", list[list[float | None]]]:
+        """Calculates the chances laid out like the board, see `calculate_rows`, and returns the engine along
+        with them. In a worker process the engine is a copy, so it's sent back to keep the counts it made.
+
+        Returns:
+            tuple[ProbabilityEngine, list[list[float | None]]]: The engine and the chances by row and column.
+        """
+        return self, self.calculate_rows()
+
+    def combine(
+        self, components: list[ComponentWeights], n_free: int, n_mines_left: int, known: set[int]
+    ) -> dict[int, float]:
+        """Weighs the components against each other and against the free cells — the closed cells that no constraint
+        counted — by how many ways the mines left can be placed in the free cells for every number of mines
+        of the components.
+
+        A backward pass slides the weights of every component along the ways to place the mines left, so that
+        the ways left after a component account for all the components after it, and a forward pass convolves
+        the components before it. Both are cut at the most mines that can be left, so the whole weighing
+        takes time in proportion to that number times the number of mines of the frontier. If it runs out
+        of time, every component is weighed by its own counts instead, see `combine_locally`.
+
+        Args:
+            components (list[ComponentWeights]): The counts of the components.
+            n_free (int): The number of free cells.
+            n_mines_left (int): The number of mines among the components and the free cells together.
+            known (set[int]): The cells whose chances are already known, which aren't free.
+
+        Returns:
+            dict[int, float]: The chance of every cell of the components and of the free cells to be a mine.
+        """
+        n_frontier_mines = sum(len(component.weights) - 1 for component in components)
+        log_ways = [
+            self.log_binomial(n_free, n_mines_left - mines) for mines in range(min(n_frontier_mines, n_mines_left) + 1)
+        ]
+        largest = max((log_way for log_way in log_ways if log_way is not None), default=0.0)
+        ways = [0.0 if log_way is None else math.exp(log_way - largest) for log_way in log_ways]
+        length = len(ways)
+
+        tails = []
+        tail = ways
+        for component in reversed(components):
+            if time.perf_counter() > self.deadline:
+                self.estimated += 1
+                return self.combine_locally(
+                    components=components, n_free=n_free, n_mines_left=n_mines_left, known=known
+                )
+            tails.append(tail)
+            tail = correlate(tail, component.weights, length=length)
+        tails.reverse()
+
+        probabilities: dict[int, float] = {}
+        prefix = [1.0]
+        for component, tail in zip(components, tails):
+            ways_by_mines = correlate(tail, prefix, length=len(component.weights))
+            prefix = convolve(prefix, component.weights)[:length]
+
+            total = sum(weight * way for weight, way in zip(component.weights, ways_by_mines))
+            for cell_position, cell in enumerate(component.cells):
+                if total:
+                    weight = sum(row[cell_position] * way for row, way in zip(component.cell_weights, ways_by_mines))
+                    probabilities[cell] = min(1.0, weight / total)
+                else:
+                    probabilities[cell] = n_mines_left / (n_free + len(component.cells))
+
+        free = self.free_cell_probability(totals=prefix, ways=ways, n_free=n_free, n_mines_left=n_mines_left)
+        self.fill_free_cells(probabilities=probabilities, known=known, free=free)
+        return probabilities
+
+    def combine_locally(
+        self, components: list[ComponentWeights], n_free: int, n_mines_left: int, known: set[int]
+    ) -> dict[int, float]:
+        """Weighs every component by its own counts only, as if any number of its mines was as likely,
+        and gives the free cells the share of the mines the components aren't expected to have. See `combine`.
+
+        Args:
+            components (list[ComponentWeights]): The counts of the components.
+            n_free (int): The number of free cells.
+            n_mines_left (int): The number of mines among the components and the free cells together.
+            known (set[int]): The cells whose chances are already known, which aren't free.
+
+        Returns:
+            dict[int, float]: The approximate chance of every cell of the components and of the free cells.
+        """
+        probabilities: dict[int, float] = {}
+        for component in components:
+            total = sum(component.weights)
+            for cell_position, cell in enumerate(component.cells):
+                weight = sum(row[cell_position] for row in component.cell_weights)
+                probabilities[cell] = min(1.0, weight / total) if total else 0.5
+        n_expected = sum(probabilities.values())
+        free = min(1.0, max(0.0, (n_mines_left - n_expected) / n_free)) if n_free else 0.0
+        self.fill_free_cells(probabilities=probabilities, known=known, free=free)
+        return probabilities
+
+    def fill_free_cells(self, probabilities: dict[int, float], known: set[int], free: float) -> None:
+        """Gives the chance of a free cell to every closed cell that doesn't have a chance yet.
+
+        Args:
+            probabilities (dict[int, float]): The chances, updated in place.
+            known (set[int]): The cells whose chances are known elsewhere.
+            free (float): The chance of a free cell.
+        """
+        frontier = known.union(probabilities)
+        for index, cell_state in enumerate(self.field_service.state):
+            if not cell_state & OPENED and index not in frontier:
+                if not (self.trust_flags and cell_state & FLAGGED):
+                    probabilities[index] = free
+
+    @staticmethod
+    def estimate_component(constraints: list[Constraint]) -> dict[int, float]:
+        """Estimates the chance of every cell of a component that there's no time left to count:
+        the share of mines its numbers still need among their cells, on average.
+
+        Args:
+            constraints (list[Constraint]): The constraints of the component.
+
+        Returns:
+            dict[int, float]: The estimated chance of every cell of the component.
+        """
+        shares: dict[int, list[float]] = defaultdict(list)
+        for constraint_cells, n_mines in constraints:
+            for cell in constraint_cells:
+                shares[cell].append(n_mines / len(constraint_cells))
+        return {cell: sum(cell_shares) / len(cell_shares) for cell, cell_shares in shares.items()}
+
+    @staticmethod
+    def free_cell_probability(totals: list[float], ways: list[float], n_free: int, n_mines_left: int) -> float:
+        """Calculates the chance of a free cell to be a mine: the share of the mines left outside of the components
+        for every number of mines of the components, weighed by how likely that number is.
+
+        Args:
+            totals (list[float]): The weights of all the components together by their number of mines.
+            ways (list[float]): The scaled number of ways to place the rest of the mines in the free cells.
+            n_free (int): The number of free cells.
+            n_mines_left (int): The number of mines among the components and the free cells together.
+
+        Returns:
+            float: The chance.
+        """
+        if not n_free:
+            return 0.0
+        weight = total = 0.0
+        for mines, (component_weight, way) in enumerate(zip(totals, ways)):
+            total += component_weight * way
+            weight += component_weight * way * (n_mines_left - mines) / n_free
+        return weight / total if total else n_mines_left / n_free
+
+    @staticmethod
+    def log_binomial(n: int, k: int) -> float | None:
+        """Calculates the logarithm of a binomial coefficient, which fits in a float for any board.
+
+        Args:
+            n (int): The number of cells.
+            k (int): The number of mines among them.
+
+        Returns:
+            float | None: The logarithm, or None if there are no ways at all.
+        """
+        if not 0 <= k <= n:
+            return None
+        return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+    def count_component(self, cells: list[int], constraints: list[Constraint]) -> ComponentWeights:
+        """Counts the arrangements of a component exactly if it's small enough, and samples them otherwise,
+        with NumPy if it's installed.
+
+        Args:
+            cells (list[int]): The closed cells of the component, neighbouring ones next to each other.
+            constraints (list[Constraint]): The constraints of the component.
+
+        Returns:
+            ComponentWeights: The counts.
+        """
+        if len(cells) <= self.max_exact_cells:
+            weights = self.enumerate_component(cells=cells, constraints=constraints)
+            if weights is not None:
+                return weights
+        if np is None:
+            return self.sample_component_python(cells=cells, constraints=constraints)
+        return self.sample_component(cells=cells, constraints=constraints)
+
+    def enumerate_component(self, cells: list[int], constraints: list[Constraint]) -> ComponentWeights | None:
+        """Counts the arrangements of a component by backtracking, cutting off every branch as soon as one of
+        its constraints can't be met anymore.
+
+        Args:
+            cells (list[int]): The closed cells of the component, neighbouring ones next to each other.
+            constraints (list[Constraint]): The constraints of the component.
+
+        Returns:
+            ComponentWeights | None: The exact counts, or None if the count ran out of steps or of time.
+        """
+        n_cells = len(cells)
+        positions = {cell: position for position, cell in enumerate(cells)}
+        cell_constraints: list[list[int]] = [[] for _ in range(n_cells)]
+        mines_needed = []
+        cells_left = []
+        for number, (constraint_cells, n_mines) in enumerate(constraints):
+            for cell in constraint_cells:
+                cell_constraints[positions[cell]].append(number)
+            mines_needed.append(n_mines)
+            cells_left.append(len(constraint_cells))
+
+        assignment = bytearray(n_cells)
+        weights = [0] * (n_cells + 1)
+        cell_weights = [[0] * n_cells for _ in range(n_cells + 1)]
+        steps = 0
+
+        def place(position: int, n_mines: int) -> bool:
+            nonlocal steps
+            if position == n_cells:
+                weights[n_mines] += 1
+                row = cell_weights[n_mines]
+                for index, is_mine in enumerate(assignment):
+                    if is_mine:
+                        row[index] += 1
+                return True
+
+            steps += 1
+            if steps > self.max_steps:
+                return False
+            if not steps % DEADLINE_CHECK_STEPS and time.perf_counter() > self.deadline:
+                return False
+
+            numbers = cell_constraints[position]
+            for is_mine in (0, 1):
+                if all(0 <= mines_needed[number] - is_mine <= cells_left[number] - 1 for number in numbers):
+                    for number in numbers:
+                        mines_needed[number] -= is_mine
+                        cells_left[number] -= 1
+                    assignment[position] = is_mine
+                    completed = place(position + 1, n_mines + is_mine)
+                    for number in numbers:
+                        mines_needed[number] += is_mine
+                        cells_left[number] += 1
+                    if not completed:
+                        return False
+            assignment[position] = 0
+            return True
+
+        if not place(0, 0):
+            return None
+        return scale(
+            weights=[float(weight) for weight in weights],
+            cell_weights=[[float(weight) for weight in row] for row in cell_weights],
+            exact=True,
+            cells=cells,
+        )
+
+    def sample_component(self, cells: list[int], constraints: list[Constraint]) -> ComponentWeights:
+        """Estimates the counts of a component by sequential importance sampling, a batch of arrangements at a time.
+        Every arrangement is built cell by cell, like in the exact count: a cell that can only be safe or only be
+        a mine is set, and any other one is a mine with the share of mines its constraints still need among their
+        cells left, on average. Every arrangement that meets all the constraints then counts for the inverse
+        of the chance it had to be built, which makes the counts unbiased, and the ones that end up breaking
+        a constraint count for nothing.
+
+        Args:
+            cells (list[int]): The closed cells of the component, neighbouring ones next to each other.
+            constraints (list[Constraint]): The constraints of the component.
+
+        Returns:
+            ComponentWeights: The estimated counts.
+        """
+        assert self.rng is not None
+        n_cells = len(cells)
+        positions = {cell: position for position, cell in enumerate(cells)}
+        cell_constraints: list[list[int]] = [[] for _ in range(n_cells)]
+        for number, (constraint_cells, _) in enumerate(constraints):
+            for cell in constraint_cells:
+                cell_constraints[positions[cell]].append(number)
+        mines_needed = np.array([n_mines for _, n_mines in constraints], dtype=np.int16)
+        cells_left = np.array([len(constraint_cells) for constraint_cells, _ in constraints], dtype=np.int16)
+
+        batches: list[tuple[np.ndarray, np.ndarray]] = []
+        started = time.perf_counter()
+        n_sampled = 0
+        stop = min(started + self.time_budget, self.deadline)
+        while n_sampled < self.n_samples and (not batches or time.perf_counter() < stop):
+            batch_size = min(SAMPLE_BATCH_SIZE, self.n_samples - n_sampled)
+            needed = np.tile(mines_needed, (batch_size, 1))
+            left = np.tile(cells_left, (batch_size, 1))
+            alive = np.ones(batch_size, dtype=bool)
+            log_weights = np.zeros(batch_size)
+            assignment = np.zeros((batch_size, n_cells), dtype=bool)
+
+            for position, numbers in enumerate(cell_constraints):
+                can_be_mine = alive & (needed[:, numbers] >= 1).all(axis=1)
+                can_be_safe = alive & (needed[:, numbers] < left[:, numbers]).all(axis=1)
+                either = can_be_mine & can_be_safe
+                chance = np.clip((needed[:, numbers] / left[:, numbers]).mean(axis=1), 0.05, 0.95)
+                is_mine = np.where(either, self.rng.random(batch_size) < chance, can_be_mine)
+                log_weights -= np.where(either, np.log(np.where(is_mine, chance, 1 - chance)), 0.0)
+                alive &= can_be_mine | can_be_safe
+                assignment[:, position] = is_mine
+                needed[:, numbers] -= is_mine[:, None]
+                left[:, numbers] -= 1
+
+            batches.append((assignment[alive], log_weights[alive]))
+            n_sampled += batch_size
+
+        assignments = np.concatenate([batch_assignment for batch_assignment, _ in batches])
+        log_weights = np.concatenate([batch_log_weights for _, batch_log_weights in batches])
+        weights = [0.0] * (n_cells + 1)
+        cell_weights = [[0.0] * n_cells for _ in range(n_cells + 1)]
+        if len(log_weights):
+            sample_weights = np.exp(log_weights - log_weights.max())
+            n_mines = assignments.sum(axis=1)
+            for mines in np.unique(n_mines):
+                chosen = n_mines == mines
+                weights[mines] = float(sample_weights[chosen].sum())
+                cell_weights[mines] = (sample_weights[chosen] @ assignments[chosen]).tolist()
+        return scale(weights=weights, cell_weights=cell_weights, exact=False, cells=cells)
+
+    def sample_component_python(self, cells: list[int], constraints: list[Constraint]) -> ComponentWeights:
+        """Estimates the counts of a component like `sample_component`, an arrangement at a time, without NumPy.
+        It takes far fewer samples within the same time budget, but it still only counts the arrangements
+        that meet the constraints.
+
+        Args:
+            cells (list[int]): The closed cells of the component, neighbouring ones next to each other.
+            constraints (list[Constraint]): The constraints of the component.
+
+        Returns:
+            ComponentWeights: The estimated counts.
+        """
+        n_cells = len(cells)
+        positions = {cell: position for position, cell in enumerate(cells)}
+        cell_constraints: list[list[int]] = [[] for _ in range(n_cells)]
+        for number, (constraint_cells, _) in enumerate(constraints):
+            for cell in constraint_cells:
+                cell_constraints[positions[cell]].append(number)
+        mines_needed = [n_mines for _, n_mines in constraints]
+        cells_left = [len(constraint_cells) for constraint_cells, _ in constraints]
+
+        samples: list[tuple[list[int], float]] = []
+        started = time.perf_counter()
+        n_sampled = 0
+        stop = min(started + self.time_budget, self.deadline)
+        while n_sampled < self.n_samples and (not n_sampled or time.perf_counter() < stop):
+            n_sampled += 1
+            needed = mines_needed.copy()
+            left = cells_left.copy()
+            log_weight = 0.0
+            mines = []
+            for position, numbers in enumerate(cell_constraints):
+                can_be_mine = all(needed[number] >= 1 for number in numbers)
+                can_be_safe = all(needed[number] < left[number] for number in numbers)
+                if can_be_mine and can_be_safe:
+                    chance = min(
+                        max(sum(needed[number] / left[number] for number in numbers) / len(numbers), 0.05), 0.95
+                    )
+                    is_mine = self.python_rng.random() < chance
+                    log_weight -= math.log(chance if is_mine else 1 - chance)
+                elif can_be_mine or can_be_safe:
+                    is_mine = can_be_mine
+                else:
+                    break
+                if is_mine:
+                    mines.append(position)
+                for number in numbers:
+                    needed[number] -= is_mine
+                    left[number] -= 1
+            else:
+                samples.append((mines, log_weight))
+
+        weights = [0.0] * (n_cells + 1)
+        cell_weights = [[0.0] * n_cells for _ in range(n_cells + 1)]
+        largest = max((log_weight for _, log_weight in samples), default=0.0)
+        for mines, log_weight in samples:
+            sample_weight = math.exp(log_weight - largest)
+            weights[len(mines)] += sample_weight
+            row = cell_weights[len(mines)]
+            for position in mines:
+                row[position] += sample_weight
+        return scale(weights=weights, cell_weights=cell_weights, exact=False, cells=cells)
+
+    @property
+    def metrics(self) -> dict:
+        """The counters describing the engine."""
+        return {
+            "components": len(self.components),
+            "sampled": sum(not weights.exact for weights in self.components.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "estimated": self.estimated,
+        }
@@ -0,0 +1,115 @@
+import json
+
+from app.schemas import GameResponse
+
+PROTOCOLS = ("json", "binary")
+
+STATUSES = ("okay", "game_over", "win")
+CATEGORIES = ("empty", *(f"open{value}" for value in range(1, 9)), "mine", "oops", "flag", "hint")
+
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Appends an unsigned integer to the buffer in LEB128 — 7 bits per byte, the high bit marking
+    that more bytes follow. Values below 128 take a single byte.
+
+    Args:
+        buffer (bytearray): The buffer to write to.
+        value (int): The non-negative integer to write.
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """Reads an unsigned LEB128 integer from the data.
+
+    Args:
+        data (bytes): The data to read from.
+        offset (int): Where the integer starts.
+
+    Returns:
+        tuple[int, int]: The integer and the offset right after it.
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_binary(result: GameResponse, width: int) -> bytes:
+    """Packs a GameResponse into a compact binary frame.
+
+    The frame starts with a status byte and the number of cell groups. Every group is a category byte,
+    the number of cells and their sorted flat indices, each stored as a varint difference from the previous one,
+    so neighbouring cells of a flooded area take a byte each. Empty groups are kept, like an empty hint.
+    Any other response fields follow as UTF-8 JSON.
+
+    Args:
+        result (GameResponse): The result to encode.
+        width (int): Width of the game field, for calculating the flat indices.
+
+    Returns:
+        bytes: The encoded frame.
+    """
+    groups = list(result.cells.items) if result.cells else []
+
+    frame = bytearray((STATUS_CODES[result.status], len(groups)))
+    for key, cells in groups:
+        frame.append(CATEGORY_CODES[key])
+        write_varint(frame, len(cells))
+
+        previous = 0
+        for index in sorted(cell.row * width + cell.column for cell in cells):
+            delta = index - previous
+            if delta < 0x80:
+                frame.append(delta)
+            else:
+                write_varint(frame, delta)
+            previous = index
+
+    extra = result.model_dump(exclude={"status", "cells"}, exclude_none=True)
+    if extra:
+        frame += json.dumps(extra, separators=(",", ":")).encode()
+    return bytes(frame)
+
+
+def decode_binary(data: bytes, width: int) -> dict:
+    """Unpacks a binary frame into the same structure `GameResponse.model_dump` gives, with the cells of every
+    category sorted. Mirrors the decoder in `script_game.js`.
+
+    Args:
+        data (bytes): The encoded frame.
+        width (int): Width of the game field.
+
+    Returns:
+        dict: The decoded response.
+    """
+    status, n_groups = STATUSES[data[0]], data[1]
+    offset = 2
+
+    cells: dict[str, list[dict[str, int]]] = {}
+    for _ in range(n_groups):
+        key = CATEGORIES[data[offset]]
+        n_cells, offset = read_varint(data, offset + 1)
+
+        index = 0
+        group = cells[key] = []
+        for _ in range(n_cells):
+            delta, offset = read_varint(data, offset)
+            index += delta
+            row, column = divmod(index, width)
+            group.append({"row": row, "column": column})
+
+    response = {"status": status, "cells": cells}
+    if offset < len(data):
+        response.update(json.loads(data[offset:]))
+    return response
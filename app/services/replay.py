@@ -0,0 +1,229 @@
+import random
+import threading
+from io import FileIO
+from typing import Iterator, NamedTuple
+
+from app.core import settings
+from app.schemas import Cell
+from app.services.chunked import ChunkedFieldService
+from app.services.field import Board, FieldService
+from app.services.protocol import read_varint, write_varint
+
+RECORD_VERSION = 1
+
+ACTIONS = ("click", "flag", "remove_flag", "check_neighbours", "hint", "probabilities")
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+STREAMED = 0b01
+
+Action = tuple[str, int | None]
+
+
+class Message(NamedTuple):
+    """A message received during a game: its actions, each with the flat index of its cell if it has one,
+    and the number of messages sent back in answer to it."""
+
+    actions: list[Action]
+    n_frames: int
+
+
+class GameRecord(NamedTuple):
+    """Everything needed to play a game again exactly as it was played: the board and the messages of the player.
+
+    The seed reproduces the board, except for no-guess boards, which are repaired after being generated,
+    so their mines are kept in the layout instead. The layout is empty for every other board.
+    """
+
+    seed: int
+    height: int
+    width: int
+    n_mines: int
+    start: int
+    start_frames: int
+    layout: list[int]
+    stream: bool
+    messages: list[Message]
+
+
+def encode_record(record: GameRecord) -> bytes:
+    """Packs a game into a compact frame: the varint length of the rest, the version and the flags bytes,
+    the board parameters, the layout and the messages as varints. The mines of the layout are stored
+    as differences from the previous one, and every action as its code byte and the flat index of its cell plus one,
+    with zero standing for an action without a cell.
+
+    Args:
+        record (GameRecord): The game.
+
+    Returns:
+        bytes: The encoded frame.
+    """
+    payload = bytearray((RECORD_VERSION, STREAMED if record.stream else 0))
+    for value in (record.seed, record.height, record.width, record.n_mines, record.start, record.start_frames):
+        write_varint(payload, value)
+
+    write_varint(payload, len(record.layout))
+    previous = 0
+    for mine in sorted(record.layout):
+        write_varint(payload, mine - previous)
+        previous = mine
+
+    write_varint(payload, len(record.messages))
+    for actions, n_frames in record.messages:
+        write_varint(payload, n_frames)
+        write_varint(payload, len(actions))
+        for action, index in actions:
+            payload.append(ACTION_CODES[action])
+            write_varint(payload, 0 if index is None else index + 1)
+
+    frame = bytearray()
+    write_varint(frame, len(payload))
+    return bytes(frame + payload)
+
+
+def decode_record(data: bytes, offset: int = 0) -> tuple[GameRecord, int]:
+    """Unpacks a game packed by `encode_record`.
+
+    Args:
+        data (bytes): The data to read from.
+        offset (int, optional): Where the frame starts. Defaults to 0.
+
+    Raises:
+        ValueError: In case the game was recorded by an incompatible version.
+
+    Returns:
+        tuple[GameRecord, int]: The game and the offset right after its frame.
+    """
+    length, offset = read_varint(data, offset)
+    end = offset + length
+    version, flags = data[offset], data[offset + 1]
+    if version != RECORD_VERSION:
+        raise ValueError(f"Unsupported record version: {version}.")
+
+    offset += 2
+    values = []
+    for _ in range(6):
+        value, offset = read_varint(data, offset)
+        values.append(value)
+    seed, height, width, n_mines, start, start_frames = values
+
+    n_layout, offset = read_varint(data, offset)
+    layout, mine = [], 0
+    for _ in range(n_layout):
+        delta, offset = read_varint(data, offset)
+        mine += delta
+        layout.append(mine)
+
+    n_messages, offset = read_varint(data, offset)
+    messages = []
+    for _ in range(n_messages):
+        n_frames, offset = read_varint(data, offset)
+        n_actions, offset = read_varint(data, offset)
+        actions: list[Action] = []
+        for _ in range(n_actions):
+            action = ACTIONS[data[offset]]
+            cell, offset = read_varint(data, offset + 1)
+            actions.append((action, cell - 1 if cell else None))
+        messages.append(Message(actions=actions, n_frames=n_frames))
+
+    record = GameRecord(
+        seed=seed,
+        height=height,
+        width=width,
+        n_mines=n_mines,
+        start=start,
+        start_frames=start_frames,
+        layout=layout,
+        stream=bool(flags & STREAMED),
+        messages=messages,
+    )
+    return record, end
+
+
+def read_records(path: str) -> Iterator[GameRecord]:
+    """Reads the games of a replay log, in the order they were recorded. A frame cut short at the end
+    of the log, like one being written when the server was killed, is skipped.
+
+    Args:
+        path (str): The path of the log.
+
+    Yields:
+        GameRecord: The recorded games.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    offset = 0
+    while offset < len(data):
+        try:
+            record, offset = decode_record(data, offset)
+        except IndexError:
+            return
+        yield record
+
+
+def create_replay_field(record: GameRecord) -> FieldService:
+    """Creates the field of a recorded game as it was before the first click, the same way `GameService` did.
+
+    Args:
+        record (GameRecord): The game.
+
+    Returns:
+        FieldService: The field, on which the first click hasn't been made yet.
+    """
+    start = Cell(row=record.start // record.width, column=record.start % record.width)
+    height, width, n_mines = record.height, record.width, record.n_mines
+    if record.layout:
+        field = FieldService.create_field(height=height, width=width, mine_positions=record.layout)
+        board = Board(seed=record.seed, field=field, mines=list(record.layout), rng=random.Random(record.seed))
+        return FieldService(start=start, n_mines=n_mines, height=height, width=width, board=board)
+    if height * width >= settings.CHUNKED_FIELD_MIN_SIZE:
+        return ChunkedFieldService(start=start, n_mines=n_mines, height=height, width=width, seed=record.seed)
+    return FieldService(start=start, n_mines=n_mines, height=height, width=width, seed=record.seed)
+
+
+class GameRecorder:
+    def __init__(self, path: str = "") -> None:
+        """Initialises a recorder that appends every finished or abandoned game to a replay log.
+        The log is opened on the first game, unbuffered, and every game is appended with a single write,
+        so the games of several processes sharing the log don't interleave.
+
+        Args:
+            path (str, optional): The path of the log. Defaults to "" — nothing is recorded.
+        """
+        self.path = path
+        self.file: FileIO | None = None
+        self.n_records = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the games are recorded."""
+        return bool(self.path)
+
+    def write(self, record: GameRecord) -> None:
+        """Appends a game to the log.
+
+        Args:
+            record (GameRecord): The game.
+        """
+        frame = encode_record(record)
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "ab", buffering=0)
+            self.file.write(frame)
+            self.n_records += 1
+
+    def close(self) -> None:
+        """Closes the log, if it was opened."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    @property
+    def metrics(self) -> dict:
+        """The counters describing the recorder."""
+        return {"enabled": self.enabled, "records": self.n_records}
+
+
+game_recorder = GameRecorder(path=settings.REPLAY_LOG_PATH)
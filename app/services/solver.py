@@ -0,0 +1,311 @@
+from collections import defaultdict
+
+from app.services.field import FLAGGED, OPENED, FieldService
+
+MAX_COMPONENT_SIZE = 16
+MAX_ENUMERATION_STEPS = 10000
+
+Constraint = tuple[frozenset[int], int]
+
+
+class Solver:
+    def __init__(
+        self,
+        field_service: FieldService,
+        trust_flags: bool = False,
+        max_component_size: int = MAX_COMPONENT_SIZE,
+        max_steps: int = MAX_ENUMERATION_STEPS,
+    ) -> None:
+        """Initialises a solver that follows what the player sees of a field: the values of the opened cells
+        and, optionally, the flags. The values of the closed cells are never looked at.
+
+        The solver keeps its frontier — the opened numbered cells that still border unresolved closed cells —
+        along with everything it has deduced, and the field reports every cell it opens through
+        `recently_opened`. Each call only catches up with the cells opened since the previous one, and the
+        exact enumeration skips the frontier components that haven't changed since it last gave up on them.
+
+        Args:
+            field_service (FieldService): The field to follow.
+            trust_flags (bool, optional): Whether to treat the flagged cells as mines. The player can be wrong,
+                so the deductions are only certain without it. Defaults to False.
+            max_component_size (int, optional): The largest frontier component to enumerate exactly,
+                in closed cells. Defaults to 16.
+            max_steps (int, optional): How many cells the enumeration of a single component can try
+                before giving up on it. Defaults to 10000.
+        """
+        self.field_service = field_service
+        self.trust_flags = trust_flags
+        self.max_component_size = max_component_size
+        self.max_steps = max_steps
+
+        self.frontier: set[int] = set()
+        self.safe: set[int] = set()
+        self.mines: set[int] = set()
+        self.exhausted: set[frozenset[Constraint]] = set()
+
+        for index, cell_state in field_service.iterate_states():
+            if cell_state & OPENED:
+                self.add_opened(index=index)
+        field_service.recently_opened = []
+
+    def add_opened(self, index: int) -> None:
+        """Takes a newly opened cell into account.
+
+        Args:
+            index (int): The flat index of the opened cell.
+        """
+        self.safe.discard(index)
+        if self.field_service.field[index]:
+            self.frontier.add(index)
+
+    def catch_up(self) -> None:
+        """Takes into account the cells the field has opened since the previous call."""
+        recently_opened = self.field_service.recently_opened
+        assert recently_opened is not None
+        for index in recently_opened:
+            self.add_opened(index=index)
+        recently_opened.clear()
+
+    def find_safe_cell(self) -> int | None:
+        """Finds a closed cell that is certainly not a mine, solving only as far as it takes to find one.
+
+        Returns:
+            int | None: The lowest flat index among the known safe cells, or None if no cell is certainly safe.
+        """
+        self.catch_up()
+        if not self.safe:
+            self.solve()
+        return min(self.safe) if self.safe else None
+
+    def solve(self, exhaustive: bool = False) -> None:
+        """Deduces the safe cells and the mines, applying the cheap rules until they stop giving anything new
+        and only then enumerating the frontier components.
+
+        Args:
+            exhaustive (bool, optional): Whether to keep going after a safe cell is found, until nothing else
+                can be deduced. Defaults to False.
+        """
+        self.catch_up()
+        while exhaustive or not self.safe:
+            constraints = self.build_constraints()
+            if not constraints:
+                return
+            if not self.apply_rules(constraints=constraints) and not self.enumerate_components(constraints=constraints):
+                return
+
+    def build_constraints(self) -> dict[frozenset[int], int]:
+        """Builds a constraint for every frontier cell: how many mines are among its unresolved closed neighbours.
+        Frontier cells whose neighbours are all resolved are dropped from the frontier for good.
+
+        Returns:
+            dict[frozenset[int], int]: The number of mines for every distinct set of unresolved cells.
+        """
+        field_service = self.field_service
+        field, state = field_service.field, field_service.state
+        neighbour_offsets, edge_classes = field_service.neighbour_offsets, field_service.edge_classes
+
+        constraints: dict[frozenset[int], int] = {}
+        resolved = []
+        for index in self.frontier:
+            unknown = []
+            n_mines = field[index]
+            relies_on_flags = False
+            for offset in neighbour_offsets[edge_classes[index]]:
+                neighbour = index + offset
+                if state[neighbour] & OPENED or neighbour in self.safe:
+                    continue
+                if neighbour in self.mines:
+                    n_mines -= 1
+                elif self.trust_flags and state[neighbour] & FLAGGED:
+                    n_mines -= 1
+                    relies_on_flags = True
+                else:
+                    unknown.append(neighbour)
+
+            if not unknown:
+                if not relies_on_flags:
+                    resolved.append(index)
+            elif 0 <= n_mines <= len(unknown):
+                constraints[frozenset(unknown)] = n_mines
+
+        self.frontier.difference_update(resolved)
+        return constraints
+
+    def record(self, safe: set[int], mines: set[int]) -> bool:
+        """Adds the deduced cells to the known ones.
+
+        Args:
+            safe (set[int]): The cells deduced to be safe.
+            mines (set[int]): The cells deduced to be mines.
+
+        Returns:
+            bool: Whether anything new was deduced.
+        """
+        n_known = len(self.safe) + len(self.mines)
+        self.safe |= safe
+        self.mines |= mines
+        return len(self.safe) + len(self.mines) > n_known
+
+    def apply_rules(self, constraints: dict[frozenset[int], int]) -> bool:
+        """Applies the single-cell rule to every constraint, and if that gives nothing, the pair rule to every
+        two constraints that share a cell. The pair rule bounds the number of mines in the shared cells,
+        which fixes the cells outside of the overlap when the bounds are tight — a subset being the simplest case.
+
+        Args:
+            constraints (dict[frozenset[int], int]): The constraints of the frontier.
+
+        Returns:
+            bool: Whether anything new was deduced.
+        """
+        safe: set[int] = set()
+        mines: set[int] = set()
+        for cells, n_mines in constraints.items():
+            if n_mines == 0:
+                safe |= cells
+            elif n_mines == len(cells):
+                mines |= cells
+        if safe or mines:
+            return self.record(safe=safe, mines=mines)
+
+        groups = list(constraints.items())
+        cell_groups: defaultdict[int, list[int]] = defaultdict(list)
+        for position, (cells, _) in enumerate(groups):
+            for cell in cells:
+                cell_groups[cell].append(position)
+
+        for position, (cells, n_mines) in enumerate(groups):
+            others = {other for cell in cells for other in cell_groups[cell] if other > position}
+            for other in others:
+                other_cells, other_n_mines = groups[other]
+                only_here, only_there = cells - other_cells, other_cells - cells
+                shared = len(cells) - len(only_here)
+
+                most_shared = min(n_mines, other_n_mines, shared)
+                least_shared = max(n_mines - len(only_here), other_n_mines - len(only_there), 0)
+                for outside, n_outside in ((only_here, n_mines), (only_there, other_n_mines)):
+                    if outside and n_outside - least_shared == 0:
+                        safe |= outside
+                    elif outside and n_outside - most_shared == len(outside):
+                        mines |= outside
+
+        return self.record(safe=safe, mines=mines)
+
+    def enumerate_components(self, constraints: dict[frozenset[int], int]) -> bool:
+        """Splits the frontier into components of constraints that share cells, and enumerates every mine
+        arrangement of the small enough ones. A cell that is safe in all the arrangements is safe,
+        and one that is a mine in all of them is a mine.
+
+        Args:
+            constraints (dict[frozenset[int], int]): The constraints of the frontier.
+
+        Returns:
+            bool: Whether anything new was deduced.
+        """
+        cell_groups: defaultdict[int, list[frozenset[int]]] = defaultdict(list)
+        for cells in constraints:
+            for cell in cells:
+                cell_groups[cell].append(cells)
+
+        safe: set[int] = set()
+        mines: set[int] = set()
+        exhausted = set()
+        visited: set[int] = set()
+        for first in cell_groups:
+            if first in visited:
+                continue
+
+            component_cells = [first]
+            component_groups: set[frozenset[int]] = set()
+            visited.add(first)
+            for cell in component_cells:
+                for cells in cell_groups[cell]:
+                    if cells not in component_groups:
+                        component_groups.add(cells)
+                        for other in cells:
+                            if other not in visited:
+                                visited.add(other)
+                                component_cells.append(other)
+
+            key = frozenset((cells, constraints[cells]) for cells in component_groups)
+            if key in self.exhausted or len(component_cells) > self.max_component_size:
+                exhausted.add(key)
+                continue
+
+            outcome = self.enumerate_component(
+                cells=component_cells, constraints=[(cells, constraints[cells]) for cells in component_groups]
+            )
+            if outcome is None or not (outcome[0] or outcome[1]):
+                exhausted.add(key)
+            else:
+                safe |= outcome[0]
+                mines |= outcome[1]
+
+        self.exhausted = exhausted
+        return self.record(safe=safe, mines=mines)
+
+    def enumerate_component(self, cells: list[int], constraints: list[Constraint]) -> tuple[set[int], set[int]] | None:
+        """Enumerates the mine arrangements of a single component by backtracking, cutting off every branch
+        as soon as one of its constraints can't be met anymore.
+
+        Args:
+            cells (list[int]): The closed cells of the component, neighbouring ones next to each other.
+            constraints (list[Constraint]): The constraints of the component.
+
+        Returns:
+            tuple[set[int], set[int]] | None: The cells that are safe and the cells that are mines
+                in every arrangement, or None if the enumeration ran out of steps. Both sets are empty
+                if the constraints can't be met at all, which only happens with wrong flags.
+        """
+        n_cells = len(cells)
+        positions = {cell: position for position, cell in enumerate(cells)}
+        cell_constraints: list[list[int]] = [[] for _ in range(n_cells)]
+        mines_needed = []
+        cells_left = []
+        for number, (constraint_cells, n_mines) in enumerate(constraints):
+            for cell in constraint_cells:
+                cell_constraints[positions[cell]].append(number)
+            mines_needed.append(n_mines)
+            cells_left.append(len(constraint_cells))
+
+        assignment = bytearray(n_cells)
+        can_be_mine = bytearray(n_cells)
+        can_be_safe = bytearray(n_cells)
+        steps = 0
+
+        def place(position: int) -> bool:
+            nonlocal steps
+            if position == n_cells:
+                for index, is_mine in enumerate(assignment):
+                    if is_mine:
+                        can_be_mine[index] = 1
+                    else:
+                        can_be_safe[index] = 1
+                return True
+
+            steps += 1
+            if steps > self.max_steps:
+                return False
+
+            numbers = cell_constraints[position]
+            for is_mine in (0, 1):
+                if all(0 <= mines_needed[number] - is_mine <= cells_left[number] - 1 for number in numbers):
+                    for number in numbers:
+                        mines_needed[number] -= is_mine
+                        cells_left[number] -= 1
+                    assignment[position] = is_mine
+                    completed = place(position + 1)
+                    for number in numbers:
+                        mines_needed[number] += is_mine
+                        cells_left[number] += 1
+                    if not completed:
+                        return False
+            return True
+
+        if not place(0):
+            return None
+        if not any(can_be_mine) and not any(can_be_safe):
+            return set(), set()
+        return (
+            {cell for cell, possible in zip(cells, can_be_mine) if not possible},
+            {cell for cell, possible in zip(cells, can_be_safe) if not possible},
+        )
@@ -0,0 +1,311 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from app.core import settings
+from app.services.field import FieldService
+
+
+class GameStore(ABC):
+    """Keeps the games that aren't being played on a connection right now, as field snapshots."""
+
+    @abstractmethod
+    def save(self, game_id: str, field_service: FieldService) -> None:
+        """Suspends a game, replacing its previous snapshot if there is one.
+
+        Args:
+            game_id (str): The ID of the game.
+            field_service (FieldService): The field of the game.
+        """
+
+    @abstractmethod
+    def restore(self, game_id: str) -> FieldService | None:
+        """Gets a suspended game back to continue playing it.
+
+        Args:
+            game_id (str): The ID of the game.
+
+        Returns:
+            FieldService | None: The field of the game, or None if it's unknown or has expired.
+        """
+
+    async def restore_async(self, game_id: str) -> FieldService | None:
+        """Gets a suspended game back without blocking the event loop. Stores that live in the same process
+        as the game restore it right away. See `restore`.
+
+        Args:
+            game_id (str): The ID of the game.
+
+        Returns:
+            FieldService | None: The field of the game, or None if it's unknown or has expired.
+        """
+        return self.restore(game_id=game_id)
+
+    @abstractmethod
+    def discard(self, game_id: str) -> None:
+        """Drops a game, if it's there.
+
+        Args:
+            game_id (str): The ID of the game.
+        """
+
+    def checkpoint(self, game_id: str, field_service: FieldService) -> None:
+        """Records the state of a game that is still being played. Stores that live in the same process
+        as the game don't need to do anything, since the game is suspended when its connection drops.
+
+        Args:
+            game_id (str): The ID of the game.
+            field_service (FieldService): The field of the game.
+        """
+
+    def close(self) -> None:
+        """Releases the resources held by the store."""
+
+    @property
+    @abstractmethod
+    def metrics(self) -> dict:
+        """The counters describing the store."""
+
+
+class InMemoryGameStore(GameStore):
+    def __init__(self, max_games: int = 10000, ttl: float = 1800, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Initialises an empty in-process store of suspended games, kept in least recently used order.
+
+        Args:
+            max_games (int, optional): How many games to keep at most. Defaults to 10000.
+            ttl (float, optional): How long a game can stay idle before it's dropped, in seconds. Defaults to 1800.
+            max_bytes (int, optional): How much memory the snapshots can take up at most. Defaults to 64 MiB.
+        """
+        self.max_games = max_games
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.snapshots: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.n_bytes = 0
+        self.evicted = 0
+
+    def save(self, game_id: str, field_service: FieldService) -> None:
+        self.discard(game_id=game_id)
+        snapshot = field_service.to_snapshot()
+        self.snapshots[game_id] = (time.monotonic(), snapshot)
+        self.n_bytes += len(snapshot)
+        self.evict()
+
+    def restore(self, game_id: str) -> FieldService | None:
+        self.evict()
+        entry = self.snapshots.pop(game_id, None)
+        if entry is None:
+            return None
+
+        _, snapshot = entry
+        self.n_bytes -= len(snapshot)
+        return FieldService.from_snapshot(snapshot)
+
+    def discard(self, game_id: str) -> None:
+        entry = self.snapshots.pop(game_id, None)
+        if entry is not None:
+            self.n_bytes -= len(entry[1])
+
+    def evict(self) -> None:
+        """Drops the games that have been idle for too long, then the least recently used ones
+        until the store fits both the game count and the memory limits."""
+        expired_before = time.monotonic() - self.ttl
+        while self.snapshots:
+            game_id, (saved_at, snapshot) = next(iter(self.snapshots.items()))
+            if saved_at > expired_before and len(self.snapshots) <= self.max_games and self.n_bytes <= self.max_bytes:
+                break
+            del self.snapshots[game_id]
+            self.n_bytes -= len(snapshot)
+            self.evicted += 1
+
+    @property
+    def metrics(self) -> dict:
+        return {"games": len(self.snapshots), "bytes": self.n_bytes, "evicted": self.evicted}
+
+
+class SQLiteGameStore(GameStore):
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 1800,
+        flush_interval: float = 0.5,
+        batch_size: int = 256,
+        checkpoint_interval: float = 5,
+    ) -> None:
+        """Initialises a store of games in an SQLite database, which can be shared by several instances
+        through a common file system.
+
+        Writes are batched behind the game: saving a game only takes its snapshot and queues it, replacing
+        the previously queued snapshot of the same game. A background thread writes the queue in a single
+        transaction every `flush_interval` seconds, or as soon as `batch_size` games are waiting.
+        Reads for resumed games run in a thread of their own as well, so a slow disk doesn't block the event loop.
+
+        A game that is still being played is checkpointed at most once every `checkpoint_interval` seconds,
+        since taking a snapshot compresses the whole field. Suspending a game always saves it.
+
+        Args:
+            path (str): The path to the database file.
+            ttl (float, optional): How long a game can stay idle before it's dropped, in seconds. Defaults to 1800.
+            flush_interval (float, optional): How often to write the queued games, in seconds. Defaults to 0.5.
+            batch_size (int, optional): How many queued games trigger an early write. Defaults to 256.
+            checkpoint_interval (float, optional): How often a game that is being played is written,
+                in seconds. Defaults to 5.
+        """
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS games "
+            "(game_id TEXT PRIMARY KEY, saved_at REAL NOT NULL, snapshot BLOB NOT NULL)"
+        )
+        self.connection_lock = threading.Lock()
+
+        self.pending: dict[str, tuple[float, bytes] | None] = {}
+        self.pending_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+
+        self.checkpointed: dict[str, float] = {}
+        self.flushed = 0
+        self.batches = 0
+        self.skipped = 0
+
+        self.writer = threading.Thread(target=self.write_behind, name="game-store-writer", daemon=True)
+        self.writer.start()
+        self.reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="game-store-reader")
+
+    def save(self, game_id: str, field_service: FieldService) -> None:
+        self.checkpointed.pop(game_id, None)
+        self.queue(game_id=game_id, entry=(time.time(), field_service.to_snapshot()))
+
+    def checkpoint(self, game_id: str, field_service: FieldService) -> None:
+        now = time.monotonic()
+        if now - self.checkpointed.get(game_id, -math.inf) < self.checkpoint_interval:
+            self.skipped += 1
+            return
+
+        self.checkpointed[game_id] = now
+        self.queue(game_id=game_id, entry=(time.time(), field_service.to_snapshot()))
+
+    def restore(self, game_id: str) -> FieldService | None:
+        with self.pending_lock:
+            queued = game_id in self.pending
+            entry = self.pending.get(game_id)
+
+        if not queued:
+            with self.connection_lock:
+                row = self.connection.execute(
+                    "SELECT saved_at, snapshot FROM games WHERE game_id = ?", (game_id,)
+                ).fetchone()
+            entry = (row[0], row[1]) if row else None
+
+        if entry is None or entry[0] < time.time() - self.ttl:
+            return None
+        return FieldService.from_snapshot(entry[1])
+
+    async def restore_async(self, game_id: str) -> FieldService | None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.reader, self.restore, game_id)
+
+    def discard(self, game_id: str) -> None:
+        self.checkpointed.pop(game_id, None)
+        self.queue(game_id=game_id, entry=None)
+
+    def queue(self, game_id: str, entry: tuple[float, bytes] | None) -> None:
+        """Queues a write of a game, or its removal if there's no entry, waking the writer up if the batch is full.
+
+        Args:
+            game_id (str): The ID of the game.
+            entry (tuple[float, bytes] | None): The time the game was saved at and its snapshot.
+        """
+        with self.pending_lock:
+            self.pending[game_id] = entry
+            n_pending = len(self.pending)
+        if n_pending >= self.batch_size:
+            self.wakeup.set()
+
+    def write_behind(self) -> None:
+        """Writes the queued games until the store is closed. Runs in the writer thread."""
+        while not self.closed:
+            self.wakeup.wait(timeout=self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as error:
+                logger.error(f"Failed to write games to the store: {error}")
+
+    def flush(self) -> None:
+        """Writes all the queued games in a single transaction and drops the expired ones."""
+        with self.pending_lock:
+            pending, self.pending = self.pending, {}
+
+        saved = [(game_id, entry[0], entry[1]) for game_id, entry in pending.items() if entry is not None]
+        discarded = [(game_id,) for game_id, entry in pending.items() if entry is None]
+
+        with self.connection_lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?)", saved)
+                self.connection.executemany("DELETE FROM games WHERE game_id = ?", discarded)
+                self.connection.execute("DELETE FROM games WHERE saved_at < ?", (time.time() - self.ttl,))
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                with self.pending_lock:
+                    for game_id, entry in pending.items():
+                        self.pending.setdefault(game_id, entry)
+                raise
+
+        if pending:
+            self.flushed += len(pending)
+            self.batches += 1
+
+    def close(self) -> None:
+        self.closed = True
+        self.reader.shutdown()
+        self.wakeup.set()
+        self.writer.join()
+        self.flush()
+        self.connection.close()
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "skipped_checkpoints": self.skipped,
+        }
+
+
+def create_game_store() -> GameStore:
+    """Creates the game store chosen in the settings.
+
+    Returns:
+        GameStore: The in-process store, or the SQLite one if `GAME_STORE` is `sqlite`.
+    """
+    if settings.GAME_STORE == "sqlite":
+        return SQLiteGameStore(
+            path=settings.GAME_STORE_PATH,
+            ttl=settings.SESSION_TTL,
+            checkpoint_interval=settings.GAME_STORE_CHECKPOINT_INTERVAL,
+        )
+    return InMemoryGameStore(
+        max_games=settings.SESSION_MAX_GAMES,
+        ttl=settings.SESSION_TTL,
+        max_bytes=settings.SESSION_MAX_BYTES,
+    )
+
+
+game_store = create_game_store()
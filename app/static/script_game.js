@@ -1,18 +1,31 @@
 const protocol = window.location.protocol === "https:" ? "wss://" : "ws://";
-const websocket = new WebSocket(`${protocol}${window.location.host}/ws/play/`);
+let websocket = null;
 let firstClick = true;
 let remainingMines = 0;
+let columnCount = 0;
+let gameId = null;
+let gameFinished = false;
+let rowCount = 0;
+let viewportTimeout = null;
+
+const CELL_SIZE = 24;
+
+const STATUSES = ["okay", "game_over", "win"];
+const CATEGORIES = ["empty", "open1", "open2", "open3", "open4", "open5", "open6", "open7", "open8", "mine", "oops", "flag", "hint"];
 
 function getGameSettings() {
     let table = document.querySelector("table");
     let rows = parseInt(table.classList.value.match(/rows(\d+)/)[1]);
     let columns = parseInt(table.classList.value.match(/columns(\d+)/)[1]);
     let mines = parseInt(table.classList.value.match(/mines(\d+)/)[1]);
+    let noGuess = table.classList.contains("no-guess");
 
     remainingMines = mines;
+    rowCount = rows;
+    columnCount = columns;
     updateMineCounter();
 
-    return { rows, columns, mines };
+    return { rows, columns, mines, noGuess };
 };
 
 function updateMineCounter() {
@@ -36,7 +49,11 @@ function processCellClick(event) {
             start: [row, column],
             mines: settings.mines,
             height: settings.rows,
-            width: settings.columns
+            width: settings.columns,
+            protocol: "binary",
+            no_guess: settings.noGuess,
+            stream: true,
+            viewport: getViewport()
         }));
         firstClick = false;
     } else {
@@ -91,17 +108,59 @@ function processCellRightClick(event) {
     }
 };
 
+function getViewport() {
+    // The rows and columns of the board that are visible in the window, inclusive, as [top, left, bottom, right].
+    let rect = document.querySelector("table").getBoundingClientRect();
+    let clamp = (value, count) => Math.min(Math.max(value, 0), count - 1);
+    return [
+        clamp(Math.floor(-rect.top / CELL_SIZE), rowCount),
+        clamp(Math.floor(-rect.left / CELL_SIZE), columnCount),
+        clamp(Math.floor((window.innerHeight - rect.top) / CELL_SIZE), rowCount),
+        clamp(Math.floor((window.innerWidth - rect.left) / CELL_SIZE), columnCount)
+    ];
+};
+
+function reportViewport() {
+    // Large reveals are streamed starting from the visible cells, so the server is told where the player looks.
+    clearTimeout(viewportTimeout);
+    viewportTimeout = setTimeout(() => {
+        if (!firstClick && !gameFinished && websocket.readyState === WebSocket.OPEN) {
+            websocket.send(JSON.stringify({ type: "viewport", viewport: getViewport() }));
+        }
+    }, 200);
+};
+
+function requestHint() {
+    if (!firstClick && !gameFinished) {
+        websocket.send(JSON.stringify({ type: "hint" }));
+    }
+};
+
+function showHint(cells) {
+    if (!cells.length) {
+        alert("No cell is certainly safe, you'll have to guess!");
+        return;
+    }
+    document.querySelectorAll(".cell.hint").forEach((cell) => cell.classList.remove("hint"));
+    cells.forEach(({ row, column }) => {
+        let cell = document.querySelector(`.cell[data-row="${row}"][data-column="${column}"]`);
+        if (cell) {
+            cell.classList.add("hint");
+        }
+    });
+};
+
 function updateClass(cells, cell_class) {
     cells.forEach(({ row, column }) => {
         let cell = document.querySelector(`.cell.closed[data-row="${row}"][data-column="${column}"]`);
         if (cell) {
-            cell.classList.remove("closed");
+            cell.classList.remove("closed", "hint");
             cell.classList.add(cell_class);
             cell.removeAttribute("onclick");
-            if (cell_class !== "empty") {
-                cell.addEventListener("dblclick", processCellDoubleClick);
-            } else {
+            if (cell_class === "empty") {
                 cell.disabled = true;
+            } else if (cell_class !== "flag") {
+                cell.addEventListener("dblclick", processCellDoubleClick);
             }
         }
     });
@@ -109,19 +168,99 @@ function updateClass(cells, cell_class) {
 
 function updateBoard(cells) {
     Object.entries(cells).forEach(([cellClass, cellList]) => {
-        updateClass(cellList, cellClass);
+        if (cellClass === "hint") {
+            showHint(cellList);
+        } else {
+            updateClass(cellList, cellClass);
+        }
     });
 };
 
+function describeStats(stats) {
+    if (!stats) {
+        return "";
+    }
+    return `\n\nClicks: ${stats.clicks}, chords: ${stats.chords}, flags: ${stats.flags}\n` +
+        `Cells revealed: ${stats.cells_revealed} (at most ${stats.largest_reveal} at once)`;
+};
+
+function connect() {
+    websocket = new WebSocket(`${protocol}${window.location.host}/ws/play/`);
+    websocket.binaryType = "arraybuffer";
+    websocket.onmessage = processMessage;
+
+    websocket.onopen = function() {
+        if (gameId) {
+            console.log("Resuming the game...");
+            websocket.send(JSON.stringify({
+                type: "resume", game_id: gameId, protocol: "binary", stream: true, viewport: getViewport()
+            }));
+        }
+    };
+
+    websocket.onclose = function() {
+        if (gameId && !gameFinished) {
+            setTimeout(connect, 1000);
+        }
+    };
+};
+
 document.addEventListener("DOMContentLoaded", () => {
     getGameSettings();
 });
+window.addEventListener("scroll", reportViewport);
+window.addEventListener("resize", reportViewport);
+
+connect();
+
+function decodeBinary(buffer) {
+    // Mirrors encode_binary in app/services/protocol.py: a status byte, the number of cell groups,
+    // then for every group a category byte, a cell count and varint deltas of sorted flat indices.
+    let data = new Uint8Array(buffer);
+    let offset = 0;
 
-websocket.onmessage = function(event) {
-    let message = JSON.parse(event.data);
+    function readVarint() {
+        let value = 0;
+        let shift = 0;
+        let byte;
+        do {
+            byte = data[offset++];
+            value += (byte & 0x7f) * 2 ** shift;
+            shift += 7;
+        } while (byte >= 0x80);
+        return value;
+    }
+
+    let message = { status: STATUSES[data[offset++]], cells: {} };
+    let groupCount = data[offset++];
+    for (let group = 0; group < groupCount; group++) {
+        let cells = message.cells[CATEGORIES[data[offset++]]] = [];
+        let cellCount = readVarint();
+        let index = 0;
+        for (let cell = 0; cell < cellCount; cell++) {
+            index += readVarint();
+            cells.push({ row: Math.floor(index / columnCount), column: index % columnCount });
+        }
+    }
+
+    if (offset < data.length) {
+        Object.assign(message, JSON.parse(new TextDecoder().decode(data.subarray(offset))));
+    }
+    return message;
+};
+
+function processMessage(event) {
+    let message = event.data instanceof ArrayBuffer ? decodeBinary(event.data) : JSON.parse(event.data);
     console.log("Received result", message);
 
     if (message !== null) {
+        if (message.game_id) {
+            gameId = message.game_id;
+        }
+        if (message.error || message.status === "game_over" || message.status === "win") {
+            gameFinished = true;
+        }
+
         if (message.error) {
             console.error("Error:", message.error);
             alert(`Error: ${message.error}`);
@@ -129,10 +268,10 @@ websocket.onmessage = function(event) {
             window.location.href = "/";
         } else if (message.status === "game_over") {
             updateBoard(message.cells);
-            alert("Game Over!");
+            alert(`Game Over!${describeStats(message.stats)}`);
             websocket.close(1000, "Game Over");
         } else if (message.status === "win") {
-            alert("You won!");
+            alert(`You won!${describeStats(message.stats)}`);
             websocket.close(1000, "Game Won");
         } else {
             updateBoard(message.cells);
@@ -0,0 +1,49 @@
+"""Compares the pure Python and the NumPy neighbour counting when generating a board.
+
+Both variants share the same seeded mine placement, so they produce the same field.
+
+Run with `python -m benchmarks.board_generation` (requires NumPy).
+"""
+
+import random
+import time
+
+from app.services import FieldService
+
+BOARDS = [(9, 9, 10), (16, 30, 99), (24, 30, 160), (1000, 1000, 200000)]
+
+
+def generate(height: int, width: int, n_mines: int, use_numpy: bool) -> tuple[float, bytearray]:
+    """Generates a board with the same seed every time.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        use_numpy (bool): Whether to count the neighbouring mines with NumPy.
+
+    Returns:
+        tuple[float, bytearray]: The time the generation took, in seconds, and the generated field.
+    """
+    started = time.perf_counter()
+    rng = random.Random(0)
+    mine_positions = rng.sample(range(height * width), k=n_mines)
+    field = FieldService.create_field(height=height, width=width, mine_positions=mine_positions, use_numpy=use_numpy)
+    return time.perf_counter() - started, field
+
+
+def main() -> None:
+    print(f"{'board':>11} {'mines':>7} {'python, ms':>11} {'numpy, ms':>10} {'same field':>11}")
+    for height, width, n_mines in BOARDS:
+        repeats = max(1, 100_000 // (height * width))
+        python_time, python_field = min(generate(height, width, n_mines, use_numpy=False) for _ in range(repeats))
+        numpy_time, numpy_field = min(generate(height, width, n_mines, use_numpy=True) for _ in range(repeats))
+
+        print(
+            f"{f'{height}×{width}':>11} {n_mines:>7} {python_time * 1e3:>11.3f} {numpy_time * 1e3:>10.3f} "
+            f"{str(python_field == numpy_field):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Compares the chord engine with the chord it replaced, on the dense Hard and Extreme boards.
+
+The replaced chord checked every closed neighbour on its own, starting a flood fill from each empty one
+that walked through the cells already opened, and concatenated the results, so overlapping areas
+were opened and sent more than once. The chord engine counts the flags in the neighbourhood first
+and opens all of the closed neighbours with a single fill that only collects newly opened cells.
+
+The chords are taken from seeded games in which every mine next to an opened cell is flagged, and every
+opened number that still has closed neighbours can be chorded. Both chords are applied to the same positions,
+restored from snapshots, and have to leave the fields in the same state.
+
+Run with `python -m benchmarks.chord`.
+"""
+
+import json
+import random
+import statistics
+import time
+
+from app.core import GAME_MODES
+from app.schemas import Cell, CellCollection, GameResponse
+from app.services import FieldService
+from app.services.field import FLAGGED, MINE, OPENED
+from app.services.protocol import encode_binary
+
+MODES = ["Hard: 30×16, 99 mines", "Extreme: 24×30, 160 mines"]
+N_GAMES = 100
+
+
+def legacy_chord(field_service: FieldService, index: int) -> GameResponse | None:
+    """Chords a cell the way `check_neighbouring_cells` used to: every closed neighbour is checked
+    with `check_index` before the flags are compared with the value of the cell, and the results are merged.
+
+    Args:
+        field_service (FieldService): The field.
+        index (int): The flat index of the chorded cell.
+
+    Returns:
+        GameResponse | None: The result of the chord.
+    """
+    n_flagged_neighbours = 0
+    neighbour_checks: list[CellCollection] = []
+    failed_neighbour_check = None
+    for neighbour in field_service.get_cell_neighbours(index=index):
+        neighbour_state = field_service.state[neighbour]
+        if neighbour_state & OPENED:
+            continue
+        elif neighbour_state & FLAGGED:
+            n_flagged_neighbours += 1
+            continue
+
+        neighbour_check = field_service.check_index(index=neighbour)
+        if neighbour_check:
+            if neighbour_check.status == "game_over" and not failed_neighbour_check:
+                failed_neighbour_check = neighbour_check
+            if neighbour_check.cells:
+                neighbour_checks.append(neighbour_check.cells)
+
+    if n_flagged_neighbours < field_service.field[index]:
+        return None
+    elif failed_neighbour_check:
+        return failed_neighbour_check
+
+    merged_opened_cells = CellCollection()
+    for cells in neighbour_checks:
+        for key, value in cells.items:
+            merged_opened_cells[key] += value
+    return GameResponse(status="okay", cells=merged_opened_cells)
+
+
+def record_positions(height: int, width: int, n_mines: int, seed: int) -> list[tuple[bytes, int]]:
+    """Plays a single game by chords, flagging every mine next to an opened cell first, and clicking
+    a random closed safe cell whenever there's nothing to chord.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        seed (int): The seed of the game and of the moves.
+
+    Returns:
+        list[tuple[bytes, int]]: The snapshot of the field before every chord and the flat index of the chorded cell.
+    """
+    rng = random.Random(seed)
+    start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+    field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, seed=seed)
+    field_service.check_cell(cell=start)
+
+    positions = []
+    while not field_service.check_win():
+        chordable = []
+        for index, cell_state in enumerate(field_service.state):
+            if not cell_state & OPENED or not field_service.field[index]:
+                continue
+            neighbours = field_service.get_cell_neighbours(index=index)
+            if any(not field_service.state[neighbour] & (OPENED | FLAGGED) for neighbour in neighbours):
+                chordable.append(index)
+                for neighbour in neighbours:
+                    if field_service.field[neighbour] == MINE:
+                        field_service.state[neighbour] |= FLAGGED
+
+        if chordable:
+            index = rng.choice(chordable)
+            positions.append((field_service.to_snapshot(), index))
+            field_service.check_neighbouring_cells(cell=field_service.calculate_cell(index))
+        else:
+            closed = [
+                index
+                for index, cell_value in enumerate(field_service.field)
+                if cell_value != MINE and not field_service.state[index] & OPENED
+            ]
+            field_service.check_cell(cell=field_service.calculate_cell(rng.choice(closed)))
+    return positions
+
+
+def measure(snapshot: bytes, index: int) -> tuple[list[float], list[int], list[bytes]]:
+    """Applies the replaced chord and the chord engine to the same position.
+
+    Args:
+        snapshot (bytes): The snapshot of the field before the chord.
+        index (int): The flat index of the chorded cell.
+
+    Returns:
+        tuple[list[float], list[int], list[bytes]]: The time of every chord, in seconds, the number of cells
+            in its response and its JSON and binary messages, for the replaced chord and then for the engine.
+    """
+    legacy_field = FieldService.from_snapshot(snapshot)
+    started = time.perf_counter()
+    legacy_result = legacy_chord(legacy_field, index=index)
+    legacy_time = time.perf_counter() - started
+
+    engine_field = FieldService.from_snapshot(snapshot)
+    started = time.perf_counter()
+    engine_result = engine_field.chord_index(index=index)
+    engine_time = time.perf_counter() - started
+
+    assert legacy_result is not None and engine_result is not None and engine_result.cells is not None
+    assert legacy_field.state == engine_field.state
+    engine_cells = [cell for _, cells in engine_result.cells.items for cell in cells]
+    assert len(engine_cells) == len(set(engine_cells))
+
+    times, n_cells, messages = [], [], []
+    for result, elapsed in ((legacy_result, legacy_time), (engine_result, engine_time)):
+        assert result.cells is not None
+        times.append(elapsed)
+        n_cells.append(sum(len(cells) for _, cells in result.cells.items))
+        messages.append(json.dumps(result.model_dump(), separators=(",", ":")).encode())
+        messages.append(encode_binary(result, width=engine_field.width))
+    return times, n_cells, messages
+
+
+def main() -> None:
+    print(
+        f"{'mode':>26} {'chords':>7} {'':>8} {'p50, µs':>8} {'p99, µs':>8} "
+        f"{'cells':>6} {'json, B':>8} {'binary, B':>10}"
+    )
+    for name in MODES:
+        height, width, n_mines = GAME_MODES[name]
+        positions = [
+            position for seed in range(N_GAMES) for position in record_positions(height, width, n_mines, seed=seed)
+        ]
+
+        times: list[list[float]] = [[], []]
+        n_cells: list[list[int]] = [[], []]
+        message_sizes: list[list[int]] = [[], [], [], []]
+        n_resent = 0
+        for snapshot, index in positions:
+            position_times, position_cells, messages = measure(snapshot, index=index)
+            for engine in range(2):
+                times[engine].append(position_times[engine])
+                n_cells[engine].append(position_cells[engine])
+            for number, message in enumerate(messages):
+                message_sizes[number].append(len(message))
+            n_resent += position_cells[0] > position_cells[1]
+
+        for engine, label in enumerate(("replaced", "engine")):
+            percentiles = statistics.quantiles(times[engine], n=100)
+            print(
+                f"{name if engine == 0 else '':>26} {len(positions) if engine == 0 else '':>7} {label:>8} "
+                f"{statistics.median(times[engine]) * 1e6:>8.1f} {percentiles[98] * 1e6:>8.1f} "
+                f"{statistics.mean(n_cells[engine]):>6.1f} {statistics.mean(message_sizes[2 * engine]):>8.0f} "
+                f"{statistics.mean(message_sizes[2 * engine + 1]):>10.0f}"
+            )
+        print(f"{'':>26} {'':>7} chords that sent opened cells again: {n_resent / len(positions):.1%}")
+
+
+if __name__ == "__main__":
+    main()
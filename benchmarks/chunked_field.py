@@ -0,0 +1,85 @@
+"""Compares the memory and the first click latency of the regular and the chunked fields on huge boards,
+and shows that the memory of a chunked field grows with the revealed area rather than with the board.
+
+All boards have 20% of mines and the first click in the middle. The memory is what `tracemalloc` sees
+allocated after the first click, so it includes the cells, the mines and the response.
+The regular field is only measured up to 2000×2000.
+
+Run with `python -m benchmarks.chunked_field`.
+"""
+
+import time
+import tracemalloc
+
+from app.schemas import Cell
+from app.services import ChunkedFieldService, FieldService
+from app.services.field import OPENED
+
+SIDES = [1000, 2000, 4000, 8000]
+MAX_REGULAR_SIDE = 2000
+SQUARES = [64, 128, 256, 512]
+
+
+def measure(field_class: type[FieldService], side: int) -> tuple[float, int]:
+    """Creates a field and clicks in its middle, once timed and once with the memory traced.
+
+    Args:
+        field_class (type[FieldService]): The field to measure.
+        side (int): Height and width of the field.
+
+    Returns:
+        tuple[float, int]: The time until the first click was answered, in seconds, and the memory it took, in bytes.
+    """
+    start = Cell(row=side // 2, column=side // 2)
+
+    started = time.perf_counter()
+    field_service = field_class(start=start, n_mines=side * side // 5, height=side, width=side, seed=0)
+    field_service.check_cell(cell=start)
+    elapsed = time.perf_counter() - started
+    del field_service
+
+    tracemalloc.start()
+    field_service = field_class(start=start, n_mines=side * side // 5, height=side, width=side, seed=0)
+    field_service.check_cell(cell=start)
+    n_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, n_bytes
+
+
+def main() -> None:
+    print(f"{'board':>11} {'regular, ms':>12} {'regular, KiB':>13} {'chunked, ms':>12} {'chunked, KiB':>13}")
+    for side in SIDES:
+        chunked_time, chunked_bytes = measure(ChunkedFieldService, side=side)
+        if side <= MAX_REGULAR_SIDE:
+            regular_time, regular_bytes = measure(FieldService, side=side)
+            regular = f"{regular_time * 1e3:>12.1f} {regular_bytes / 1024:>13.0f}"
+        else:
+            regular = f"{'—':>12} {'—':>13}"
+        print(f"{f'{side}×{side}':>11} {regular} {chunked_time * 1e3:>12.1f} {chunked_bytes / 1024:>13.0f}")
+
+    side = SIDES[-1]
+    print(f"\nOpening every safe cell of a growing square in the middle of a chunked {side}×{side} board:")
+    print(f"{'square':>9} {'revealed':>9} {'tiles':>6} {'field, KiB':>11} {'B/revealed cell':>16} {'µs/cell':>8}")
+    start = Cell(row=side // 2, column=side // 2)
+    field_service = ChunkedFieldService(start=start, n_mines=side * side // 5, height=side, width=side, seed=0)
+    field_service.check_cell(cell=start)
+
+    for square in SQUARES:
+        first = side // 2 - square // 2
+        started = time.perf_counter()
+        for row in range(first, first + square):
+            for index in range(row * side + first, row * side + first + square):
+                if not field_service.state[index] & OPENED and not field_service.is_mine(index=index):
+                    field_service.check_index(index=index)
+        elapsed = time.perf_counter() - started
+
+        n_revealed = side * side - side * side // 5 - field_service.safe_cells_left
+        print(
+            f"{f'{square}×{square}':>9} {n_revealed:>9} {len(field_service.field.tiles):>6} "
+            f"{field_service.n_bytes / 1024:>11.0f} {field_service.n_bytes / n_revealed:>16.1f} "
+            f"{elapsed / (square * square) * 1e6:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
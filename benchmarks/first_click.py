@@ -0,0 +1,42 @@
+"""Measures the first click latency — creating the field — with and without a pre-generated board.
+
+Run with `python -m benchmarks.first_click`.
+"""
+
+import random
+import statistics
+import time
+
+from app.core import GAME_MODES
+from app.schemas import Cell
+from app.services import FieldService
+
+N_GAMES = 1000
+
+
+def main() -> None:
+    print(f"{'mode':>27} {'fresh p50, µs':>14} {'fresh p99, µs':>14} {'pooled p50, µs':>15} {'pooled p99, µs':>15}")
+    for name, (height, width, n_mines) in GAME_MODES.items():
+        starts = [Cell(row=random.randrange(height), column=random.randrange(width)) for _ in range(N_GAMES)]
+        boards = [FieldService.generate_board(height=height, width=width, n_mines=n_mines) for _ in range(N_GAMES)]
+
+        fresh, pooled = [], []
+        for start, board in zip(starts, boards):
+            started = time.perf_counter()
+            FieldService(start=start, n_mines=n_mines, height=height, width=width)
+            fresh.append((time.perf_counter() - started) * 1e6)
+
+            started = time.perf_counter()
+            FieldService(start=start, n_mines=n_mines, height=height, width=width, board=board)
+            pooled.append((time.perf_counter() - started) * 1e6)
+
+        fresh_quantiles = statistics.quantiles(fresh, n=100)
+        pooled_quantiles = statistics.quantiles(pooled, n=100)
+        print(
+            f"{name:>27} {fresh_quantiles[49]:>14.1f} {fresh_quantiles[98]:>14.1f} "
+            f"{pooled_quantiles[49]:>15.1f} {pooled_quantiles[98]:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Measures how the flood fill scales with the size of the opened area.
+
+Each board has mine walls in every ninth column, open at the top, so a click in the corner
+floods almost the whole board in one go.
+
+Run with `python -m benchmarks.flood_fill`.
+"""
+
+import time
+
+from app.schemas import Cell
+from app.services import FieldService
+
+SIDES = [100, 250, 500, 1000, 1500, 2000]
+
+
+def create_comb_field(side: int) -> FieldService:
+    """Creates a square field with a single huge empty area.
+
+    Args:
+        side (int): Height and width of the field.
+
+    Returns:
+        FieldService: The field with mine walls in every ninth column, starting from the fourth row.
+    """
+    field_service = FieldService(start=Cell(row=0, column=0), n_mines=side * side // 10, height=side, width=side)
+    field_service.mines = [row * side + column for row in range(3, side) for column in range(8, side, 9)]
+    field_service.field = field_service.create_field(height=side, width=side, mine_positions=field_service.mines)
+    return field_service
+
+
+def main() -> None:
+    print(f"{'board':>11} {'cells':>9} {'flooded':>9} {'seconds':>9} {'ns/cell':>9}")
+    for side in SIDES:
+        field_service = create_comb_field(side=side)
+
+        started = time.perf_counter()
+        collected = field_service.flood_neighbouring_cells(index=0)
+        elapsed = time.perf_counter() - started
+
+        n_flooded = sum(len(indices) for indices in collected.values())
+        print(
+            f"{f'{side}×{side}':>11} {side * side:>9} {n_flooded:>9} {elapsed:>9.3f} {elapsed / n_flooded * 1e9:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Measures the per-click overhead of the game logs: Extreme games played by the hints, one at a time,
+with the per-click lines gated off by the level, logged for every game and logged for a sample of the games.
+The lines go through a handler writing to /dev/null, so the formatting is paid but not the terminal.
+
+Also compares formatting a whole result, as the logs used to, with summarizing it, for reveals of different sizes.
+
+Run with `python -m benchmarks.game_logging`.
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from loguru import logger
+
+from app.core import settings
+from app.core.logs import summarize
+from app.schemas import Cell, GameResponse
+from app.services import FieldService, GameService
+from benchmarks.offload import LoopbackWebSocket, request
+
+N_GAMES = 50
+MODE = (24, 30, 160)
+REVEAL_SIZES = [10, 100, 1000, 10000]
+N_FORMATS = 20
+
+
+async def play_games(seed: int) -> tuple[float, int]:
+    """Plays games by the hints until they are won or the hints run out.
+
+    Args:
+        seed (int): The seed of the first clicks.
+
+    Returns:
+        tuple[float, int]: The total time of the games, in seconds, and the number of messages answered.
+    """
+    rng = random.Random(seed)
+    height, width, n_mines = MODE
+    elapsed, n_messages = 0.0, 0
+    for _ in range(N_GAMES):
+        websocket, game_service = LoopbackWebSocket(), GameService()
+        game = asyncio.create_task(game_service.start_game(websocket=websocket))  # type: ignore[arg-type]
+        start = [rng.randrange(height), rng.randrange(width)]
+        answer, latency = await request(
+            websocket, {"type": "start", "start": start, "mines": n_mines, "height": height, "width": width}
+        )
+        elapsed, n_messages = elapsed + latency, n_messages + 1
+
+        while answer["status"] == "okay":
+            assert game_service.field_service is not None
+            if game_service.field_service.check_win():
+                break
+            answer, latency = await request(websocket, {"type": "hint"})
+            elapsed, n_messages = elapsed + latency, n_messages + 1
+            if not answer["cells"]["hint"]:
+                break
+
+            cell = answer["cells"]["hint"][0]
+            answer, latency = await request(websocket, {"type": "click", "cell": [cell["row"], cell["column"]]})
+            elapsed, n_messages = elapsed + latency, n_messages + 1
+        game.cancel()
+    return elapsed, n_messages
+
+
+def measure_formatting(n_cells: int) -> tuple[float, float]:
+    """Times formatting a result that reveals the given number of cells, whole and summarized.
+
+    Args:
+        n_cells (int): The number of revealed cells, split between the empty cells and the numbers.
+
+    Returns:
+        tuple[float, float]: The time of formatting the whole result and of summarizing it, in seconds.
+    """
+    field_service = FieldService(start=Cell(row=0, column=0), n_mines=1700, height=128, width=128)
+    groups = {"empty": list(range(0, n_cells, 2)), "open1": list(range(1, n_cells, 2))}
+    result = GameResponse(status="okay", cells=field_service.build_collection(groups))
+
+    started = time.perf_counter()
+    for _ in range(N_FORMATS):
+        f"Sending the result: {result}"
+    whole = (time.perf_counter() - started) / N_FORMATS
+
+    started = time.perf_counter()
+    for _ in range(N_FORMATS):
+        f"Sending the result: {summarize(result)}"
+    summarized = (time.perf_counter() - started) / N_FORMATS
+    return whole, summarized
+
+
+def main() -> None:
+    devnull = open(os.devnull, "w")
+    print(f"{'per-click lines':>22} {'messages':>9} {'µs/message':>11}")
+    for name, level, sample_rate in [
+        ("off by the level", "INFO", 1.0),
+        ("every game", "DEBUG", 1.0),
+        ("10% of the games", "DEBUG", 0.1),
+    ]:
+        settings.LOG_LEVEL, settings.GAME_LOG_SAMPLE_RATE = level, sample_rate
+        logger.remove()
+        logger.add(devnull, level=level)
+        elapsed, n_messages = asyncio.run(play_games(seed=0))
+        print(f"{name:>22} {n_messages:>9} {elapsed / n_messages * 1e6:>11.1f}")
+    devnull.close()
+
+    print(f"\n{'revealed cells':>15} {'whole, µs':>10} {'summary, µs':>12}")
+    for n_cells in REVEAL_SIZES:
+        whole, summarized = measure_formatting(n_cells)
+        print(f"{n_cells:>15} {whole * 1e6:>10.0f} {summarized * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
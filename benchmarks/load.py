@@ -0,0 +1,451 @@
+"""Load test of a single server: how many games can be played at the same time before the latency degrades.
+
+A server running `app.main:app` is started on the same event loop as the players, with its board pool,
+no-guess generator and execution policy set up as usual. For every concurrency level, that many players keep
+playing games of a preset mode through `/ws/play/`, each game on a new connection, for a while. At the end
+of the level, the games still being played are abandoned and their connections closed, and only the games
+played to the end count in the games per second. A player
+only knows what it was sent: it flags the closed neighbours of a number that can only be mines, chords
+a number once all its mines are flagged, and clicks a random closed cell when neither helps, pausing to think
+between the moves. With `--probabilities`, it asks for the mine probabilities instead of clicking at random,
+and clicks the closed cell least likely to be a mine. Flags aren't answered, so only the starts, clicks, chords
+and requests for the probabilities are timed.
+
+Every level reports the connections and actions per second, the latency percentiles and a latency histogram
+in the buckets of the metrics, and then the memory taken up per game: that many games are started at once
+under `tracemalloc` and held open, both overall and in the code of `/app` alone. The players share the process
+with the server, so the numbers are a lower bound of what a worker can do on its own.
+
+With `--multiplex`, every player plays all its games on a single connection to `/ws/play/multiplex`, starting
+every game under the same key once the previous one is over, and the games held open to measure the memory
+share connections too, as many as a connection can take.
+
+Run with `python -m benchmarks.load`, e.g. `python -m benchmarks.load --mode Extreme --players 1 10 100 --think 0.1`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from functools import cache
+
+import websockets
+from loguru import logger
+
+from app.core import GAME_MODES, settings
+from app.core.metrics import LATENCY_BUCKETS
+from app.services.no_guess import percentile
+from app.services.protocol import PROTOCOLS, decode_binary, read_varint
+from benchmarks.replay import serve
+
+PLAYER_COUNTS = [1, 10, 50, 100]
+DURATION = 5.0
+THINK_TIME = 0.25
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+@cache
+def get_neighbours(height: int, width: int) -> list[list[int]]:
+    """Lists the neighbours of every cell of a board, by their flat indices.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+
+    Returns:
+        list[list[int]]: The neighbours of every cell.
+    """
+    return [
+        [
+            (row + d_row) * width + column + d_column
+            for d_row, d_column in DIRECTIONS
+            if 0 <= row + d_row < height and 0 <= column + d_column < width
+        ]
+        for row in range(height)
+        for column in range(width)
+    ]
+
+
+class Player:
+    def __init__(self, height: int, width: int, rng: random.Random, guess: bool = False) -> None:
+        """Initialises what a player knows about the board of a new game: nothing yet.
+
+        Args:
+            height (int): Height of the game field.
+            width (int): Width of the game field.
+            rng (random.Random): The random generator of the player.
+            guess (bool, optional): Whether to guess by the mine probabilities instead of at random.
+                Defaults to False.
+        """
+        self.width = width
+        self.neighbours = get_neighbours(height, width)
+        self.rng = rng
+        self.guess = guess
+        self.probabilities: list[list[float | None]] | None = None
+        self.closed = set(range(height * width))
+        self.numbers: dict[int, int] = {}
+        self.flags: set[int] = set()
+
+    def see(self, answer: dict) -> None:
+        """Takes in the cells opened by an answer, or the mine probabilities.
+
+        Args:
+            answer (dict): The answer, decoded.
+        """
+        self.probabilities = answer.get("probabilities")
+        for key, cells in (answer.get("cells") or {}).items():
+            if key != "empty" and not key.startswith("open"):
+                continue
+            value = 0 if key == "empty" else int(key[4:])
+            for cell in cells:
+                index = cell["row"] * self.width + cell["column"]
+                self.closed.discard(index)
+                if value:
+                    self.numbers[index] = value
+
+    def choose(self) -> list[dict]:
+        """Chooses the next move: the flags that are certain, a chord that is safe, or a click on a random cell
+        or on the cell least likely to be a mine, once the probabilities have been asked for.
+
+        Returns:
+            list[dict]: The messages of the move. Only the last one is answered.
+        """
+        for number, value in list(self.numbers.items()):
+            closed = [index for index in self.neighbours[number] if index in self.closed]
+            unflagged = [index for index in closed if index not in self.flags]
+            if not unflagged:
+                del self.numbers[number]
+            elif len(closed) == value:
+                self.flags.update(unflagged)
+                flags = [{"type": "flag", "cell": divmod(index, self.width)} for index in unflagged]
+                return [*flags, {"type": "check_neighbours", "cell": divmod(number, self.width)}]
+            elif len(closed) - len(unflagged) == value:
+                return [{"type": "check_neighbours", "cell": divmod(number, self.width)}]
+
+        candidates = [index for index in self.closed if index not in self.flags]
+        probabilities = self.probabilities
+        if self.guess and probabilities is None:
+            return [{"type": "probabilities"}]
+        elif probabilities is not None:
+            width = self.width
+            index = min(
+                candidates, key=lambda index: (probabilities[index // width][index % width] or 0.0, self.rng.random())
+            )
+        else:
+            index = self.rng.choice(candidates)
+        return [{"type": "click", "cell": divmod(index, self.width)}]
+
+
+@dataclass
+class LevelStats:
+    connections: int = 0
+    games: int = 0
+    actions: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+
+async def receive(websocket: websockets.ClientConnection, protocol: str, width: int, multiplexed: bool) -> dict:
+    """Receives an answer and decodes it.
+
+    Args:
+        websocket (websockets.ClientConnection): The connection of the game.
+        protocol (str): The protocol of the game.
+        width (int): Width of the game field.
+        multiplexed (bool): Whether the connection is multiplexed, so binary answers start with the key of the game.
+
+    Returns:
+        dict: The answer.
+    """
+    message = await websocket.recv()
+    if protocol == "binary":
+        assert isinstance(message, bytes)
+        if multiplexed:
+            length, offset = read_varint(message, 0)
+            message = message[offset + length :]  # noqa: E203
+        return decode_binary(message, width=width)
+    return json.loads(message)
+
+
+async def play_game(
+    websocket: websockets.ClientConnection,
+    key: int | None,
+    mode: tuple[int, int, int],
+    protocol: str,
+    think: float,
+    guess: bool,
+    rng: random.Random,
+    stats: LevelStats,
+) -> None:
+    """Plays a game until it's won or lost.
+
+    Args:
+        websocket (websockets.ClientConnection): The connection to play on.
+        key (int | None): The key of the game on a multiplexed connection, or None if the connection is its own.
+        mode (tuple[int, int, int]): The height, the width and the number of mines of the game.
+        protocol (str): The protocol to ask for.
+        think (float): The average pause between the moves, in seconds.
+        guess (bool): Whether to guess by the mine probabilities.
+        rng (random.Random): The random generator of the player.
+        stats (LevelStats): The stats to count the game in, once it's over.
+    """
+    height, width, n_mines = mode
+    player = Player(height=height, width=width, rng=rng, guess=guess)
+    tag = {} if key is None else {"game": key}
+    move = [
+        {
+            "type": "start",
+            "start": [rng.randrange(height), rng.randrange(width)],
+            "mines": n_mines,
+            "height": height,
+            "width": width,
+            "protocol": protocol,
+        }
+    ]
+    while True:
+        started = time.perf_counter()
+        for message in move:
+            await websocket.send(json.dumps({**tag, **message}))
+        answer = await receive(websocket, protocol=protocol, width=width, multiplexed=key is not None)
+        stats.latencies.append(time.perf_counter() - started)
+        stats.actions += len(move)
+
+        player.see(answer)
+        if answer["status"] != "okay":
+            stats.games += 1
+            return
+        if len(player.closed) == n_mines:
+            await receive(websocket, protocol=protocol, width=width, multiplexed=key is not None)
+            stats.games += 1
+            return
+        if think:
+            await asyncio.sleep(rng.expovariate(1 / think))
+        move = player.choose()
+
+
+async def play_games(
+    url: str,
+    mode: tuple[int, int, int],
+    protocol: str,
+    think: float,
+    guess: bool,
+    multiplex: bool,
+    deadline: float,
+    seed: int,
+    stats: LevelStats,
+) -> None:
+    """Keeps playing games one after another until the deadline, starting at a random moment of the first pause.
+    Every game is played on a new connection, or all of them on the same multiplexed one, under the same key.
+    The game being played at the deadline is abandoned, closing its connection.
+
+    Args:
+        url (str): The URL of the websocket endpoint.
+        mode (tuple[int, int, int]): The height, the width and the number of mines of the games.
+        protocol (str): The protocol to ask for.
+        think (float): The average pause between the moves, in seconds.
+        guess (bool): Whether to guess by the mine probabilities.
+        multiplex (bool): Whether to play all the games on a single multiplexed connection.
+        deadline (float): When to stop, by `time.perf_counter`.
+        seed (int): The seed of the player.
+        stats (LevelStats): The stats to count the games in.
+    """
+    rng = random.Random(seed)
+    try:
+        async with asyncio.timeout(deadline - time.perf_counter()):
+            await asyncio.sleep(rng.uniform(0, think))
+            if multiplex:
+                async with websockets.connect(url + "multiplex", max_size=None) as websocket:
+                    stats.connections += 1
+                    while True:
+                        await play_game(
+                            websocket,
+                            key=0,
+                            mode=mode,
+                            protocol=protocol,
+                            think=think,
+                            guess=guess,
+                            rng=rng,
+                            stats=stats,
+                        )
+
+            while True:
+                async with websockets.connect(url, max_size=None) as websocket:
+                    stats.connections += 1
+                    await play_game(
+                        websocket,
+                        key=None,
+                        mode=mode,
+                        protocol=protocol,
+                        think=think,
+                        guess=guess,
+                        rng=rng,
+                        stats=stats,
+                    )
+    except TimeoutError:
+        pass
+
+
+async def measure_memory(
+    url: str, mode: tuple[int, int, int], protocol: str, multiplex: bool, n_games: int
+) -> tuple[float, float]:
+    """Starts games at once and holds them open to see how much memory they take up. The games are started
+    with a seed, so that the board pool doesn't refill itself in the meantime.
+
+    Args:
+        url (str): The URL of the websocket endpoint.
+        mode (tuple[int, int, int]): The height, the width and the number of mines of the games.
+        protocol (str): The protocol to ask for.
+        multiplex (bool): Whether to put as many games on a multiplexed connection as it can take,
+            instead of every game on a connection of its own.
+        n_games (int): The number of games.
+
+    Returns:
+        tuple[float, float]: The memory per game, in bytes, overall and in the code of `/app`.
+    """
+    height, width, n_mines = mode
+    start = {"type": "start", "start": [0, 0], "mines": n_mines, "height": height, "width": width}
+    per_connection = settings.MULTIPLEX_MAX_GAMES if multiplex else 1
+    games = [range(first, min(first + per_connection, n_games)) for first in range(0, n_games, per_connection)]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    websockets_ = [await websockets.connect(url + ("multiplex" if multiplex else ""), max_size=None) for _ in games]
+    for websocket, seeds in zip(websockets_, games):
+        for seed in seeds:
+            tag = {"game": seed} if multiplex else {}
+            await websocket.send(json.dumps({**start, **tag, "seed": seed, "protocol": protocol}))
+    for websocket, seeds in zip(websockets_, games):
+        for _ in seeds:
+            await websocket.recv()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    for websocket in websockets_:
+        await websocket.close()
+
+    differences = after.compare_to(before, "filename")
+    overall = sum(difference.size_diff for difference in differences)
+    in_app = sum(
+        difference.size_diff
+        for difference in differences
+        if "/app/" in difference.traceback[0].filename.replace("\\", "/")
+    )
+    return overall / n_games, in_app / n_games
+
+
+async def run_levels(
+    mode: tuple[int, int, int],
+    protocol: str,
+    think: float,
+    guess: bool,
+    multiplex: bool,
+    duration: float,
+    player_counts: list[int],
+) -> list[tuple[LevelStats, float, float]]:
+    """Runs every concurrency level against a server started for them.
+
+    Args:
+        mode (tuple[int, int, int]): The height, the width and the number of mines of the games.
+        protocol (str): The protocol to ask for.
+        think (float): The average pause between the moves, in seconds.
+        guess (bool): Whether the players guess by the mine probabilities.
+        multiplex (bool): Whether every player plays all its games on a single multiplexed connection.
+        duration (float): How long every level lasts, in seconds.
+        player_counts (list[int]): The numbers of players at the same time.
+
+    Returns:
+        list[tuple[LevelStats, float, float]]: The stats of every level and its memory per game,
+            overall and in the code of `/app`, in bytes.
+    """
+    levels = []
+    async with serve() as url:
+        for n_players in player_counts:
+            stats = LevelStats()
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(
+                *(
+                    play_games(
+                        url,
+                        mode=mode,
+                        protocol=protocol,
+                        think=think,
+                        guess=guess,
+                        multiplex=multiplex,
+                        deadline=deadline,
+                        seed=seed,
+                        stats=stats,
+                    )
+                    for seed in range(n_players)
+                )
+            )
+            stats.elapsed = time.perf_counter() - started
+            overall, in_app = await measure_memory(
+                url, mode=mode, protocol=protocol, multiplex=multiplex, n_games=n_players
+            )
+            levels.append((stats, overall, in_app))
+    return levels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plays many games at once against a local server.")
+    parser.add_argument("--mode", default="Extreme", help="the preset mode, by the start of its name")
+    parser.add_argument("--players", type=int, nargs="+", default=PLAYER_COUNTS, help="the concurrency levels")
+    parser.add_argument("--duration", type=float, default=DURATION, help="how long every level lasts, in seconds")
+    parser.add_argument("--think", type=float, default=THINK_TIME, help="the average pause between the moves")
+    parser.add_argument("--protocol", choices=PROTOCOLS, default="json", help="the protocol to play in")
+    parser.add_argument("--multiplex", action="store_true", help="play all the games of a player on one connection")
+    parser.add_argument("--probabilities", action="store_true", help="guess by the mine probabilities")
+    args = parser.parse_args()
+
+    names = [name for name in GAME_MODES if name.lower().startswith(args.mode.lower())]
+    if not names:
+        parser.error(f"Unknown mode: {args.mode}. The modes are: {', '.join(GAME_MODES)}.")
+    mode = GAME_MODES[names[0]]
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    levels = asyncio.run(
+        run_levels(
+            mode,
+            protocol=args.protocol,
+            think=args.think,
+            guess=args.probabilities,
+            multiplex=args.multiplex,
+            duration=args.duration,
+            player_counts=args.players,
+        )
+    )
+
+    connections = "multiplexed" if args.multiplex else "a connection per game"
+    guesses = "guessing by the probabilities" if args.probabilities else "guessing at random"
+    print(
+        f"{names[0]}, {args.protocol}, {connections}, {guesses}, {args.think} s to think, {args.duration} s per level"
+    )
+    print(
+        f"{'players':>8} {'conn/s':>8} {'games/s':>8} {'actions/s':>10} {'p50, ms':>8} {'p90, ms':>8} {'p99, ms':>8} "
+        f"{'KiB/game':>9} {'in /app':>8}"
+    )
+    for n_players, (stats, overall, in_app) in zip(args.players, levels):
+        p50, p90, p99 = (percentile(stats.latencies, fraction) or 0.0 for fraction in (0.5, 0.9, 0.99))
+        print(
+            f"{n_players:>8} {stats.connections / stats.elapsed:>8.1f} {stats.games / stats.elapsed:>8.1f} "
+            f"{stats.actions / stats.elapsed:>10.0f} "
+            f"{p50 * 1e3:>8.2f} {p90 * 1e3:>8.2f} {p99 * 1e3:>8.2f} {overall / 1024:>9.1f} {in_app / 1024:>8.1f}"
+        )
+
+    print(f"\n{'latency, ms':>12}" + "".join(f"{n_players:>8}" for n_players in args.players))
+    for number, bound in enumerate((*LATENCY_BUCKETS, float("inf"))):
+        lower = LATENCY_BUCKETS[number - 1] if number else 0.0
+        counts = [sum(1 for latency in stats.latencies if lower < latency <= bound) for stats, _, _ in levels]
+        label = f"≤ {bound * 1e3:g}" if bound != float("inf") else f"> {lower * 1e3:g}"
+        print(f"{label:>12}" + "".join(f"{count:>8}" for count in counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measures the overhead of the timing instrumentation: the cost of a single observation and of a timed field
+operation compared to the same operation without the decorator, and the share of the instrumentation
+in the time of whole games played by the solver.
+
+Run with `python -m benchmarks.metrics`.
+"""
+
+import random
+import time
+from typing import Callable
+
+from app.core import GAME_MODES, metrics
+from app.schemas import Cell
+from app.services import FieldService
+from app.services.solver import Solver
+
+N_CALLS = 200_000
+N_GAMES = 50
+
+
+def time_calls(function: Callable[[], object], n_calls: int = N_CALLS) -> float:
+    """Times a function without arguments.
+
+    Args:
+        function (Callable[[], object]): The function.
+        n_calls (int, optional): How many times to call it. Defaults to N_CALLS.
+
+    Returns:
+        float: The average time of a call, in seconds.
+    """
+    started = time.perf_counter()
+    for _ in range(n_calls):
+        function()
+    return (time.perf_counter() - started) / n_calls
+
+
+def play_games(height: int, width: int, n_mines: int) -> tuple[float, int]:
+    """Plays games by the solver's hints, guessing when it has to.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+
+    Returns:
+        tuple[float, int]: The total time of the games, in seconds, and the number of timed field operations.
+    """
+    metrics.clear()
+    started = time.perf_counter()
+    for seed in range(N_GAMES):
+        rng = random.Random(seed)
+        start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+        field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, seed=seed)
+        result = field_service.check_cell(cell=start)
+        solver = Solver(field_service=field_service)
+        while not field_service.check_win() and (result is None or result.status != "game_over"):
+            index = solver.find_safe_cell()
+            if index is None:
+                index = rng.choice([index for index, cell_state in enumerate(field_service.state) if not cell_state])
+            result = field_service.check_cell(cell=field_service.calculate_cell(index))
+    elapsed = time.perf_counter() - started
+    n_operations = sum(count for _, _, count in metrics.export().values())
+    return elapsed, n_operations
+
+
+def main() -> None:
+    field_service = FieldService(start=Cell(row=0, column=0))
+    observe = time_calls(lambda: metrics.observe("minesweeper_field_operation_seconds", 0.001, operation="check_win"))
+    timed = time_calls(field_service.check_win)
+    plain = time_calls(lambda: FieldService.check_win.__wrapped__(field_service))  # type: ignore[attr-defined]
+    print(f"observation: {observe * 1e6:.2f} µs, timed check_win: {timed * 1e6:.2f} µs, plain: {plain * 1e6:.2f} µs")
+
+    overhead = timed - plain
+    print(f"\n{'mode':>27} {'game, ms':>9} {'timed ops':>10} {'overhead':>9}")
+    for name, (height, width, n_mines) in GAME_MODES.items():
+        elapsed, n_operations = play_games(height, width, n_mines)
+        print(
+            f"{name:>27} {elapsed / N_GAMES * 1e3:>9.2f} {n_operations // N_GAMES:>10} "
+            f"{n_operations * overhead / elapsed:>9.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
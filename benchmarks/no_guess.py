@@ -0,0 +1,60 @@
+"""Measures how long it takes to generate a board that can be cleared without guessing, for every preset mode.
+
+Each board is generated for a random first click, in this process and without a time budget.
+The fallback boards are measured the same way, along with the share of first clicks they can serve.
+
+Run with `python -m benchmarks.no_guess`.
+"""
+
+import random
+import time
+
+from app.core import GAME_MODES
+from app.schemas import Cell
+from app.services.no_guess import (
+    generate_cached_board,
+    generate_no_guess_board,
+    percentile,
+)
+
+N_BOARDS = 50
+N_CACHED_BOARDS = 10
+
+
+def main() -> None:
+    print(
+        f"{'mode':>27} {'attempts p50':>13} {'attempts p99':>13} {'p50, ms':>8} {'p99, ms':>8} "
+        f"{'cached, ms':>11} {'starts':>7}"
+    )
+    for name, (height, width, n_mines) in GAME_MODES.items():
+        attempts, times = [], []
+        for seed in range(N_BOARDS):
+            rng = random.Random(seed)
+            start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+
+            started = time.perf_counter()
+            _, board_attempts = generate_no_guess_board(
+                height, width, n_mines, start=start, seed=seed, time_budget=float("inf")
+            )
+            times.append(time.perf_counter() - started)
+            attempts.append(board_attempts)
+
+        cached_times, n_starts = [], 0
+        for seed in range(N_CACHED_BOARDS):
+            started = time.perf_counter()
+            cached = generate_cached_board(height, width, n_mines, seed=seed, time_budget=float("inf"))
+            cached_times.append(time.perf_counter() - started)
+            assert cached is not None
+            n_starts += len(cached[1])
+
+        median, tail = percentile(times, 0.5), percentile(times, 0.99)
+        assert median is not None and tail is not None
+        print(
+            f"{name:>27} {percentile(attempts, 0.5):>13} {percentile(attempts, 0.99):>13} "
+            f"{median * 1e3:>8.1f} {tail * 1e3:>8.1f} "
+            f"{sum(cached_times) / N_CACHED_BOARDS * 1e3:>11.1f} {n_starts / N_CACHED_BOARDS / (height * width):>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
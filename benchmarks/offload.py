@@ -0,0 +1,169 @@
+"""Load test of the execution policy: the latency of small games while giant boards are being played
+on the same event loop, with every operation run inline versus the costly ones offloaded to a thread
+or a process pool.
+
+The small games are 16×16 boards played by the hints: a hint, then a click on the hinted cell, each answered
+before the next one is sent. The giant games keep starting new 990×990 boards from scratch with a seed, so that
+no pre-generated board can be used. The games talk to `GameService` through in-memory queues instead of
+a real websocket, so the latencies only measure how long the event loop was held up.
+
+Run with `python -m benchmarks.offload`.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from loguru import logger
+
+from app.services import GameService, execution_policy
+from app.services.no_guess import percentile
+
+DURATION = 5.0
+N_SMALL_GAMES = 8
+N_GIANT_GAMES = 2
+SMALL_MODE = (16, 16, 40)
+GIANT_MODE = (990, 990, 98010)
+
+
+class LoopbackWebSocket:
+    def __init__(self) -> None:
+        """Initialises a stand-in for a websocket that passes the messages through queues, decoded."""
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.outgoing: asyncio.Queue = asyncio.Queue()
+
+    async def receive_text(self) -> str:
+        return json.dumps(await self.incoming.get())
+
+    async def send_text(self, data: str) -> None:
+        await self.outgoing.put(json.loads(data))
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.outgoing.put(data)
+
+
+async def request(websocket: LoopbackWebSocket, payload: dict) -> tuple[dict, float]:
+    """Sends a message to the game and waits for its answer.
+
+    Args:
+        websocket (LoopbackWebSocket): The websocket of the game.
+        payload (dict): The message.
+
+    Returns:
+        tuple[dict, float]: The answer and how long it took, in seconds.
+    """
+    started = time.perf_counter()
+    await websocket.incoming.put(payload)
+    answer = await websocket.outgoing.get()
+    return answer, time.perf_counter() - started
+
+
+async def play_small_games(deadline: float, latencies: list[float], seed: int) -> None:
+    """Keeps playing small games by the hints until the deadline, collecting the latency of every answer.
+
+    Args:
+        deadline (float): When to stop, by `time.perf_counter`.
+        latencies (list[float]): The list to collect the latencies in.
+        seed (int): The seed of the first clicks.
+    """
+    rng = random.Random(seed)
+    height, width, n_mines = SMALL_MODE
+    while time.perf_counter() < deadline:
+        websocket, game_service = LoopbackWebSocket(), GameService()
+        game = asyncio.create_task(game_service.start_game(websocket=websocket))  # type: ignore[arg-type]
+        start = [rng.randrange(height), rng.randrange(width)]
+        answer, latency = await request(
+            websocket, {"type": "start", "start": start, "mines": n_mines, "height": height, "width": width}
+        )
+        latencies.append(latency)
+
+        while answer["status"] == "okay" and time.perf_counter() < deadline:
+            assert game_service.field_service is not None
+            if game_service.field_service.check_win():
+                await websocket.outgoing.get()
+                break
+
+            answer, latency = await request(websocket, {"type": "hint"})
+            latencies.append(latency)
+            if not answer["cells"]["hint"]:
+                break
+
+            cell = answer["cells"]["hint"][0]
+            answer, latency = await request(websocket, {"type": "click", "cell": [cell["row"], cell["column"]]})
+            latencies.append(latency)
+        game.cancel()
+
+
+async def play_giant_games(deadline: float, counter: itertools.count) -> None:
+    """Keeps starting giant games from scratch until the deadline.
+
+    Args:
+        deadline (float): When to stop, by `time.perf_counter`.
+        counter (itertools.count): The seeds of the boards, shared between the giant games.
+    """
+    height, width, n_mines = GIANT_MODE
+    while time.perf_counter() < deadline:
+        websocket, game_service = LoopbackWebSocket(), GameService()
+        game = asyncio.create_task(game_service.start_game(websocket=websocket))  # type: ignore[arg-type]
+        payload = {
+            "type": "start",
+            "start": [height // 2, width // 2],
+            "mines": n_mines,
+            "height": height,
+            "width": width,
+            "seed": next(counter),
+        }
+        await request(websocket, payload)
+        game.cancel()
+
+
+async def run_scenario(n_giant_games: int) -> tuple[list[float], int]:
+    """Plays the small games, along with the given number of giant ones, for `DURATION` seconds.
+
+    Args:
+        n_giant_games (int): The number of giant games played at the same time.
+
+    Returns:
+        tuple[list[float], int]: The sorted latencies of the small games, in seconds,
+            and how many giant boards were started.
+    """
+    deadline = time.perf_counter() + DURATION
+    latencies: list[float] = []
+    counter = itertools.count()
+    await asyncio.gather(
+        *(play_small_games(deadline, latencies, seed=seed) for seed in range(N_SMALL_GAMES)),
+        *(play_giant_games(deadline, counter) for _ in range(n_giant_games)),
+    )
+    return sorted(latencies), next(counter)
+
+
+def main() -> None:
+    logger.remove()
+    print(f"{'scenario':>24} {'answers':>8} {'p50, ms':>8} {'p99, ms':>8} {'max, ms':>9} {'giant boards':>13}")
+    scenarios: list[tuple[str, int, type[ThreadPoolExecutor] | type[ProcessPoolExecutor] | None]] = [
+        ("small games only", 0, None),
+        ("with giant, inline", N_GIANT_GAMES, None),
+        ("with giant, threads", N_GIANT_GAMES, ThreadPoolExecutor),
+        ("with giant, processes", N_GIANT_GAMES, ProcessPoolExecutor),
+    ]
+    for name, n_giant_games, executor_class in scenarios:
+        if executor_class is not None:
+            executor = executor_class(max_workers=N_GIANT_GAMES)
+            list(executor.map(abs, range(N_GIANT_GAMES)))
+            execution_policy.start(executor=executor)
+        latencies, n_giant_boards = asyncio.run(run_scenario(n_giant_games))
+        execution_policy.shutdown()
+
+        median, tail = percentile(latencies, 0.5), percentile(latencies, 0.99)
+        assert median is not None and tail is not None
+        print(
+            f"{name:>24} {len(latencies):>8} {median * 1e3:>8.2f} "
+            f"{tail * 1e3:>8.2f} {latencies[-1] * 1e3:>9.1f} {n_giant_boards:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
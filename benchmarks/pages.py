@@ -0,0 +1,106 @@
+"""Compares rendering the pages on every request with serving them from the page cache,
+and shows how much smaller the pages and the static files get with gzip and brotli.
+
+A render includes the compression, which is what every request would cost without the cache, and a hit is
+taking the page from the cache. The requests go through the whole application with a test client, so their times
+include routing, headers and the client itself. A cached page is also requested with its entity tag,
+which is answered with `304 Not Modified` and no body.
+
+Run with `python -m benchmarks.pages`.
+"""
+
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core import GAME_MODES, get_templates
+from app.core.caching import brotli, page_cache, prepare_content
+from app.main import app, static_files
+
+N_REQUESTS = 2000
+PAGES: list[tuple[str, str, dict]] = [("/", "index.html", {})] + [
+    (
+        f"/create?mode={mode}",
+        "game.html",
+        {"rows": rows, "columns": columns, "mines": mines, "no_guess": False},
+    )
+    for mode, (rows, columns, mines) in GAME_MODES.items()
+]
+
+
+def time_requests(client: TestClient, path: str, headers: dict[str, str]) -> float:
+    """Requests a page over and over.
+
+    Args:
+        client (TestClient): The client.
+        path (str): The path of the page.
+        headers (dict[str, str]): The headers of every request.
+
+    Returns:
+        float: The median time per request, in seconds.
+    """
+    times = []
+    for _ in range(N_REQUESTS):
+        started = time.perf_counter()
+        client.get(path, headers=headers)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def time_render(template_name: str, context: dict) -> tuple[float, float]:
+    """Renders and compresses a template over and over, the way every request would without the cache,
+    then takes it from the cache over and over.
+
+    Args:
+        template_name (str): The name of the template.
+        context (dict): The context of the template.
+
+    Returns:
+        tuple[float, float]: The median time per render and per cache hit, in seconds.
+    """
+    template = get_templates().get_template(template_name)
+    render_times, hit_times = [], []
+    for _ in range(N_REQUESTS):
+        started = time.perf_counter()
+        prepare_content(template.render(**context).encode(), media_type="text/html; charset=utf-8")
+        render_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        page_cache.render(template_name, **context)
+        hit_times.append(time.perf_counter() - started)
+    return statistics.median(render_times), statistics.median(hit_times)
+
+
+def format_sizes(encodings: dict[str, bytes]) -> str:
+    sizes = [len(encodings[name]) if name in encodings else None for name in ("identity", "gzip", "br")]
+    return " ".join(f"{'—' if size is None else size:>8}" for size in sizes)
+
+
+def main() -> None:
+    with TestClient(app) as client:
+        headers = {"accept-encoding": "br, gzip"}
+        print(f"{'page':>32} {'render, µs':>11} {'hit, µs':>8} {'request, µs':>12} {'304, µs':>8}")
+        for path, template_name, context in PAGES:
+            page = client.get(path, headers=headers)
+            rendered, hit = time_render(template_name, context=context)
+            requested = time_requests(client, path, headers=headers)
+            revalidated = time_requests(client, path, headers={**headers, "if-none-match": page.headers["etag"]})
+            times = f"{rendered * 1e6:>11.0f} {hit * 1e6:>8.1f} {requested * 1e6:>12.0f} {revalidated * 1e6:>8.0f}"
+            print(f"{path[:32]:>32} {times}")
+        print(f"page cache: {page_cache.metrics}")
+
+        print()
+        print(f"{'file':>32} {'raw':>8} {'gzip':>8} {'br':>8}")
+        assert static_files.files is not None
+        for name, content in sorted(static_files.files.items()):
+            print(f"{name:>32} {format_sizes(content.encodings)}")
+        for path, template_name, context in PAGES:
+            print(f"{path[:32]:>32} {format_sizes(page_cache.render(template_name, **context).encodings)}")
+
+    if brotli is None:
+        print("\nbrotli isn't installed, so nothing was compressed with it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Measures how close the sampled mine probabilities get to the exact ones, and how much the counts kept
+between moves save.
+
+The positions come from seeded games of the Hard and Extreme modes, played by clicking the closed cell least
+likely to be a mine after every move, as the exact engine sees it. For every position, the exact probabilities
+are compared with the ones of an engine that samples every component, with more and more samples and no time limit,
+and of the default engine, which only samples the components too large to count, within its time budget.
+Positions whose reference had to sample a component are skipped.
+
+The same games are then followed move by move by a single engine, which keeps the counts of the components
+that didn't change, and by a new engine for every move.
+
+Run with `python -m benchmarks.probability`.
+"""
+
+import math
+import random
+import statistics
+import time
+
+from app.core import GAME_MODES
+from app.schemas import Cell
+from app.services import FieldService, ProbabilityEngine
+from app.services.field import MINE
+from app.services.probability import MAX_EXACT_CELLS, MAX_TIME, N_SAMPLES, TIME_BUDGET
+
+MODES = ["Hard: 30×16, 99 mines", "Extreme: 24×30, 160 mines"]
+N_GAMES = 10
+MAX_MOVES = 40
+SAMPLE_COUNTS = [1000, 5000, 20000]
+
+
+def create_reference(field_service: FieldService) -> ProbabilityEngine:
+    """Creates an engine that counts every component exactly, unless one is unreasonably large.
+
+    Args:
+        field_service (FieldService): The field.
+
+    Returns:
+        ProbabilityEngine: The engine.
+    """
+    return ProbabilityEngine(field_service=field_service, max_exact_cells=64, max_steps=5_000_000, max_time=math.inf)
+
+
+def record_positions(height: int, width: int, n_mines: int, seed: int) -> list[bytes]:
+    """Plays a single game by the exact probabilities and keeps the position before every move.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        seed (int): The seed of the game.
+
+    Returns:
+        list[bytes]: The snapshots of the field before every move, until it's won, lost or `MAX_MOVES` long.
+    """
+    rng = random.Random(seed)
+    start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+    field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, seed=seed)
+    field_service.check_cell(cell=start)
+    engine = create_reference(field_service)
+
+    positions: list[bytes] = []
+    while len(positions) < MAX_MOVES and not field_service.check_win():
+        positions.append(field_service.to_snapshot())
+        probabilities = engine.calculate()
+        index = min(probabilities, key=lambda index: (probabilities[index], rng.random()))
+        if field_service.field[index] == MINE:
+            break
+        field_service.check_cell(cell=field_service.calculate_cell(index))
+    return positions
+
+
+def compare(
+    positions: list[bytes],
+    max_exact_cells: int = MAX_EXACT_CELLS,
+    n_samples: int = N_SAMPLES,
+    time_budget: float = 60.0,
+    max_time: float = math.inf,
+) -> tuple[float, float, float, int]:
+    """Compares the probabilities of an engine with the exact ones over positions. The error is measured
+    on the frontier, where the engines differ; the rest of the closed cells are only as far off as the frontier.
+
+    Args:
+        positions (list[bytes]): The snapshots of the positions.
+        max_exact_cells (int, optional): The largest component the engine counts exactly. Defaults to 24.
+        n_samples (int, optional): How many arrangements the engine samples for a single component at most.
+            Defaults to 20000.
+        time_budget (float, optional): How long the engine can sample a single component for, in seconds.
+            Defaults to 60.0 — as long as it takes.
+        max_time (float, optional): How long the engine can take for a whole position, in seconds.
+            Defaults to infinity.
+
+    Returns:
+        tuple[float, float, float, int]: The mean and the largest absolute error over the frontier cells,
+            the median time per position, in seconds, and the number of positions compared.
+    """
+    errors: list[float] = []
+    times: list[float] = []
+    for seed, snapshot in enumerate(positions):
+        reference = create_reference(FieldService.from_snapshot(snapshot))
+        exact = reference.calculate()
+        if reference.metrics["sampled"]:
+            continue
+
+        engine = ProbabilityEngine(
+            field_service=FieldService.from_snapshot(snapshot),
+            max_exact_cells=max_exact_cells,
+            n_samples=n_samples,
+            time_budget=time_budget,
+            max_time=max_time,
+            seed=seed,
+        )
+        started = time.perf_counter()
+        probabilities = engine.calculate()
+        times.append(time.perf_counter() - started)
+        frontier = [cell for weights in reference.components.values() for cell in weights.cells]
+        errors.extend(abs(probabilities[cell] - exact[cell]) for cell in frontier)
+    return statistics.mean(errors), max(errors), statistics.median(times), len(times)
+
+
+def follow(positions: list[bytes]) -> tuple[float, float, float]:
+    """Follows the games of the positions move by move, with a single engine per game and with a new one every move.
+
+    Args:
+        positions (list[bytes]): The snapshots of the positions, game by game, in the order they were played.
+
+    Returns:
+        tuple[float, float, float]: The mean time per move of a single engine and of a new one every move,
+            in seconds, and the share of the components the single engine found already counted.
+    """
+    kept_time = new_time = 0.0
+    engine = None
+    hits = misses = 0
+    for snapshot in positions:
+        field_service = FieldService.from_snapshot(snapshot)
+        if engine is None or field_service.safe_cells_left > engine.field_service.safe_cells_left:
+            if engine is not None:
+                hits, misses = hits + engine.hits, misses + engine.misses
+            engine = ProbabilityEngine(field_service=field_service, seed=0)
+        engine.field_service = field_service
+
+        started = time.perf_counter()
+        engine.calculate()
+        kept_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        ProbabilityEngine(field_service=field_service, seed=0).calculate()
+        new_time += time.perf_counter() - started
+
+    assert engine is not None
+    hits, misses = hits + engine.hits, misses + engine.misses
+    return kept_time / len(positions), new_time / len(positions), hits / ((hits + misses) or 1)
+
+
+def main() -> None:
+    for name in MODES:
+        height, width, n_mines = GAME_MODES[name]
+        games = [record_positions(height, width, n_mines, seed=seed) for seed in range(N_GAMES)]
+        positions = [position for game in games for position in game]
+
+        print(name)
+        print(f"{'engine':>26} {'positions':>10} {'mean error':>11} {'max error':>10} {'p50, ms':>8}")
+        for n_samples in SAMPLE_COUNTS:
+            mean_error, max_error, median_time, n_positions = compare(positions, max_exact_cells=0, n_samples=n_samples)
+            label = f"sampled, {n_samples} samples"
+            print(f"{label:>26} {n_positions:>10} {mean_error:>11.4f} {max_error:>10.4f} {median_time * 1e3:>8.2f}")
+        mean_error, max_error, median_time, n_positions = compare(positions, time_budget=TIME_BUDGET, max_time=MAX_TIME)
+        print(f"{'default':>26} {n_positions:>10} {mean_error:>11.4f} {max_error:>10.4f} {median_time * 1e3:>8.2f}")
+
+        kept_time, new_time, hit_rate = follow(positions)
+        print(
+            f"following the games: {kept_time * 1e3:.2f} ms per move with the counts kept, "
+            f"{new_time * 1e3:.2f} ms with a new engine, {hit_rate:.0%} of the components already counted\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+"""Replays the games of a replay log, to measure the game engine over real games and to check that a change
+doesn't change what the players see.
+
+The games can be replayed directly on the fields, action by action, or through the websocket endpoint
+of a server started on the same event loop, message by message, in the JSON or the binary protocol.
+Both report the throughput, the latency percentiles and the peak memory allocated per game, which is measured
+in a second pass under `tracemalloc`, since tracing slows everything down. The answers can be saved
+and compared byte for byte with the ones saved by another version of the code. The game IDs,
+which are random, are replaced with a placeholder in the answers of the server. The games on no-guess boards
+can only be replayed on the fields, since the server can't be asked for a board by its mines.
+
+A replay log is recorded by the server when `REPLAY_LOG_PATH` is set, or made up from games played
+by the hints through `GameService`, with some flags, chords and guesses thrown in:
+
+    python -m benchmarks.replay record games.log --games 200
+    python -m benchmarks.replay field games.log --save field.answers
+    python -m benchmarks.replay websocket games.log --protocol binary --compare websocket.answers
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+import uvicorn
+import websockets
+from loguru import logger
+
+from app.core import GAME_MODES, settings
+from app.main import app
+from app.schemas import GameResponse
+from app.services import (
+    FieldService,
+    GameService,
+    ProbabilityEngine,
+    Solver,
+    game_recorder,
+    no_guess_generator,
+)
+from app.services.field import MINE, OPENED
+from app.services.no_guess import percentile
+from app.services.protocol import (
+    PROTOCOLS,
+    STATUS_CODES,
+    decode_binary,
+    encode_binary,
+    read_varint,
+    write_varint,
+)
+from app.services.replay import GameRecord, create_replay_field, read_records
+from benchmarks.offload import LoopbackWebSocket
+
+N_GAMES = 200
+MAX_TURNS = 1000
+NO_GUESS_SHARE = 0.1
+STREAM_SHARE = 0.5
+TIMEOUT = 10.0
+GAME_ID_PLACEHOLDER = b"<game_id>"
+
+
+class PlayerWebSocket(LoopbackWebSocket):
+    def __init__(self) -> None:
+        """Initialises a stand-in for a websocket that also tells when the game is waiting for the next message,
+        so that all the answers to a message can be collected, however many there are."""
+        super().__init__()
+        self.waiting = asyncio.Event()
+
+    async def receive_text(self) -> str:
+        if self.incoming.empty():
+            self.waiting.set()
+        return await super().receive_text()
+
+
+async def exchange(websocket: PlayerWebSocket, payload: dict) -> list:
+    """Sends a message to the game and collects its answers.
+
+    Args:
+        websocket (PlayerWebSocket): The websocket of the game.
+        payload (dict): The message.
+
+    Returns:
+        list: The answers, decoded.
+    """
+    websocket.waiting.clear()
+    await websocket.incoming.put(payload)
+    await websocket.waiting.wait()
+
+    answers = []
+    while not websocket.outgoing.empty():
+        answers.append(websocket.outgoing.get_nowait())
+    return answers
+
+
+def choose_turn(field_service: FieldService, hint: list[dict], rng: random.Random) -> dict:
+    """Chooses the next message of a game played by the hints: a click on the hinted cell, or on a random
+    closed cell if there's no hint, sometimes inside a batch that flags and unflags another cell,
+    or a chord on an opened number after flagging its mines.
+
+    Args:
+        field_service (FieldService): The field of the game.
+        hint (list[dict]): The hinted cells.
+        rng (random.Random): The random generator of the player.
+
+    Returns:
+        dict: The message.
+    """
+    width = field_service.width
+    closed = [index for index, cell_state in enumerate(field_service.state) if not cell_state]
+    index = hint[0]["row"] * width + hint[0]["column"] if hint else rng.choice(closed)
+    click = {"type": "click", "cell": divmod(index, width)}
+
+    roll = rng.random()
+    others = [other for other in closed if other != index]
+    if roll < 0.1 and others:
+        other = divmod(rng.choice(others), width)
+        return {
+            "type": "batch",
+            "actions": [{"type": "flag", "cell": other}, click, {"type": "remove_flag", "cell": other}],
+        }
+
+    numbers = [number for number, cell_state in enumerate(field_service.state) if cell_state & OPENED]
+    numbers = [number for number in numbers if field_service.field[number]]
+    if roll < 0.2 and numbers:
+        number = rng.choice(numbers)
+        neighbours = field_service.get_cell_neighbours(number)
+        mines = [mine for mine in neighbours if field_service.field[mine] == MINE and not field_service.state[mine]]
+        flags = [{"type": "flag", "cell": divmod(mine, width)} for mine in mines]
+        return {"type": "batch", "actions": [*flags, {"type": "check_neighbours", "cell": divmod(number, width)}]}
+    return click
+
+
+async def record_games(n_games: int, seed: int) -> None:
+    """Plays games by the hints through `GameService`, in all the preset modes, recording them in the replay log.
+
+    Args:
+        n_games (int): The number of games.
+        seed (int): The seed of the players and the boards.
+    """
+    rng = random.Random(seed)
+    modes = list(GAME_MODES.values())
+    for _ in range(n_games):
+        height, width, n_mines = rng.choice(modes)
+        websocket, game_service = PlayerWebSocket(), GameService()
+        game = asyncio.create_task(game_service.start_game(websocket=websocket))  # type: ignore[arg-type]
+        payload = {
+            "type": "start",
+            "start": [rng.randrange(height), rng.randrange(width)],
+            "mines": n_mines,
+            "height": height,
+            "width": width,
+            "seed": rng.getrandbits(32),
+            "no_guess": rng.random() < NO_GUESS_SHARE,
+            "stream": rng.random() < STREAM_SHARE,
+        }
+        await exchange(websocket, payload)
+
+        for _ in range(MAX_TURNS):
+            assert game_service.field_service is not None
+            if game_service.finished:
+                break
+            hint = (await exchange(websocket, {"type": "hint"}))[0]["cells"]["hint"]
+            await exchange(websocket, choose_turn(game_service.field_service, hint=hint, rng=rng))
+
+        game.cancel()
+        game_service.save_record()
+
+
+def apply_action(
+    field_service: FieldService,
+    solver: Solver | None,
+    probability_engine: ProbabilityEngine | None,
+    action: str,
+    index: int | None,
+) -> bytes:
+    """Applies a recorded action to a field, the same way `GameService` does.
+
+    Args:
+        field_service (FieldService): The field.
+        solver (Solver | None): The solver giving the hints, if one was asked for already.
+        probability_engine (ProbabilityEngine | None): The engine giving the mine probabilities,
+            if they were asked for already.
+        action (str): The type of the action.
+        index (int | None): The flat index of the cell of the action, if it has one.
+
+    Returns:
+        bytes: The result of the action in the binary protocol, or nothing if there's no result.
+    """
+    result: GameResponse | None = None
+    if action == "hint":
+        assert solver is not None
+        safe = solver.find_safe_cell()
+        result = GameResponse(
+            status="okay", cells=field_service.build_collection({"hint": [] if safe is None else [safe]})
+        )
+    elif action == "probabilities":
+        assert probability_engine is not None
+        result = GameResponse(status="okay", probabilities=probability_engine.calculate_rows())
+    else:
+        assert index is not None
+        cell = field_service.calculate_cell(index)
+        if action == "click":
+            result = field_service.check_cell(cell=cell)
+        elif action == "check_neighbours":
+            result = field_service.check_neighbouring_cells(cell=cell)
+        else:
+            field_service.flag_cell(cell=cell, remove_flag=action == "remove_flag")
+    return encode_binary(result, width=field_service.width) if result else b""
+
+
+async def replay_on_field(record: GameRecord) -> tuple[list[bytes], list[float]]:
+    """Replays a game directly on its field. The actions of a batch after the one that lost the game are skipped,
+    like `GameService` does.
+
+    Args:
+        record (GameRecord): The game.
+
+    Returns:
+        tuple[list[bytes], list[float]]: The results of the actions, the first click included,
+            and their latencies, in seconds. The first click also counts creating the field.
+    """
+    started = time.perf_counter()
+    field_service = create_replay_field(record)
+    answers = [apply_action(field_service, solver=None, probability_engine=None, action="click", index=record.start)]
+    latencies = [time.perf_counter() - started]
+
+    solver = None
+    probability_engine = None
+    for actions, _ in record.messages:
+        for action, index in actions:
+            started = time.perf_counter()
+            if action == "hint" and solver is None:
+                solver = Solver(field_service=field_service)
+            elif action == "probabilities" and probability_engine is None:
+                probability_engine = ProbabilityEngine(
+                    field_service=field_service,
+                    max_exact_cells=settings.PROBABILITY_MAX_EXACT_CELLS,
+                    n_samples=settings.PROBABILITY_SAMPLES,
+                    time_budget=settings.PROBABILITY_TIME_BUDGET,
+                    max_time=settings.PROBABILITY_MAX_TIME,
+                    seed=field_service.seed,
+                )
+            answer = apply_action(
+                field_service, solver=solver, probability_engine=probability_engine, action=action, index=index
+            )
+            latencies.append(time.perf_counter() - started)
+            answers.append(answer)
+            if answer and answer[0] == STATUS_CODES["game_over"]:
+                break
+    return answers, latencies
+
+
+async def replay_through_websocket(url: str, record: GameRecord, protocol: str) -> tuple[list[bytes], list[float]]:
+    """Replays a game through the websocket endpoint, waiting for as many answers to every message as were recorded.
+
+    Args:
+        url (str): The URL of the endpoint.
+        record (GameRecord): The game.
+        protocol (str): The protocol to ask for.
+
+    Raises:
+        RuntimeError: If the server sends fewer answers than were recorded.
+
+    Returns:
+        tuple[list[bytes], list[float]]: The answers, with the game ID replaced, and the latencies
+            of the messages that had an answer, until their last one, in seconds.
+    """
+    width = record.width
+    async with websockets.connect(url, max_size=None) as websocket:
+
+        async def send(payload: dict, n_frames: int) -> tuple[list[bytes], float]:
+            started = time.perf_counter()
+            await websocket.send(json.dumps(payload))
+            frames: list[bytes] = []
+            for _ in range(n_frames):
+                try:
+                    frame = await asyncio.wait_for(websocket.recv(), timeout=TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise RuntimeError(f"Expected {n_frames} answers to {payload}, got {len(frames)}.") from None
+                frames.append(frame.encode() if isinstance(frame, str) else frame)
+            return frames, time.perf_counter() - started
+
+        start = {
+            "type": "start",
+            "start": divmod(record.start, width),
+            "mines": record.n_mines,
+            "height": record.height,
+            "width": width,
+            "seed": record.seed,
+            "protocol": protocol,
+            "stream": record.stream,
+        }
+        answers, latency = await send(start, n_frames=record.start_frames)
+        latencies = [latency]
+        last = decode_binary(answers[-1], width=width) if protocol == "binary" else json.loads(answers[-1])
+        game_id = last["game_id"].encode()
+
+        for actions, n_frames in record.messages:
+            payloads: list[dict[str, object]] = [
+                {"type": action} if index is None else {"type": action, "cell": divmod(index, width)}
+                for action, index in actions
+            ]
+            payload: dict[str, object] = payloads[0] if len(payloads) == 1 else {"type": "batch", "actions": payloads}
+            frames, latency = await send(payload, n_frames=n_frames)
+            answers += frames
+            if n_frames:
+                latencies.append(latency)
+    return [answer.replace(game_id, GAME_ID_PLACEHOLDER) for answer in answers], latencies
+
+
+async def measure(
+    records: list[GameRecord], replay: Callable[[GameRecord], Awaitable[tuple[list[bytes], list[float]]]]
+) -> tuple[list[list[bytes]], list[float], float, list[int]]:
+    """Replays the games one by one, then again under `tracemalloc`.
+
+    Args:
+        records (list[GameRecord]): The games.
+        replay (Callable[[GameRecord], Awaitable[tuple[list[bytes], list[float]]]]): Replays a single game.
+
+    Returns:
+        tuple[list[list[bytes]], list[float], float, list[int]]: The answers of every game, the latencies,
+            the total time of the games, in seconds, and the peak memory allocated by every game, in bytes.
+    """
+    answers, latencies, elapsed = [], [], 0.0
+    for record in records:
+        started = time.perf_counter()
+        game_answers, game_latencies = await replay(record)
+        elapsed += time.perf_counter() - started
+        answers.append(game_answers)
+        latencies += game_latencies
+
+    peaks = []
+    tracemalloc.start()
+    for record in records:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await replay(record)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return answers, latencies, elapsed, peaks
+
+
+@asynccontextmanager
+async def serve() -> AsyncIterator[str]:
+    """Runs the server on a free local port on the running event loop.
+
+    Yields:
+        str: The URL of the websocket endpoint.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"ws://127.0.0.1:{port}/ws/play/"
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def replay_on_server(
+    records: list[GameRecord], protocol: str
+) -> tuple[list[list[bytes]], list[float], float, list[int]]:
+    """Replays the games through the websocket endpoint of a server started for them. See `measure`.
+
+    Args:
+        records (list[GameRecord]): The games.
+        protocol (str): The protocol to ask for.
+
+    Returns:
+        tuple[list[list[bytes]], list[float], float, list[int]]: The same as `measure`.
+    """
+    async with serve() as url:
+        return await measure(records, replay=partial(replay_through_websocket, url, protocol=protocol))
+
+
+def write_answers(path: str, answers: Iterable[list[bytes]]) -> None:
+    """Saves the answers of the games: for every game, the varint number of its answers,
+    and every answer as its varint length and its bytes.
+
+    Args:
+        path (str): The path of the file.
+        answers (Iterable[list[bytes]]): The answers of every game.
+    """
+    data = bytearray()
+    for game_answers in answers:
+        write_varint(data, len(game_answers))
+        for answer in game_answers:
+            write_varint(data, len(answer))
+            data += answer
+
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def read_answers(path: str) -> list[list[bytes]]:
+    """Loads the answers saved by `write_answers`.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        list[list[bytes]]: The answers of every game.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    answers, offset = [], 0
+    while offset < len(data):
+        n_answers, offset = read_varint(data, offset)
+        game_answers = []
+        for _ in range(n_answers):
+            length, offset = read_varint(data, offset)
+            game_answers.append(data[offset : offset + length])  # noqa: E203
+            offset += length
+        answers.append(game_answers)
+    return answers
+
+
+def compare_answers(expected: list[list[bytes]], actual: list[list[bytes]]) -> bool:
+    """Compares the answers with the saved ones byte for byte, printing the first difference of every game.
+
+    Args:
+        expected (list[list[bytes]]): The saved answers of every game.
+        actual (list[list[bytes]]): The answers of the replay.
+
+    Returns:
+        bool: Whether all the answers match.
+    """
+    if len(expected) != len(actual):
+        print(f"{len(actual)} games replayed, but {len(expected)} saved")
+        return False
+
+    n_different = 0
+    for number, (saved, replayed) in enumerate(zip(expected, actual)):
+        if saved == replayed:
+            continue
+        n_different += 1
+        first = next(
+            (i for i, (old, new) in enumerate(zip(saved, replayed)) if old != new), min(len(saved), len(replayed))
+        )
+        print(f"game {number}: answer {first} differs ({len(saved)} saved, {len(replayed)} replayed)")
+    print(f"{len(actual) - n_different} of {len(actual)} games match")
+    return not n_different
+
+
+def report(n_actions: int, latencies: list[float], elapsed: float, peaks: list[int], unit: str) -> None:
+    """Prints the throughput, the latency percentiles and the peak memory per game.
+
+    Args:
+        n_actions (int): The number of replayed actions.
+        latencies (list[float]): The latencies, in seconds.
+        elapsed (float): The total time of the games, in seconds.
+        peaks (list[int]): The peak memory allocated by every game, in bytes.
+        unit (str): What the latencies were measured for.
+    """
+    print(f"{len(peaks)} games, {n_actions} actions in {elapsed:.2f} s: {n_actions / elapsed:,.0f} actions/s")
+    p50, p99, p100 = (percentile(latencies, fraction) or 0.0 for fraction in (0.5, 0.99, 1.0))
+    print(f"latency per {unit}: p50 {p50 * 1e6:.0f} µs, p99 {p99 * 1e6:.0f} µs, max {p100 * 1e6:.0f} µs")
+    median, largest = percentile(peaks, 0.5) or 0, max(peaks, default=0)
+    print(f"peak memory per game: median {median / 1024:.0f} KiB, max {largest / 1024:.0f} KiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Records the games of a replay log or replays them.")
+    parser.add_argument("target", choices=("record", "field", "websocket"), help="record games or where to replay them")
+    parser.add_argument("log", help="the path of the replay log")
+    parser.add_argument("--games", type=int, default=N_GAMES, help="the number of games to record")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the recorded games")
+    parser.add_argument("--protocol", choices=PROTOCOLS, default="json", help="the protocol to replay the games in")
+    parser.add_argument("--save", help="a file to save the answers to")
+    parser.add_argument("--compare", help="a file of saved answers to compare the answers with")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    if args.target == "record":
+        game_recorder.path = args.log
+        no_guess_generator.start(executor=ThreadPoolExecutor(max_workers=1))
+        asyncio.run(record_games(n_games=args.games, seed=args.seed))
+        no_guess_generator.shutdown()
+        game_recorder.close()
+        print(f"{game_recorder.n_records} games recorded in {args.log}")
+        return
+
+    records = list(read_records(args.log))
+    if args.target == "field":
+        answers, latencies, elapsed, peaks = asyncio.run(measure(records, replay=replay_on_field))
+        report(n_actions=len(latencies), latencies=latencies, elapsed=elapsed, peaks=peaks, unit="action")
+    else:
+        n_skipped = sum(1 for record in records if record.layout)
+        if n_skipped:
+            print(f"{n_skipped} games on no-guess boards skipped")
+        records = [record for record in records if not record.layout]
+        answers, latencies, elapsed, peaks = asyncio.run(replay_on_server(records, protocol=args.protocol))
+        n_actions = sum(1 + sum(len(message.actions) for message in record.messages) for record in records)
+        report(n_actions=n_actions, latencies=latencies, elapsed=elapsed, peaks=peaks, unit="message")
+
+    if args.save:
+        write_answers(args.save, answers)
+    if args.compare and not compare_answers(expected=read_answers(args.compare), actual=answers):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Measures the hint latency of the solver over a corpus of positions from generated games.
+
+The games of every preset mode are played by the solver itself: it opens the safe cell it finds,
+and when there is none, a random closed cell that isn't a known mine, until the game ends.
+Every position is solved both by the incremental solver following the game and by a fresh solver
+that starts from scratch, as a hint would be without the incremental state.
+
+Run with `python -m benchmarks.solver`.
+"""
+
+import random
+import time
+
+from app.core import GAME_MODES
+from app.schemas import Cell
+from app.services import FieldService
+from app.services.field import OPENED
+from app.services.solver import Solver
+
+N_GAMES = 100
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Picks a percentile of the values by the nearest rank.
+
+    Args:
+        values (list[float]): The sorted values.
+        fraction (float): The percentile, as a fraction of one.
+
+    Returns:
+        float: The value at the percentile.
+    """
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def play_game(height: int, width: int, n_mines: int, seed: int) -> tuple[list[float], list[float], int]:
+    """Plays a single game by the solver's hints, timing every hint.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        seed (int): The seed of the game and of the guesses.
+
+    Returns:
+        tuple[list[float], list[float], int]: The latencies of the incremental and of the fresh hints, in seconds,
+            and how many positions had a certainly safe cell.
+    """
+    rng = random.Random(seed)
+    start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+    field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, seed=seed)
+    field_service.check_cell(cell=start)
+    solver = Solver(field_service=field_service)
+
+    incremental, fresh, n_certain = [], [], 0
+    while not field_service.check_win():
+        position = FieldService.from_snapshot(field_service.to_snapshot())
+        started = time.perf_counter()
+        Solver(field_service=position).find_safe_cell()
+        fresh.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        index = solver.find_safe_cell()
+        incremental.append(time.perf_counter() - started)
+
+        if index is None:
+            index = rng.choice(
+                [
+                    index
+                    for index, cell_state in enumerate(field_service.state)
+                    if not cell_state & OPENED and index not in solver.mines
+                ]
+            )
+        else:
+            n_certain += 1
+
+        result = field_service.check_index(index=index)
+        if result is not None and result.status == "game_over":
+            break
+    return incremental, fresh, n_certain
+
+
+def main() -> None:
+    print(
+        f"{'mode':>27} {'positions':>10} {'certain':>8} {'p50, ms':>8} {'p99, ms':>8} {'max, ms':>8} "
+        f"{'fresh p50, ms':>14} {'fresh p99, ms':>14}"
+    )
+    for name, (height, width, n_mines) in GAME_MODES.items():
+        incremental, fresh, n_certain = [], [], 0
+        for seed in range(N_GAMES):
+            game_incremental, game_fresh, game_certain = play_game(height, width, n_mines, seed=seed)
+            incremental += game_incremental
+            fresh += game_fresh
+            n_certain += game_certain
+
+        incremental.sort()
+        fresh.sort()
+        print(
+            f"{name:>27} {len(incremental):>10} {n_certain / len(incremental):>8.0%} "
+            f"{percentile(incremental, 0.5) * 1e3:>8.3f} {percentile(incremental, 0.99) * 1e3:>8.3f} "
+            f"{incremental[-1] * 1e3:>8.3f} "
+            f"{percentile(fresh, 0.5) * 1e3:>14.3f} {percentile(fresh, 0.99) * 1e3:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Measures the cold start of the app: how long importing it takes, and how long a new server takes to answer
+its first request and its first game, with and without the build and the warm-up.
+
+Every import is timed in a new interpreter, along with the imports of the main dependencies on their own,
+to show which of them the app still loads. Every start runs `python -m app.main` as a new process, the way
+the container does, and requests the game page of the Extreme mode until it's answered. The first response
+is timed from the start of the process and the first page from its request, which also waits for the server
+to start if the port was already open, like with the reloader. Then two Extreme games are started
+through `/ws/play/`, one after the other, and the time until the first click of each is answered is reported.
+
+The build is made into a temporary directory with `app.core.build`, and the configurations without it
+point `BUILD_PATH` to a directory that doesn't exist.
+
+Run with `python -m benchmarks.startup`.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+import websockets
+
+from app.core import GAME_MODES
+from app.core.build import build
+
+N_RUNS = 5
+MODE = "Extreme: 24×30, 160 mines"
+DEPENDENCIES = ["fastapi", "pydantic_settings", "loguru", "jinja2", "uvicorn", "numpy"]
+CONFIGURATIONS = [
+    ("reload, no build, no warm-up", {"RELOAD": "true", "WARM_UP": "false"}, False),
+    ("no build, no warm-up", {"RELOAD": "false", "WARM_UP": "false"}, False),
+    ("no build, warm-up", {"RELOAD": "false", "WARM_UP": "true"}, False),
+    ("build, no warm-up", {"RELOAD": "false", "WARM_UP": "false"}, True),
+    ("build, warm-up", {"RELOAD": "false", "WARM_UP": "true"}, True),
+]
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps([time.perf_counter() - started, sorted(sys.modules)]))
+"""
+
+
+def time_import(module: str) -> tuple[float, set[str]]:
+    """Imports a module in a new interpreter.
+
+    Args:
+        module (str): The name of the module.
+
+    Returns:
+        tuple[float, set[str]]: The time of the import, in seconds, and the names of all the modules it loaded.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)], capture_output=True, check=True, text=True
+    ).stdout
+    elapsed, modules = json.loads(output.splitlines()[-1])
+    return elapsed, set(modules)
+
+
+async def time_games(port: int) -> list[float]:
+    """Plays the first click of two games, one after the other.
+
+    Args:
+        port (int): The port of the server.
+
+    Returns:
+        list[float]: The time from the start of every game until its first click is answered, in seconds.
+    """
+    height, width, n_mines = GAME_MODES[MODE]
+    start = {"type": "start", "start": [height // 2, width // 2], "mines": n_mines, "height": height, "width": width}
+    times = []
+    for _ in range(2):
+        started = time.perf_counter()
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws/play/", max_size=None) as websocket:
+            await websocket.send(json.dumps(start))
+            await websocket.recv()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def time_start(environment: dict[str, str]) -> tuple[float, float, float, float]:
+    """Starts a server and times its first request and its first games.
+
+    Args:
+        environment (dict[str, str]): The settings of the server.
+
+    Returns:
+        tuple[float, float, float, float]: The time from the start of the process until the first response,
+            the time of the request that got it, and the times of the first and the second game, in seconds.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    url = f"http://127.0.0.1:{port}/create?mode={urllib.parse.quote(MODE)}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.main"],
+        env={**os.environ, "HOST": "127.0.0.1", "PORT": str(port), "LOG_LEVEL": "WARNING", **environment},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        while True:
+            requested = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                break
+            except OSError:
+                if process.poll() is not None:
+                    raise RuntimeError("The server exited before answering")
+                time.sleep(0.005)
+        answered = time.perf_counter()
+        first_game, second_game = asyncio.run(time_games(port))
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+    return answered - started, answered - requested, first_game, second_game
+
+
+def main() -> None:
+    imports = [time_import("app.main") for _ in range(N_RUNS)]
+    app_modules = imports[0][1]
+    print(f"{'import':>30} {'ms':>8} {'by app.main':>12}")
+    print(f"{'app.main':>30} {statistics.median(elapsed for elapsed, _ in imports) * 1e3:>8.0f} {'':>12}")
+    for module in DEPENDENCIES:
+        try:
+            elapsed = statistics.median(time_import(module)[0] for _ in range(N_RUNS))
+        except subprocess.CalledProcessError:
+            print(f"{module:>30} {'—':>8} {'not installed':>12}")
+            continue
+        print(f"{module:>30} {elapsed * 1e3:>8.0f} {'yes' if module in app_modules else 'no':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_path = os.path.join(directory, "build")
+        build(build_path)
+
+        print(
+            f"\n{'configuration':>30} {'first response, ms':>19} {'first page, ms':>15} "
+            f"{'first game, ms':>15} {'second game, ms':>16}"
+        )
+        for label, environment, built in CONFIGURATIONS:
+            environment = {**environment, "BUILD_PATH": build_path if built else os.path.join(directory, "none")}
+            runs = [time_start(environment) for _ in range(N_RUNS)]
+            ready, page, first_game, second_game = (statistics.median(column) * 1e3 for column in zip(*runs))
+            print(f"{label:>30} {ready:>19.0f} {page:>15.1f} {first_game:>15.1f} {second_game:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
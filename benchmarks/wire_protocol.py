@@ -0,0 +1,81 @@
+"""Compares the size and serialization time of the JSON and the binary game responses.
+
+The responses are recorded from seeded games of every preset mode, played by clicking random safe cells
+until the board is cleared, and by hitting a mine at the end of every other game.
+
+Run with `python -m benchmarks.wire_protocol`.
+"""
+
+import json
+import random
+import time
+
+from app.core import GAME_MODES
+from app.schemas import Cell, GameResponse
+from app.services import FieldService
+from app.services.field import MINE, OPENED
+from app.services.protocol import decode_binary, encode_binary
+
+N_GAMES = 50
+
+
+def record_game(height: int, width: int, n_mines: int, seed: int) -> list[GameResponse]:
+    """Plays a single game by clicking random unopened safe cells, and records the responses.
+
+    Args:
+        height (int): Height of the game field.
+        width (int): Width of the game field.
+        n_mines (int): Number of mines in the game.
+        seed (int): The seed of the game and of the clicks.
+
+    Returns:
+        list[GameResponse]: The responses in the order they were sent.
+    """
+    rng = random.Random(seed)
+    start = Cell(row=rng.randrange(height), column=rng.randrange(width))
+    field_service = FieldService(start=start, n_mines=n_mines, height=height, width=width, seed=seed)
+
+    responses = [field_service.check_cell(cell=start)]
+    while not field_service.check_win():
+        closed = [
+            index
+            for index, cell_value in enumerate(field_service.field)
+            if cell_value != MINE and not field_service.state[index] & OPENED
+        ]
+        responses.append(field_service.check_cell(cell=field_service.calculate_cell(rng.choice(closed))))
+    if seed % 2:
+        responses.append(field_service.check_cell(cell=field_service.calculate_cell(field_service.mines[0])))
+    else:
+        responses.append(GameResponse(status="win", stats=field_service.get_stats()))
+    return [response for response in responses if response is not None]
+
+
+def main() -> None:
+    print(f"{'mode':>27} {'json, B/msg':>12} {'binary, B/msg':>14} {'json, µs/msg':>13} {'binary, µs/msg':>15}")
+    for name, (height, width, n_mines) in GAME_MODES.items():
+        responses = [response for seed in range(N_GAMES) for response in record_game(height, width, n_mines, seed=seed)]
+
+        started = time.perf_counter()
+        json_frames = [
+            json.dumps(response.model_dump(), ensure_ascii=False, separators=(",", ":")).encode()
+            for response in responses
+        ]
+        json_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        binary_frames = [encode_binary(response, width=width) for response in responses]
+        binary_time = time.perf_counter() - started
+
+        for response, frame in zip(responses, binary_frames):
+            assert decode_binary(frame, width=width)["status"] == response.status
+
+        n_responses = len(responses)
+        print(
+            f"{name:>27} {sum(map(len, json_frames)) / n_responses:>12.0f} "
+            f"{sum(map(len, binary_frames)) / n_responses:>14.0f} "
+            f"{json_time / n_responses * 1e6:>13.1f} {binary_time / n_responses * 1e6:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()